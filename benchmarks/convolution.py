@@ -0,0 +1,83 @@
+"""
+Benchmarks every convolution strategy for kernels of growing size, to show where each one wins. Square Gaussian kernels
+are rank-1, so the direct, two pass and FFT strategies all apply to them; single row kernels are also timed with the
+one pass strategy. The strategy Convolution picks for the kernel is marked.
+
+Run from the repository root:
+    python -m benchmarks.convolution --shape 1500 1200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from gc2d.model.transformations.convolution import Convolution, ConvolutionStrategy, separate
+
+
+def best_time(function, repeat):
+    """
+    :return: The shortest time of a number of calls of the function, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def time_strategies(data, matrix, strategies, repeat):
+    """
+    :return: The shortest time of every strategy, by strategy.
+    """
+    times = {}
+    for strategy in strategies:
+        convolution = Convolution(matrix)
+        convolution.strategy = strategy
+        convolution.separated = separate(matrix) if strategy is ConvolutionStrategy.SEPARABLE else None
+        times[strategy] = best_time(lambda: convolution.transform(data), repeat)
+    return times
+
+
+def report(label, picked, times):
+    """
+    Prints a row of the table, the fastest time is starred and the picked strategy is marked with brackets.
+    """
+    fastest = min(times, key=times.get)
+    cells = []
+    for strategy in ConvolutionStrategy:
+        if strategy not in times:
+            cells.append('{:>12}'.format('-'))
+            continue
+        cell = '{:.3f}{}'.format(times[strategy], '*' if strategy is fastest else '')
+        cells.append('{:>12}'.format('[{}]'.format(cell) if strategy is picked else cell))
+    print('{:>10} {}'.format(label, ' '.join(cells)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the convolution strategies.')
+    parser.add_argument('--shape', type=int, nargs=2, default=[1500, 1200], help='the shape of the data')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 5, 8, 9, 15, 31, 63],
+                        help='the sides of the square kernels')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[9, 63, 95, 127, 255, 511],
+                        help='the lengths of the single row kernels')
+    parser.add_argument('--repeat', type=int, default=3, help='the number of runs, the fastest counts')
+    args = parser.parse_args(argv)
+
+    data = np.random.default_rng(0).random(tuple(args.shape)) * 1000
+    print('data {}x{}, best of {} in seconds, * fastest, [ ] picked'.format(args.shape[0], args.shape[1], args.repeat))
+    print('{:>10} {}'.format('kernel', ' '.join('{:>12}'.format(strategy.name) for strategy in ConvolutionStrategy)))
+    for size in args.sizes:
+        profile = np.exp(-np.linspace(-2, 2, size) ** 2)
+        matrix = np.outer(profile, profile)
+        times = time_strategies(data, matrix, [ConvolutionStrategy.DIRECT, ConvolutionStrategy.SEPARABLE,
+                                               ConvolutionStrategy.FFT], args.repeat)
+        report('{}x{}'.format(size, size), Convolution(matrix).strategy, times)
+    for length in args.lengths:
+        matrix = np.exp(-np.linspace(-2, 2, length) ** 2).reshape((1, length))
+        times = time_strategies(data, matrix, list(ConvolutionStrategy), args.repeat)
+        report('1x{}'.format(length), Convolution(matrix).strategy, times)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmarks DynamicCutoff against the implementation it replaced, which clipped the data, sorted every row with
+np.quantile and averaged with np.average, for the time and the traced peak memory of both modes.
+
+Run from the repository root:
+    python -m benchmarks.dynamic_cutoff --shape 1500 1200 --percentile 30
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from gc2d.model.transformations import CutoffMode, DynamicCutoff
+
+
+def previous(data, percentile, mode):
+    """
+    The implementation DynamicCutoff replaced.
+    """
+    data = np.clip(data, 0, None)
+    quantiles = np.quantile(data, percentile / 100, axis=1)
+    if mode == CutoffMode.MEAN:
+        quantiles = quantiles.reshape((len(quantiles), 1))
+        mask = data <= quantiles
+        cutoffs = np.average(data, axis=1, weights=mask)
+    else:
+        cutoffs = quantiles
+    return np.clip((data.transpose() - cutoffs).transpose(), 0, None)
+
+
+def measure(function, repeat):
+    """
+    :return: The shortest time of a number of calls of the function in seconds, and the peak memory traced during one
+        call in bytes.
+    """
+    function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the dynamic cut-off transform.')
+    parser.add_argument('--shape', type=int, nargs=2, default=[1500, 1200], help='the shape of the data')
+    parser.add_argument('--percentile', type=float, default=30, help='the percentile of the cut-off')
+    parser.add_argument('--dtype', default='float64', help='the dtype of the data')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of runs, the fastest counts')
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    data = (rng.standard_normal(tuple(args.shape)) * 20 + rng.random((args.shape[0], 1)) * 50).astype(args.dtype)
+    print('data {}x{} {}, {}%, best of {}'.format(args.shape[0], args.shape[1], args.dtype, args.percentile,
+                                                 args.repeat))
+    print('{:>9} {:>14} {:>9} {:>10}'.format('mode', 'implementation', 'time (s)', 'peak (MB)'))
+    for mode in CutoffMode:
+        transform = DynamicCutoff(args.percentile, mode)
+        for name, function in (('previous', lambda: previous(data, args.percentile, mode)),
+                               ('DynamicCutoff', lambda: transform.transform(data))):
+            elapsed, peak = measure(function, args.repeat)
+            print('{:>9} {:>14} {:>9.3f} {:>10.1f}'.format(mode.name, name, elapsed, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main()
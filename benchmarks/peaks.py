@@ -0,0 +1,64 @@
+"""
+Benchmarks PeakDetection on a run of realistic size, Gaussian peaks of random heights and widths on a noisy baseline,
+for the time of the segmentation and of the outlines of the peaks.
+
+Run from the repository root:
+    python -m benchmarks.peaks --shape 600 4000 --peaks 300
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy import ndimage
+
+from gc2d.model.peaks import PeakDetection, simplify, trace_outline
+
+
+def make_run(shape, count, seed=0):
+    """
+    :return: Gaussian peaks on a baseline of 10 with noise of a standard deviation of 1.
+    """
+    rng = np.random.default_rng(seed)
+    data = rng.normal(10, 1, shape)
+    x = np.arange(shape[0]).reshape((-1, 1))
+    y = np.arange(shape[1]).reshape((1, -1))
+    for _ in range(count):
+        cx, cy = rng.uniform(0, shape[0]), rng.uniform(0, shape[1])
+        height, sx, sy = rng.uniform(10, 500), rng.uniform(1.5, 6), rng.uniform(2, 10)
+        # the peaks are added in their box of five standard deviations, they are negligible outside it.
+        box = (slice(max(int(cx - 5 * sx), 0), int(cx + 5 * sx) + 1),
+               slice(max(int(cy - 5 * sy), 0), int(cy + 5 * sy) + 1))
+        dx, dy = x[box[0]] - cx, y[:, box[1]] - cy
+        data[box] += height * np.exp(-(dx ** 2 / (2 * sx ** 2) + dy ** 2 / (2 * sy ** 2)))
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the peak detection.')
+    parser.add_argument('--shape', type=int, nargs=2, default=[600, 4000], help='the shape of the data')
+    parser.add_argument('--peaks', type=int, default=300, help='the number of peaks in the data')
+    parser.add_argument('--prominence', type=float, default=5.0, help='the least prominence, in noise levels')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of runs, the fastest counts')
+    args = parser.parse_args(argv)
+
+    data = make_run(tuple(args.shape), args.peaks)
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        detection = PeakDetection(data, args.prominence)
+        times.append(time.perf_counter() - start)
+    # the outlines are traced again on their own, the rest of the time is the segmentation.
+    start = time.perf_counter()
+    for label, box in enumerate(ndimage.find_objects(detection.labels), 1):
+        simplify(trace_outline(detection.labels[box] == label), 1.0)
+    outlines = time.perf_counter() - start
+    print('data {}x{}, {} peaks added, {} found, best of {}'.format(args.shape[0], args.shape[1], args.peaks,
+                                                                     len(detection.peaks), args.repeat))
+    print('{:>12} {:>9}'.format('step', 'time (s)'))
+    print('{:>12} {:>9.3f}'.format('detection', min(times)))
+    print('{:>12} {:>9.3f}'.format('outlines', outlines))
+    print('{:>12} {:>9.3f}'.format('segments', min(times) - outlines))
+
+
+if __name__ == '__main__':
+    main()
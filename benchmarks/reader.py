@@ -0,0 +1,109 @@
+"""
+Benchmarks read_csv against np.genfromtxt on MF_AE3.txt repeated a number of times, for the time and the peak memory of
+every reader. Every measurement runs in its own process, so the peak resident memory is that of the reader alone.
+
+Run from the repository root:
+    python -m benchmarks.reader --scales 1 10 100 --baseline-limit 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exampledata', 'csv_preprocessed',
+                       'MF_AE3.txt')
+
+
+def scaled_file(scale, directory):
+    """
+    Writes the example file repeated along the first dimension.
+    :param scale: The number of times to repeat the example.
+    :param directory: The directory to write the file in.
+    :return: The name of the file.
+    """
+    with open(EXAMPLE, 'rb') as file:
+        text = file.read()
+    if not text.endswith(b'\n'):
+        text += b'\n'
+    file_name = os.path.join(directory, 'MF_AE3_x{}.txt'.format(scale))
+    with open(file_name, 'wb') as file:
+        for _ in range(scale):
+            file.write(text)
+    return file_name
+
+
+def measure(reader, file_name, dtype):
+    """
+    Reads a file once in this process and prints the time, the peak resident memory and the shape.
+    :param reader: 'read_csv' or 'genfromtxt'.
+    :param file_name: The file to read.
+    :param dtype: The name of the dtype to read in.
+    :return: None
+    """
+    start = time.perf_counter()
+    if reader == 'read_csv':
+        from gc2d.model.reader import read_csv
+        data = read_csv(file_name, dtype=np.dtype(dtype))
+    else:
+        data = np.genfromtxt(file_name, delimiter=',', dtype=np.dtype(dtype))[:, :-1]
+    elapsed = time.perf_counter() - start
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+        peak = peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        # the resource module only exists on Unix.
+        peak = 0
+    print('{:.3f} {} {}x{} {}'.format(elapsed, peak, data.shape[0], data.shape[1], data.nbytes))
+
+
+def run(reader, file_name, dtype):
+    """
+    Measures a reader in a new process.
+    :return: The time in seconds, the peak memory in bytes and the size of the result in bytes, or None if the process
+        failed, for example by running out of memory.
+    """
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.reader', '--measure', reader, file_name, dtype],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+    if result.returncode != 0:
+        return None
+    elapsed, peak, _, nbytes = result.stdout.split()
+    return float(elapsed), int(peak), int(nbytes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the chromatogram CSV reader.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help='the numbers of times to repeat the example file')
+    parser.add_argument('--baseline-limit', type=int, default=10,
+                        help='the largest scale to run np.genfromtxt at, it needs many times the memory of the result')
+    parser.add_argument('--dtype', default='float64', help='the dtype to read in')
+    parser.add_argument('--measure', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    print('{:>6} {:>11} {:>9} {:>11} {:>11}'.format('scale', 'reader', 'time (s)', 'peak (MB)', 'result (MB)'))
+    with tempfile.TemporaryDirectory(prefix='gc2d-benchmark-') as directory:
+        for scale in args.scales:
+            file_name = scaled_file(scale, directory)
+            readers = ['read_csv'] + (['genfromtxt'] if scale <= args.baseline_limit else [])
+            for reader in readers:
+                result = run(reader, file_name, args.dtype)
+                if result is None:
+                    print('{:>6} {:>11} {:>9}'.format(scale, reader, 'failed'))
+                else:
+                    elapsed, peak, nbytes = result
+                    print('{:>6} {:>11} {:>9.2f} {:>11.0f} {:>11.0f}'.format(scale, reader, elapsed, peak / 1e6,
+                                                                           nbytes / 1e6))
+            os.remove(file_name)
+
+
+if __name__ == '__main__':
+    main()
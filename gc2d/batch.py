@@ -0,0 +1,157 @@
+"""
+Headless batch processing of chromatogram runs: `gc2d-batch template.gcgc run1.csv run2.csv ...`, or
+`python3 -m gc2d.batch`.
+
+The integrations and the transform of a gcgc template are applied to every run, in parallel over a process pool, and
+the integrations of every run are written to a CSV file with the columns of the integration list export: label, mean
+and sum. With --align, the polygons are first moved along with the retention time drift of every run against the
+chromatogram of the template. Only the model layer is used, PyQt5 is never imported.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from gc2d.model.alignment import Aligner
+from gc2d.model.gcgc_file import read_gcgc, write_gcgc
+from gc2d.model.polygon import PolygonStatistics
+from gc2d.model.precision import Precision
+from gc2d.model.reader import read_csv
+from gc2d.model.transformations import Transform, run_tiled, transform_from_json
+
+
+def load_template(file_name):
+    """
+    Reads the parts of a gcgc file that are applied to every run: the integrations, as their label and polygon, and
+    the preferences, which hold the transform, palette and bounds.
+    :param file_name: The name of the gcgc template.
+    :return: A dictionary with "integrations", a list of (label, vertices), "preferences" and the "file_name" of the
+        template.
+    """
+    loaded = read_gcgc(file_name)
+    integrations = []
+    for label, handles, pos in loaded.get("integrations", []):
+        # the handles are relative to the position of the region, which is in data coordinates.
+        integrations.append((label, [(pos[0] + x, pos[1] + y) for x, y in handles]))
+    return {"integrations": integrations, "preferences": loaded.get("preferences", {}), "file_name": file_name}
+
+
+def transform_data(data, preferences):
+    """
+    Transforms a chromatogram with the transform of the preferences, like the program shows it.
+    :param data: The 2D numpy array.
+    :param preferences: The preferences of a template.
+    :return: The transformed data, or the data if there is no transform.
+    """
+    precision = Precision.for_dtype(data.dtype)
+    transform = transform_from_json(preferences.get("TRANSFORM", {}))
+    if transform is None or type(transform) is Transform:
+        return data
+    # a single process per run, the pool already keeps every processor busy.
+    return run_tiled(transform, data, workers=1, dtype=precision.get_derived_dtype())
+
+
+_aligners = {}
+""" The Aligner of every template, made once in every process. """
+
+
+def get_aligner(template):
+    """
+    Makes the Aligner of the chromatogram of a template, transformed like the runs. It is made once in every process,
+    a binary gcgc template is only memory mapped, so it is not copied to every process.
+    :param template: The template, as returned by load_template.
+    :return: The Aligner of the chromatogram of the template.
+    """
+    file_name = template["file_name"]
+    if file_name not in _aligners:
+        loaded = read_gcgc(file_name)
+        if "model" not in loaded:
+            raise ValueError("the template '{}' holds no chromatogram to align to".format(file_name))
+        _aligners[file_name] = Aligner(transform_data(loaded["model"], template["preferences"]))
+    return _aligners[file_name]
+
+
+def write_integrations(file_name, rows):
+    """
+    Writes integration results in the format of the integration list export.
+    :param file_name: The name of the CSV file to write.
+    :param rows: A list of (label, mean, sum).
+    :return: None
+    """
+    with open(file_name, 'w', newline='') as file:
+        for label, mean, total in rows:
+            file.write('{0},{1},{2}\r\n'.format(label, str(mean), str(total)))
+
+
+def process_run(file_name, template, output_dir, save_project=False, align=False):
+    """
+    Applies a template to one run: the run is read in the precision and transformed with the transform of the
+    template, and the template integrations are computed over the transformed data, like the program shows them.
+    :param file_name: The name of the CSV file of the run.
+    :param template: The template, as returned by load_template.
+    :param output_dir: The directory to write the results to.
+    :param save_project: Whether to also write the run with the template as a gcgc project, to inspect it later.
+    :param align: Whether to move the integrations along with the drift of the run against the template chromatogram.
+    :return: The name of the integration CSV file that was written.
+    """
+    preferences = template["preferences"]
+    precision = Precision[preferences.get("PRECISION", Precision.FLOAT64.name)]
+    data = read_csv(file_name, dtype=precision.get_raw_dtype())
+    shown = transform_data(data, preferences)
+
+    integrations = template["integrations"]
+    if align:
+        warp = get_aligner(template).align(shown)
+        if not warp.aligned:
+            print("Could not align {}, the integrations are not moved".format(file_name), file=sys.stderr)
+        integrations = [(label, warp.map_points(vertices)) for label, vertices in integrations]
+
+    rows = []
+    for label, vertices in integrations:
+        statistics = PolygonStatistics(shown, vertices)
+        rows.append((label, statistics.mean, statistics.sum))
+
+    name = os.path.splitext(os.path.basename(file_name))[0]
+    output = os.path.join(output_dir, name + '.csv')
+    write_integrations(output, rows)
+    if save_project:
+        integrations = [(label, [(x, y) for x, y in vertices], (0.0, 0.0)) for label, vertices in integrations]
+        write_gcgc(os.path.join(output_dir, name + '.gcgc'), data, integrations, preferences)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='gc2d-batch',
+                                     description='Applies the transform and integrations of a gcgc template to many '
+                                                 'chromatogram runs and writes the integrations of every run to CSV.')
+    parser.add_argument('template', help='a gcgc file with the integrations and preferences to apply')
+    parser.add_argument('runs', nargs='+', help='the chromatogram CSV files to process')
+    parser.add_argument('-o', '--output', default='.', help='the directory to write the results to')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='the number of runs processed in parallel, by default the number of processors')
+    parser.add_argument('--save-projects', action='store_true',
+                        help='also write every run with the template as a gcgc file, to open it in the program')
+    parser.add_argument('--align', action='store_true',
+                        help='move the integrations along with the retention time drift of every run against the '
+                             'chromatogram of the template, which must include one')
+    args = parser.parse_args(argv)
+
+    template = load_template(args.template)
+    os.makedirs(args.output, exist_ok=True)
+    with ProcessPoolExecutor(args.jobs) as pool:
+        futures = [(run, pool.submit(process_run, run, template, args.output, args.save_projects,
+                                                args.align))
+                   for run in args.runs]
+        failed = 0
+        for run, future in futures:
+            try:
+                print(future.result())
+            except Exception as e:
+                failed += 1
+                print("Failed to process {}: {}".format(run, e), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
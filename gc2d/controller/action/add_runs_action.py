@@ -0,0 +1,35 @@
+from PyQt5.QtWidgets import QAction, QFileDialog
+
+from gc2d.controller.loader import load_runs_task
+from gc2d.model.preferences import PreferenceEnum
+
+
+class AddRunsAction(QAction):
+
+    def __init__(self, parent, model_wrapper, shortcut=None):
+        """
+        The AddRunsAction is a QAction that when triggered, opens a QFileDialog to select chromatograms to compare with
+        the open one. The files are read on a worker thread by the window's loader, and added to the session, which
+        evaluates the integrations against them.
+        :param parent: The parent widget
+        :param model_wrapper: The Model Wrapper
+        """
+        super().__init__('Add runs', parent)
+        self.window = parent
+        self.model_wrapper = model_wrapper
+        if shortcut is not None:
+            self.setShortcut(shortcut)
+        self.setStatusTip('Add chromatograms to evaluate the integrations against')
+        self.triggered.connect(self.show_dialog)
+
+    def show_dialog(self):
+        """
+        Show the Open files dialog for the runs to add
+        :return: None
+        """
+        file_names = QFileDialog.getOpenFileNames(self.window, 'Add runs',
+                                                  filter='2D-GC data (*.txt *.csv *.gcgc);; All files (*.*)')[0]
+        if file_names:
+            precision = self.model_wrapper.get_preference(PreferenceEnum.PRECISION)
+            description = file_names[0] if len(file_names) == 1 else '{} runs'.format(len(file_names))
+            self.window.loader.load(description, load_runs_task(file_names, precision), self.model_wrapper.add_runs)
@@ -0,0 +1,18 @@
+from PyQt5.QtWidgets import QAction
+
+
+class AlignRunsAction(QAction):
+
+    def __init__(self, parent, model_wrapper, shortcut=None):
+        """
+        Toggles whether the integrations are moved along with the retention time drift of every run before they are
+        evaluated against it.
+        :param model_wrapper: The model wrapper
+        """
+        super().__init__('Align runs', parent, checkable=True)
+        self.model_wrapper = model_wrapper
+        if shortcut is not None:
+            self.setShortcut(shortcut)
+        self.setStatusTip('Follow the retention time drift of the runs')
+        self.setChecked(self.model_wrapper.session.align)
+        self.toggled.connect(self.model_wrapper.set_align_runs)
@@ -0,0 +1,23 @@
+from PyQt5.QtWidgets import QAction
+
+
+class ClearRunsAction(QAction):
+
+    def __init__(self, parent, model_wrapper, shortcut=None):
+        """
+        The ClearRunsAction is a QAction that when triggered, removes all runs from the session.
+        :param parent: The parent widget
+        :param model_wrapper: The Model Wrapper
+        """
+        super().__init__('Remove runs', parent)
+        self.model_wrapper = model_wrapper
+        if shortcut is not None:
+            self.setShortcut(shortcut)
+        self.setStatusTip('Remove the runs the integrations are evaluated against')
+        self.setEnabled(bool(self.model_wrapper.session.runs))
+        self.model_wrapper.subscribe(self, 'newRuns', self.notify)
+        self.model_wrapper.subscribe(self, 'removeRun', self.notify)
+        self.triggered.connect(self.model_wrapper.clear_runs)
+
+    def notify(self, _value):
+        self.setEnabled(bool(self.model_wrapper.session.runs))
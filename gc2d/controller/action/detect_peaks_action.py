@@ -0,0 +1,70 @@
+from PyQt5.QtWidgets import QAction, QInputDialog
+
+from gc2d.controller.integration.selector import Selector
+from gc2d.model.peaks import PeakDetection
+
+DEFAULT_PROMINENCE = 5.0
+""" The least prominence of a detected peak the dialog starts with, in noise levels. """
+
+
+class DetectPeaksAction(QAction):
+
+    def __init__(self, parent, model_wrapper, shortcut=None):
+        """
+        A DetectPeaksAction is a QAction that finds the peaks of the shown data, with the active transform, and makes an
+        integration of the area of every peak. The peaks are found on the worker thread of the window's job queue.
+        :param parent: The parent widget
+        :param model_wrapper: The Model Wrapper
+        """
+        super().__init__('Detect Peaks', parent)
+        self.window = parent
+        self.model_wrapper = model_wrapper
+        if shortcut is not None:
+            self.setShortcut(shortcut)
+        self.setStatusTip('Make an integration of every peak')
+
+        self.setEnabled(self.model_wrapper.model is not None)
+        self.model_wrapper.subscribe(self, 'model', self.notify)
+
+        self.triggered.connect(self.detect)
+
+    def detect(self):
+        """
+        Asks for the least prominence of a peak, and makes a Selector object for the area of every peak found
+        :return: None
+        """
+        if self.model_wrapper.model is None:
+            return
+        prominence, accepted = QInputDialog.getDouble(self.window, 'Detect Peaks',
+                                                      'Least prominence of a peak, in noise levels:',
+                                                      DEFAULT_PROMINENCE, 0, 1000, 1)
+        if not accepted:
+            return
+        model = self.model_wrapper.model
+        # the next transform is written in another array while the peaks are detected in this one.
+        data = model.lend_data(model.get_2d_chromatogram_data())
+
+        def deliver(detection):
+            model.return_data(data)
+            # the peaks are of data that is no longer shown once another chromatogram has been opened.
+            if self.model_wrapper.model is model:
+                self.add_peaks(detection)
+
+        self.window.jobs.submit(lambda: PeakDetection(data, prominence), deliver, "Detecting peaks")
+
+    def add_peaks(self, detection):
+        """
+        Makes a Selector object for every detected peak, the views are updated once for all of them
+        :param detection: the PeakDetection of the shown data
+        :return: None
+        """
+        with self.model_wrapper.transaction('detect_peaks'):
+            for peak in detection.peaks:
+                # the handles are relative to the position of the region, the corner of its bounding box.
+                x0 = min(x for x, _ in peak.vertices)
+                y0 = min(y for _, y in peak.vertices)
+                Selector(self.model_wrapper, 'Peak {}'.format(peak.label),
+                         [[x - x0, y - y0] for x, y in peak.vertices], (x0, y0))
+
+    def notify(self, value):
+        self.setEnabled(value is not None)
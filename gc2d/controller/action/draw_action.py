@@ -19,7 +19,7 @@ class DrawAction(QAction):
         self.setStatusTip('Select integration area')
 
         self.setEnabled(self.model_wrapper.model is not None)
-        self.model_wrapper.add_observer(self, self.notify)
+        self.model_wrapper.subscribe(self, 'model', self.notify)
 
         self.triggered.connect(self.draw)
 
@@ -31,6 +31,5 @@ class DrawAction(QAction):
         if self.model_wrapper.model is not None:
             Selector(self.model_wrapper)
 
-    def notify(self, name, value):
-        if name == 'model':
-            self.setEnabled(value is not None)
+    def notify(self, value):
+        self.setEnabled(value is not None)
@@ -19,7 +19,7 @@ class ExportAction(QAction):
         self.setEnabled(model_wrapper.model is not None)
         self.triggered.connect(self.show_dialog)
 
-        self.model_wrapper.add_observer(self, self.notified)
+        self.model_wrapper.subscribe(self, 'model', self.notified)
 
     def show_dialog(self):
         """
@@ -28,6 +28,5 @@ class ExportAction(QAction):
         """
         self.parent().add_dialog(ExportDialog(self.window, self.model_wrapper))
 
-    def notified(self, name, model):
-        if name == 'model':
-            self.setEnabled(model is not None)
+    def notified(self, model):
+        self.setEnabled(model is not None)
@@ -19,7 +19,7 @@ class ExportIntegrationAction(QAction):
         self.setEnabled(model_wrapper.model is not None)
         self.triggered.connect(self.export_integration_list)
 
-        self.model_wrapper.add_observer(self, self.notified)
+        self.model_wrapper.subscribe(self, 'model', self.notified)
 
     def export_integration_list(self):
         """
@@ -39,20 +39,23 @@ class ExportIntegrationAction(QAction):
             elif not (path.lower().endswith('.txt') or path.lower().endswith('.csv')):
                 path = path + '.csv'
 
-            # Export the integration list
+            # Export the integration list, with the sum over every run of the session after the columns of the model
             integration_array = self.model_wrapper.integrations.values()
+            runs = self.model_wrapper.session.runs
 
             with open(path, 'w') as file:
                 for integration in integration_array:
-                    line = '{0},{1},{2}\r\n'.format(integration.label, str(integration.mean), str(integration.sum))
-                    file.write(line)
+                    line = '{0},{1},{2}'.format(integration.label, str(integration.mean), str(integration.sum))
+                    for run in runs:
+                        statistics = integration.runs.get(run)
+                        line += ',' + ('' if statistics is None else str(statistics.sum))
+                    file.write(line + '\r\n')
 
             return True
 
         # Otherwise, no data was loaded.
         return False
 
-    def notified(self, name, model):
-        if name == 'model':
-            self.setEnabled(model is not None)
+    def notified(self, model):
+        self.setEnabled(model is not None)
 
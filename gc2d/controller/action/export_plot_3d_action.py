@@ -18,7 +18,7 @@ class ExportPlot3DAction(QAction):
         self.setEnabled(model_wrapper.model is not None)
         self.triggered.connect(self.export_plot)
 
-        self.model_wrapper.add_observer(self, self.notified)
+        self.model_wrapper.subscribe(self, 'model', self.notified)
 
     def export_plot(self):
         """
@@ -46,6 +46,5 @@ class ExportPlot3DAction(QAction):
         print("No data loaded")
         return False
 
-    def notified(self, name, model):
-        if name == 'model':
-            self.setEnabled(model is not None)
+    def notified(self, model):
+        self.setEnabled(model is not None)
@@ -1,12 +1,15 @@
 from PyQt5.QtWidgets import QAction, QFileDialog
 
+from gc2d.controller.loader import import_csv_task
+from gc2d.model.preferences import PreferenceEnum
+
 
 class ImportDataAction(QAction):
 
     def __init__(self, parent, model_wrapper, shortcut=None):
         """
         The ImportDataAction is a QAction that when triggered, opens a QFileDialog to select chromatogram data to open. The
-        file name is passed to the model_wrapper to load the data into the model.
+        file is parsed on a worker thread by the window's loader, and the result is set as the model.
         :param parent: The parent widget
         :param model_wrapper: The Model Wrapper
         """
@@ -26,4 +29,6 @@ class ImportDataAction(QAction):
         file_name = QFileDialog.getOpenFileName(self.window, 'Open chromatography data',
                                                 filter='2D-GC data (*.txt *.csv)')
         if file_name[0]:
-            self.model_wrapper.import_model(file_name[0])
+            precision = self.model_wrapper.get_preference(PreferenceEnum.PRECISION)
+            self.window.loader.load(file_name[0], import_csv_task(file_name[0], precision),
+                                    self.model_wrapper.replace_model)
@@ -21,7 +21,7 @@ class OpenChoosePaletteAction(QAction):
 
         self.triggered.connect(self.show_dialog)
 
-        self.model_wrapper.add_observer(self, self.notify)
+        self.model_wrapper.subscribe(self, 'model', self.notify)
 
     # noinspection PyArgumentList
     def show_dialog(self):
@@ -31,6 +31,5 @@ class OpenChoosePaletteAction(QAction):
         """
         self.parent().add_dialog(PaletteChooser(self.parent(), self.model_wrapper))
 
-    def notify(self, name, value):
-        if name == 'model':
-            self.setEnabled(value is not None)
+    def notify(self, value):
+        self.setEnabled(value is not None)
@@ -18,7 +18,7 @@ class OpenConvolutionPickerAction(QAction):
         if shortcut is not None:
             self.setShortcut(shortcut)
         self.setEnabled(self.model_wrapper.model is not None)
-        self.model_wrapper.add_observer(self, self.notify)
+        self.model_wrapper.subscribe(self, 'model', self.notify)
         self.triggered.connect(self.show_dialog)
 
     def show_dialog(self):
@@ -29,6 +29,5 @@ class OpenConvolutionPickerAction(QAction):
 
         self.parent().add_dialog(ConvolutionPicker(self.model_wrapper))
 
-    def notify(self, name, value):
-        if name == 'model':
-            self.setEnabled(value is not None)
+    def notify(self, value):
+        self.setEnabled(value is not None)
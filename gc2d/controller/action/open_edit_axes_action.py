@@ -15,7 +15,7 @@ class OpenEditAxesAction(QAction):
             self.setShortcut(shortcut)
         self.setStatusTip('Opens the Edit Axes Dialog')
         self.setEnabled(self.model_wrapper.model is not None)
-        self.model_wrapper.add_observer(self, self.notify)
+        self.model_wrapper.subscribe(self, 'model', self.notify)
         self.triggered.connect(self.show_dialog)
 
     # noinspection PyArgumentList
@@ -25,6 +25,5 @@ class OpenEditAxesAction(QAction):
         """
         self.parent().add_dialog(EditAxes(self.parent(), self.model_wrapper))
 
-    def notify(self, name, value):
-        if name == 'model':
-            self.setEnabled(value is not None)
+    def notify(self, value):
+        self.setEnabled(value is not None)
@@ -1,10 +1,9 @@
-import json
-
-import numpy as np
 from PyQt5.QtWidgets import QAction, QFileDialog
 
 from gc2d.controller.integration.selector import Selector
+from gc2d.controller.loader import open_gcgc_task
 from gc2d.model.palette.palette import Palette
+from gc2d.model.precision import Precision
 from gc2d.model.preferences import PenEnum, PreferenceEnum, ScaleEnum
 from gc2d.model.time_unit import TimeUnit
 from gc2d.model.transformations import transform_from_json
@@ -15,7 +14,7 @@ class OpenFileAction(QAction):
     def __init__(self, parent, model_wrapper, shortcut=None):
         """
         An OpenFileAction is a QAction that when triggered, opens a QFileDialog to select a gcgc file to open. The
-        The opening of the model is interpreted in this class.
+        The file is loaded on a worker thread, the opening of the model is interpreted in this class.
         :param parent: The parent widget
         :param model_wrapper: The Model Wrapper
         """
@@ -29,40 +28,48 @@ class OpenFileAction(QAction):
 
     def parse_file(self):
         """
-        Show the Open file dialog, and interpret the data: 
-        the model is overwritten, new selector objects are made for the integration area
-        the program will save over this file, as the save_file preference is set to the selected path
+        Show the Open file dialog, and load the file on a worker thread. The loaded data is interpreted in apply_loaded.
         :return: None
         """
         file_name = QFileDialog.getOpenFileName(self.window, 'Open chromatography data',
                                                 filter='GCxGC files (*.gcgc);; All files (*.*)')[0]
         if file_name:
-            with open(file_name, 'r') as file:
-                loaded = json.load(file)
+            self.window.loader.load(file_name, open_gcgc_task(file_name),
+                                    lambda loaded: self.apply_loaded(file_name, loaded))
 
-            prefs_included = False
-            if "preferences" in loaded:
-                self.preload_prefs(loaded["preferences"])
-                prefs_included = True
+    def apply_loaded(self, file_name, loaded):
+        """
+        Interpret the loaded data:
+        the model is overwritten, new selector objects are made for the integration area
+        the program will save over this file, as the save_file preference is set to the selected path
+        :param file_name: the path of the opened file
+        :param loaded: the loaded dictionary, holding a constructed Model under "model" if one was included
+        :return: None
+        """
+        prefs_included = False
+        if "preferences" in loaded:
+            self.preload_prefs(loaded["preferences"])
+            prefs_included = True
 
-            model_included = False
-            if "model" in loaded:
-                self.model_wrapper.set_model(np.array(loaded["model"]))
-                model_included = True
-                
+        model_included = False
+        if "model" in loaded:
+            self.model_wrapper.replace_model(loaded["model"])
+            model_included = True
 
-            if "integrations" in loaded and self.model_wrapper.model != None:
-                for label, handles, pos in loaded["integrations"]:
-                    Selector(self.model_wrapper, label, handles, pos)
+        if "integrations" in loaded and self.model_wrapper.model != None:
+            for label, handles, pos in loaded["integrations"]:
+                Selector(self.model_wrapper, label, handles, pos)
 
-            if prefs_included:
-                self.postload_prefs(loaded["preferences"])
+        if prefs_included:
+            self.postload_prefs(loaded["preferences"])
 
-            if model_included:
-                # set at end to signify no unsaved changes
-                self.model_wrapper.set_preference(PreferenceEnum.SAVE_FILE, file_name)
+        if model_included:
+            # set at end to signify no unsaved changes
+            self.model_wrapper.set_preference(PreferenceEnum.SAVE_FILE, file_name)
 
     def preload_prefs(self, preference_dict):
+        if preference_dict.get("PRECISION") in Precision.__members__:
+            self.model_wrapper.set_preference(PreferenceEnum.PRECISION, Precision[preference_dict["PRECISION"]])
         if "PEN" not in preference_dict:
             return
         pen_dict = {}
@@ -1,7 +1,6 @@
-import json
-
-from PyQt5.QtWidgets import QAction, QFileDialog
+from PyQt5.QtWidgets import QAction, QFileDialog, QMessageBox
 
+from gc2d.model.gcgc_file import write_gcgc
 from gc2d.model.preferences import PreferenceEnum
 
 
@@ -11,7 +10,7 @@ class SaveAction(QAction):
         """
         A SaveAction is a QAction that when triggered, saves the program state in the save_file specified in preferences.
         If no file is specified (as with new imported data, or after Save As), it will open a file dialog to specify this. 
-        The essential parts of the program state (model data, integration areas) are saved as text in json format
+        The essential parts of the program state (model data, integration areas) are saved in the binary gcgc format
         :param parent: The parent widget
         :param model_wrapper: The Model Wrapper
         """
@@ -22,12 +21,12 @@ class SaveAction(QAction):
             self.setShortcut(shortcut)
         self.setStatusTip('Save')
         self.setEnabled(model_wrapper.model is not None)
-        self.model_wrapper.add_observer(self, self.notify)
+        self.model_wrapper.subscribe(self, 'model', self.notify)
         self.triggered.connect(self.save)
 
     def save(self):
         """
-        Writes the model state (chromatogram, integration areas, preferences) in the specified path as json format..
+        Writes the model state (chromatogram, integration areas, preferences) in the specified path as binary gcgc file.
         :param path: the path to write the data to
         :return: None
         """
@@ -37,15 +36,15 @@ class SaveAction(QAction):
                                                filter='GCxGC files (*.gcgc);; All files (*.*)')[0]
             if path is '':
                 return
+        # a chromatogram opened from the file is still mapped from it, which keeps Windows from replacing the file.
+        self.model_wrapper.release_file(path)
         self.model_wrapper.set_preference(PreferenceEnum.SAVE_FILE, path) # send even if set to notify save
         state = self.model_wrapper.get_state()
         model, integrations, preferences = state
-        with open(path, 'w') as save_fd:
-            json.dump({"model": model.tolist(),
-                       "integrations": integrations,
-                       "preferences": preferences},
-                      save_fd, separators=(',', ':'), sort_keys=True, indent=4)
+        try:
+            write_gcgc(path, model, integrations, preferences)
+        except OSError as error:
+            QMessageBox.critical(self.window, 'Save failed', 'The GCxGC state was not saved:\n{}'.format(error))
 
-    def notify(self, name, model):
-        if name == 'model':
-            self.setEnabled(model is not None)
\ No newline at end of file
+    def notify(self, model):
+        self.setEnabled(model is not None)
\ No newline at end of file
@@ -18,7 +18,7 @@ class SaveIntegrationsAction(QAction):
         if shortcut is not None:
             self.setShortcut(shortcut)
         self.setEnabled(model_wrapper.model is not None)
-        self.model_wrapper.add_observer(self, self.notify)
+        self.model_wrapper.subscribe(self, 'model', self.notify)
         self.setStatusTip('Save integration areas')
         self.triggered.connect(self.save)
 
@@ -36,6 +36,5 @@ class SaveIntegrationsAction(QAction):
                 json.dump({"integrations": integrations},
                           save_fd, separators=(',', ':'), sort_keys=True, indent=4)
 
-    def notify(self, name, model):
-        if name == 'model':
-            self.setEnabled(model is not None)
\ No newline at end of file
+    def notify(self, model):
+        self.setEnabled(model is not None)
\ No newline at end of file
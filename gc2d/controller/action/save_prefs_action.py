@@ -19,7 +19,7 @@ class SavePrefsAction(QAction):
             self.setShortcut(shortcut)
         self.setStatusTip('Save preferences')
         self.setEnabled(model_wrapper.model is not None)
-        self.model_wrapper.add_observer(self, self.notify)
+        self.model_wrapper.subscribe(self, 'model', self.notify)
         self.triggered.connect(self.save)
 
     def save(self):
@@ -35,6 +35,5 @@ class SavePrefsAction(QAction):
                 json.dump({"preferences": preferences},
                           save_fd, separators=(',', ':'), sort_keys=True, indent=4)
 
-    def notify(self, name, model):
-        if name == 'model':
-            self.setEnabled(model is not None)
\ No newline at end of file
+    def notify(self, model):
+        self.setEnabled(model is not None)
\ No newline at end of file
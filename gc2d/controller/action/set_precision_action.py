@@ -0,0 +1,38 @@
+from PyQt5.QtWidgets import QAction
+
+from gc2d.model.precision import Precision
+from gc2d.model.preferences import PreferenceEnum
+
+PRECISION_NAMES = {
+    Precision.FLOAT64: '64-bit floating point',
+    Precision.FLOAT32: '32-bit floating point',
+    Precision.INT32: '32-bit integer counts'
+}
+
+
+class SetPrecisionAction(QAction):
+
+    def __init__(self, parent, model_wrapper, precision, group):
+        """
+        A SetPrecisionAction is a checkable QAction that sets the precision imported chromatograms are stored in.
+        Lower precisions halve the memory of the data and of everything derived from it, integer counts keep the
+        values exact.
+        :param parent: The parent widget
+        :param model_wrapper: The Model Wrapper
+        :param precision: The Precision this action sets
+        :param group: The QActionGroup of the precision actions, so only one is checked
+        """
+        super().__init__(PRECISION_NAMES[precision], parent, checkable=True)
+        self.model_wrapper = model_wrapper
+        self.precision = precision
+        group.addAction(self)
+        self.setStatusTip('Store imported chromatograms as ' + PRECISION_NAMES[precision])
+        self.setChecked(model_wrapper.get_preference(PreferenceEnum.PRECISION) is precision)
+        self.model_wrapper.subscribe(self, PreferenceEnum.PRECISION.name, self.notify)
+        self.triggered.connect(self.set_precision)
+
+    def set_precision(self):
+        self.model_wrapper.set_preference(PreferenceEnum.PRECISION, self.precision)
+
+    def notify(self, value):
+        self.setChecked(value is self.precision)
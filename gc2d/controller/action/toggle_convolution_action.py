@@ -14,7 +14,7 @@ class ToggleConvolutionAction(QAction):
         if shortcut is not None:
             self.setShortcut(shortcut)
         self.setEnabled(self.model_wrapper.model is not None)
-        self.model_wrapper.add_observer(self, self.notified)
+        self.model_wrapper.subscribe(self, 'model', self.notified)
 
         self.setChecked(True)
 
@@ -22,7 +22,6 @@ class ToggleConvolutionAction(QAction):
         if self.model_wrapper.model is not None:
             self.model_wrapper.toggle_convolved(self.isChecked())
 
-    def notified(self, name, model):
-        if name == 'model':
-            self.setEnabled(model is not None)
-            self.update()
+    def notified(self, model):
+        self.setEnabled(model is not None)
+        self.update()
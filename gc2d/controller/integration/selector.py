@@ -1,7 +1,9 @@
 from PyQt5.Qt import QObject
 from pyqtgraph import PolyLineROI
 
+from gc2d.model.polygon import PolygonStatistics
 from gc2d.model.preferences import PreferenceEnum
+from gc2d.view.adapters import make_pen
 
 
 class Selector(QObject):
@@ -9,7 +11,7 @@ class Selector(QObject):
     def __init__(self, model_wrapper, label=None, handles=None, pos=None):
         """ 
         Selector can draw a Region of Interest once a viewport (pyqtgraph plot) is set
-        It sends + updates the selected region as mask in the model
+        It sends + updates the statistics of the selected region in the model
         :param model_wrapper: The Model Wrapper
          - optional params are used for reloading saved data -
         :param label: a preset integration label
@@ -30,7 +32,7 @@ class Selector(QObject):
         If handles and pos are specified, an ROI is reloaded
         :return: None
         """
-        pen = self.model_wrapper.get_preference(PreferenceEnum.PEN)
+        pen = make_pen(self.model_wrapper.get_preference(PreferenceEnum.PEN))
         pen.setCosmetic(True)
         if handles == None:
             self.roi = PolyLineROI([[80, 60], [90, 30], [60, 40]], pos=(100, 100), pen=pen, closed=True)
@@ -46,7 +48,7 @@ class Selector(QObject):
         """
         if self.viewport is None:
             return
-        self.model_wrapper.update_integration(self.id, mask=self.get_region())
+        self.model_wrapper.update_integration(self.id, statistics=self.get_region())
 
     def set_current(self, set_to):
         """
@@ -67,8 +69,8 @@ class Selector(QObject):
 
     def set_viewport(self, plot):
         """
-        sets a pyqtgraph imageItem to find the viewport of the screen, so the current array region can be found
-        :param plot: a pyqtgraph imageitem, usually a 2d plot
+        sets a pyqtgraph item in data coordinates, so the ROI handles can be mapped to data coordinates
+        :param plot: a pyqtgraph item, usually the data frame of a 2d plot
         :return: None
         """
         self.viewport = plot
@@ -81,11 +83,15 @@ class Selector(QObject):
 
     def get_region(self):
         """
-        generates a mask for ROI region of the current chromatogram
-        :return: The generated mask of the chromatogram 
+        integrates the current chromatogram over the exact polygon of the ROI
+        :return: The PolygonStatistics of the region
         """
-        return (self.roi.parentBounds(),
-                self.roi.getArrayRegion(self.model_wrapper.model.get_2d_chromatogram_data(), self.viewport))
+        return PolygonStatistics(self.model_wrapper.model.get_2d_chromatogram_data(), self.get_vertices())
+
+    def get_vertices(self):
+        """ returns the handle positions of the ROI in data coordinates """
+        return [(point.x(), point.y()) for point in
+                (self.roi.mapToItem(self.viewport, handle) for _name, handle in self.roi.getLocalHandlePositions())]
 
     def get_handles(self):
         """ returns the handles in local space and the position of the bounding box in the scene """
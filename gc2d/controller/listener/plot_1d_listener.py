@@ -23,7 +23,7 @@ class Plot1DListener(WidgetListener):
         mouse_x = math.floor(mouse_point.x())
 
         # Get the y value at x if it exists
-        y_data = self.model_wrapper.model.get_2d_chromatogram_data().sum(axis=1)
+        y_data = self.model_wrapper.model.get_projection()
         if 0 <= mouse_x < len(y_data):
             y_value = int(y_data[mouse_x])
 
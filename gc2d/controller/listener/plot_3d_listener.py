@@ -5,9 +5,17 @@ class Plot3DListener(WidgetListener):
 
     def __init__(self, plot3d, model_wrapper):
         """
-        A stub listener for the plot_3d_widget
+        A listener for the plot_3d_widget, that refines the surface mesh when the camera has moved
         :param plot3d: the plot_3d_widget
         :param model_wrapper: the model wrapper
         """
         super().__init__(plot3d)
         self.model_wrapper = model_wrapper
+
+    def mouse_release_event(self, event):
+        super().mouse_release_event(event)
+        self.widget.refresh_mesh()
+
+    def mouse_scroll_event(self, event):
+        super().mouse_scroll_event(event)
+        self.widget.refresh_mesh()
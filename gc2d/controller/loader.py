@@ -0,0 +1,286 @@
+import os.path
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from PyQt5.QtWidgets import QPushButton
+
+from gc2d.model.gcgc_file import read_gcgc
+from gc2d.model.model_wrapper import ModelWrapper
+from gc2d.model.precision import Precision
+from gc2d.model.reader import read_csv
+from gc2d.model.session import Run
+
+
+class LoadCancelled(Exception):
+    """ Raised from the progress callback of a load task to abort it. """
+
+
+def import_csv_task(file_name, precision=Precision.FLOAT64):
+    """
+    Creates a load task that imports a chromatogram text file.
+    :param file_name: The name of the chromatogram file to import.
+    :param precision: The Precision to store the chromatogram in.
+    :return: A load task returning the new Model.
+    """
+
+    def task(progress):
+        arr = read_csv(file_name, dtype=precision.get_raw_dtype(), progress=lambda fraction: progress(0.9 * fraction))
+        model = ModelWrapper.create_model(arr)
+        progress(1.0)
+        return model
+
+    return task
+
+
+def open_gcgc_task(file_name):
+    """
+    Creates a load task that opens a gcgc file.
+    :param file_name: The name of the gcgc file to open.
+    :return: A load task returning the loaded dictionary, with "model" replaced by a Model when it is included.
+    """
+
+    def task(progress):
+        loaded = read_gcgc(file_name)
+        progress(0.5)
+        if "model" in loaded:
+            loaded["model"] = ModelWrapper.create_model(loaded["model"])
+        progress(1.0)
+        return loaded
+
+    return task
+
+
+def load_runs_task(file_names, precision=Precision.FLOAT64):
+    """
+    Creates a load task that reads the runs of a session. The chromatogram of a binary gcgc file is only mapped.
+    :param file_names: The names of the chromatogram CSV or gcgc files.
+    :param precision: The Precision to read CSV files in.
+    :return: A load task returning a list of the read Runs.
+    """
+
+    def task(progress):
+        runs = []
+        for index, file_name in enumerate(file_names):
+            run = Run(file_name, precision)
+            run.load()
+            runs.append(run)
+            progress((index + 1) / len(file_names))
+        return runs
+
+    return task
+
+
+class _Worker(QObject):
+    progress = pyqtSignal(float)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, task):
+        """
+        Runs a load task on the thread it is moved to.
+        :param task: A function that takes a progress callback and returns the loaded result.
+        """
+        super().__init__()
+        self.task = task
+        self.cancelled = False
+
+    def report(self, fraction):
+        """
+        The progress callback handed to the task. Raises LoadCancelled once the load has been cancelled.
+        :param fraction: The fraction of the task that has been done.
+        :return: None
+        """
+        if self.cancelled:
+            raise LoadCancelled()
+        self.progress.emit(fraction)
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            result = self.task(self.report)
+        except LoadCancelled:
+            self.failed.emit("cancelled")
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(result)
+
+
+class Loader(QObject):
+
+    def __init__(self, statusbar):
+        """
+        The Loader runs file parsing and model construction on a worker thread, so the window stays responsive while
+        large files load. Progress is shown in the status bar, next to a button to cancel the load. Only the result is
+        handed back on the GUI thread, starting a new load cancels the running one.
+        :param statusbar: The status bar of the main window.
+        """
+        super().__init__()
+        self.statusbar = statusbar
+        self.thread = None
+        self.worker = None
+        self.description = None
+        self.on_loaded = None
+        self.finishing = []
+        """Cancelled and finished workers whose threads have not stopped yet, Qt aborts if those are collected."""
+
+        self.cancel_button = QPushButton('Cancel')
+        self.cancel_button.clicked.connect(self.cancel)
+        self.cancel_button.setVisible(False)
+        self.statusbar.addPermanentWidget(self.cancel_button)
+
+    def load(self, file_name, task, on_loaded):
+        """
+        Starts a load task on a worker thread.
+        :param file_name: The name of the file being loaded, shown in the status bar.
+        :param task: A function that takes a progress callback and returns the loaded result.
+        :param on_loaded: Called on the GUI thread with the result when the task has finished.
+        :return: None
+        """
+        self.cancel()
+        self.description = os.path.basename(file_name)
+        self.on_loaded = on_loaded
+
+        self.thread = QThread()
+        self.worker = _Worker(task)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.show_progress)
+        self.worker.finished.connect(self.finish)
+        self.worker.failed.connect(self.fail)
+
+        self.cancel_button.setVisible(True)
+        self.show_progress(0.0)
+        self.thread.start()
+
+    def is_loading(self):
+        """
+        :return: Whether a load task is running.
+        """
+        return self.worker is not None
+
+    def cancel(self):
+        """
+        Cancels the running load task, if any. Its result is discarded.
+        :return: None
+        """
+        if self.worker is not None:
+            self.worker.cancelled = True
+            self.stop()
+            self.statusbar.showMessage("Cancelled loading " + self.description, 3000)
+
+    def stop(self):
+        """
+        Detaches from the current worker and lets its thread finish in the background.
+        :return: None
+        """
+        self.worker.progress.disconnect()
+        self.worker.finished.disconnect()
+        self.worker.failed.disconnect()
+        pair = (self.thread, self.worker)
+        self.finishing.append(pair)
+        self.thread.finished.connect(lambda: self.finishing.remove(pair))
+        self.thread.quit()
+        self.thread = None
+        self.worker = None
+        self.cancel_button.setVisible(False)
+
+    def show_progress(self, fraction):
+        self.statusbar.showMessage("Loading {}: {:.0f}%".format(self.description, 100 * fraction))
+
+    def finish(self, result):
+        on_loaded = self.on_loaded
+        self.stop()
+        self.statusbar.clearMessage()
+        on_loaded(result)
+
+    def fail(self, message):
+        description = self.description
+        self.stop()
+        self.statusbar.showMessage("Failed to load {}: {}".format(description, message))
+
+
+class _JobWorker(QObject):
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+
+    @pyqtSlot(object, object)
+    def run(self, job, on_done):
+        """
+        Runs a job of the JobQueue on the thread the worker is moved to.
+        :param job: A function without arguments that returns the result.
+        :param on_done: The function to hand the result to, emitted along with it.
+        :return: None
+        """
+        try:
+            result = job()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(on_done, result)
+
+
+class JobQueue(QObject):
+    submitted = pyqtSignal(object, object)
+
+    def __init__(self, statusbar):
+        """
+        The JobQueue runs jobs one at a time on a worker thread, in the order they were submitted, and hands every result
+        back on the GUI thread. The model wrapper evaluates the runs of the session with it, so editing an integration
+        does not block the window while it is computed over every run.
+        :param statusbar: The status bar of the main window.
+        """
+        super().__init__()
+        self.statusbar = statusbar
+        self.pending = 0
+        """The number of jobs that have been submitted and have not finished"""
+        self.descriptions = []
+        """What every job that has not finished does, in the order they were submitted"""
+
+        self.thread = QThread()
+        self.worker = _JobWorker()
+        self.worker.moveToThread(self.thread)
+        # the signal crosses threads, so the jobs are queued in the event loop of the worker thread.
+        self.submitted.connect(self.worker.run)
+        self.worker.finished.connect(self.finish)
+        self.worker.failed.connect(self.fail)
+        self.thread.start()
+
+    def submit(self, job, on_done, description="Evaluating runs"):
+        """
+        Queues a job.
+        :param job: A function without arguments that returns the result, it is called on the worker thread.
+        :param on_done: Called on the GUI thread with the result of the job.
+        :param description: What the job does, shown in the status bar while it runs.
+        :return: None
+        """
+        self.pending += 1
+        self.descriptions.append(description)
+        self.statusbar.showMessage(self.descriptions[0])
+        self.submitted.emit(job, on_done)
+
+    def finish(self, on_done, result):
+        self.done()
+        on_done(result)
+
+    def fail(self, message):
+        description = self.descriptions[0]
+        self.done()
+        self.statusbar.showMessage("{} failed: {}".format(description, message))
+
+    def done(self):
+        self.pending -= 1
+        self.descriptions.pop(0)
+        if self.pending == 0:
+            self.statusbar.clearMessage()
+        else:
+            self.statusbar.showMessage(self.descriptions[0])
+
+    def stop(self):
+        """
+        Stops the worker thread once the running job has finished, the jobs that have not started are dropped.
+        :return: None
+        """
+        self.worker.finished.disconnect()
+        self.worker.failed.disconnect()
+        self.thread.quit()
+        self.thread.wait()
@@ -3,6 +3,7 @@ import sys
 
 from PyQt5.QtWidgets import QApplication
 
+from gc2d.controller.loader import import_csv_task
 from gc2d.model.model_wrapper import ModelWrapper
 from gc2d.model.palette.palette import load_custom_palettes
 from gc2d.view.main_window import Window
@@ -32,10 +33,11 @@ def main():
     """ The model wrapper. """
     app = QApplication([])
     """ The Qt application. """
-    if len(sys.argv) > 1:
-        datafile = os.path.join(os.getcwd(), sys.argv[1])
-        model_wrapper.import_model(datafile)
 
     win = Window(model_wrapper)  # create the window.
 
+    if len(sys.argv) > 1:
+        datafile = os.path.join(os.getcwd(), sys.argv[1])
+        win.loader.load(datafile, import_csv_task(datafile), model_wrapper.replace_model)
+
     sys.exit(app.exec_())
@@ -0,0 +1,180 @@
+import numpy as np
+from scipy import ndimage
+
+TILES = (4, 2)
+""" The number of tiles along the first and second dimension the shift is refined in. """
+MIN_SIGNIFICANCE = 8.0
+""" A correlation peak counts when it stands this many standard deviations above the correlation surface. """
+MAX_RESIDUAL = 0.25
+""" The largest refinement of a tile on top of the global shift, as a fraction of the size of the tile. """
+
+
+def _window(shape):
+    """
+    :param shape: The shape of a region.
+    :return: A 2D Hann window of the shape, so the edges of the region do not correlate.
+    """
+    return np.outer(np.hanning(shape[0]), np.hanning(shape[1]))
+
+
+def _spectrum(data, x0, y0, shape, window):
+    """
+    The windowed spectrum of a region of the data, with its mean removed. The parts of the region outside the data
+    are zero.
+    :param data: The 2D numpy array.
+    :param x0: The first index of the region along the first dimension, can be outside the data.
+    :param y0: The first index of the region along the second dimension, can be outside the data.
+    :param shape: The shape of the region.
+    :param window: The window of the shape.
+    :return: The real 2D FFT of the region.
+    """
+    values = np.zeros(shape)
+    low_x, high_x = max(x0, 0), min(x0 + shape[0], data.shape[0])
+    low_y, high_y = max(y0, 0), min(y0 + shape[1], data.shape[1])
+    if low_x < high_x and low_y < high_y:
+        region = np.asarray(data[low_x:high_x, low_y:high_y], dtype=np.float64)
+        region = np.where(np.isfinite(region), region, 0)
+        values[low_x - x0:high_x - x0, low_y - y0:high_y - y0] = region - region.mean()
+    return np.fft.rfft2(values * window)
+
+
+def _correlate(reference, target, shape):
+    """
+    Phase correlation of two spectra: the normalized cross power spectrum peaks at the shift between the regions.
+    :param reference: The spectrum of the reference region.
+    :param target: The spectrum of the target region.
+    :param shape: The shape of the regions.
+    :return: The (x, y) shift to add to a position in the reference to find it in the target, to a fraction of a cell,
+        and the significance of the peak of the correlation in standard deviations of the correlation surface.
+    """
+    cross = target * np.conj(reference)
+    magnitude = np.abs(cross)
+    cross /= np.where(magnitude > 0, magnitude, 1)
+    surface = np.fft.irfft2(cross, s=shape)
+    peak = np.unravel_index(np.argmax(surface), shape)
+    spread = surface.std()
+    significance = (surface[peak] - surface.mean()) / spread if spread > 0 else 0.0
+
+    shift = np.zeros(2)
+    for axis in (0, 1):
+        size = shape[axis]
+        index = peak[axis]
+        before, after = list(peak), list(peak)
+        before[axis], after[axis] = (index - 1) % size, (index + 1) % size
+        low, centre, high = surface[tuple(before)], surface[peak], surface[tuple(after)]
+        # a parabola through the peak and its neighbours places the peak between cells.
+        curvature = low - 2 * centre + high
+        fraction = np.clip((low - high) / (2 * curvature), -0.5, 0.5) if curvature < 0 else 0.0
+        # the correlation wraps around, a peak in the upper half is a negative shift.
+        shift[axis] = (index if index <= size // 2 else index - size) + fraction
+    return shift, float(significance)
+
+
+class Warp:
+
+    def __init__(self, shift, centres_x, centres_y, displacements, aligned=True):
+        """
+        A warp from the positions of a reference chromatogram to the positions of a target one, as found by an Aligner.
+        The displacement is interpolated bilinearly between the centres of the tiles, and constant beyond them.
+        :param shift: The global (x, y) shift.
+        :param centres_x: The positions of the centres of the tiles along the first dimension.
+        :param centres_y: The positions of the centres of the tiles along the second dimension.
+        :param displacements: The (x, y) displacement at the centre of every tile, an array of shape (x, y, 2).
+        :param aligned: Whether any of the displacements was found by a significant correlation.
+        """
+        self.shift = shift
+        """ The global (x, y) shift """
+        self.centres_x = centres_x
+        """ The centres of the tiles along the first dimension """
+        self.centres_y = centres_y
+        """ The centres of the tiles along the second dimension """
+        self.displacements = displacements
+        """ The (x, y) displacement at the centre of every tile """
+        self.aligned = aligned
+        """ Whether the drift was found, otherwise the warp does not move anything """
+
+    def map_points(self, vertices):
+        """
+        Moves points of the reference to where they are in the target, like the vertices of an integration polygon.
+        :param vertices: A sequence of (x, y) points in data coordinates.
+        :return: A list of the moved (x, y) points.
+        """
+        points = np.asarray(vertices, dtype=np.float64).reshape((-1, 2))
+        if len(points) == 0:
+            return []
+        # the fractional index of every point in the grid of tile centres.
+        grid_x = np.interp(points[:, 0], self.centres_x, np.arange(len(self.centres_x)))
+        grid_y = np.interp(points[:, 1], self.centres_y, np.arange(len(self.centres_y)))
+        moved = points.copy()
+        for axis in (0, 1):
+            moved[:, axis] += ndimage.map_coordinates(self.displacements[:, :, axis], [grid_x, grid_y], order=1,
+                                                      mode='nearest')
+        return [tuple(point) for point in moved.tolist()]
+
+
+class Aligner:
+
+    def __init__(self, reference, tiles=TILES):
+        """
+        Estimates the retention time drift of chromatograms against a reference. The global shift is found by phase
+        correlation of the whole chromatograms, and refined by phase correlation of tiles, so drift that changes over
+        the run is followed. Tiles without a significant correlation, like tiles without peaks, keep the global shift.
+        The spectra of the reference are computed once, so aligning many runs against one reference only transforms the
+        runs.
+        :param reference: The 2D numpy array of the reference chromatogram, with the transform it is shown with.
+        :param tiles: The number of tiles along the first and second dimension.
+        """
+        self.shape = reference.shape
+        """ The shape of the reference """
+        self.window = _window(self.shape)
+        """ The window of the whole chromatograms """
+        self.spectrum = _spectrum(reference, 0, 0, self.shape, self.window)
+        """ The spectrum of the whole reference """
+        tiles = (max(min(tiles[0], self.shape[0] // 8), 1), max(min(tiles[1], self.shape[1] // 8), 1))
+        edges_x = np.linspace(0, self.shape[0], tiles[0] + 1).astype(int)
+        edges_y = np.linspace(0, self.shape[1], tiles[1] + 1).astype(int)
+        self.tile_shape = (int(edges_x[1] - edges_x[0]), int(edges_y[1] - edges_y[0]))
+        """ The shape of every tile, the last tiles may overlap the previous ones to keep it """
+        self.tile_window = _window(self.tile_shape)
+        """ The window of a tile """
+        self.corners = [(min(x, self.shape[0] - self.tile_shape[0]), min(y, self.shape[1] - self.tile_shape[1]))
+                        for x in edges_x[:-1] for y in edges_y[:-1]]
+        """ The (x, y) first cell of every tile, by row of tiles """
+        self.tile_spectra = [_spectrum(reference, x, y, self.tile_shape, self.tile_window) for x, y in self.corners]
+        """ The spectrum of every tile of the reference """
+        self.tiles = tiles
+        """ The number of tiles along the first and second dimension """
+        self.centres_x = np.array([x for x, _ in self.corners[::tiles[1]]]) + self.tile_shape[0] / 2
+        """ The centres of the tiles along the first dimension """
+        self.centres_y = np.array([y for _, y in self.corners[:tiles[1]]]) + self.tile_shape[1] / 2
+        """ The centres of the tiles along the second dimension """
+
+    def align(self, target):
+        """
+        Estimates the warp from the reference to a target. A target of another shape, like a run one modulation longer
+        or shorter, is correlated over the part that overlaps the reference: the target is cut to the shape of the
+        reference, or padded with zeros. Where nothing correlates significantly, like for a run of another modulation
+        period, the warp does not move anything and is not aligned.
+        :param target: The 2D numpy array of the target chromatogram, with the transform the reference is shown with.
+        :return: The Warp from the positions in the reference to the positions in the target.
+        """
+        shift, significance = _correlate(self.spectrum, _spectrum(target, 0, 0, self.shape, self.window), self.shape)
+        aligned = significance >= MIN_SIGNIFICANCE
+        if not aligned:
+            shift = np.zeros(2)
+        whole = np.rint(shift).astype(int)
+
+        limit = MAX_RESIDUAL * np.array(self.tile_shape)
+        displacements = np.empty((len(self.corners), 2))
+        for index, ((x, y), reference) in enumerate(zip(self.corners, self.tile_spectra)):
+            # the tile of the target where the global shift puts the tile of the reference.
+            residual, tile_significance = _correlate(
+                reference, _spectrum(target, x + whole[0], y + whole[1], self.tile_shape, self.tile_window),
+                self.tile_shape)
+            local = whole + residual
+            if tile_significance < MIN_SIGNIFICANCE or np.any(np.abs(local - shift) > limit):
+                local = shift
+            else:
+                aligned = True
+            displacements[index] = local
+        return Warp(shift, self.centres_x, self.centres_y, displacements.reshape(self.tiles + (2,)), aligned)
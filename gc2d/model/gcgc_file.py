@@ -0,0 +1,125 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'\x89GCGC\r\n\x1a\n'
+""" The first bytes of a binary gcgc file, a text gcgc file always starts with a json object instead. """
+VERSION = 1
+""" The version of the binary gcgc format written by this module. """
+ALIGNMENT = 4096
+""" The alignment of the chromatogram payload within the file, so it can be memory mapped page aligned. """
+REPLACE_MAPPED = os.name != 'nt'
+""" Whether a file can be replaced while it is memory mapped. Windows does not allow it, elsewhere the maps keep the
+replaced file. """
+
+_PREAMBLE = struct.Struct('<{}sIQ'.format(len(MAGIC)))
+""" The magic bytes, the format version and the length of the json header. """
+
+
+def is_binary(file_name):
+    """
+    :param file_name: The name of the gcgc file.
+    :return: Whether the file is a binary gcgc file rather than a json one.
+    """
+    with open(file_name, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def is_mapped_from(data, file_name):
+    """
+    :param data: A numpy array.
+    :param file_name: The name of a file.
+    :return: Whether the array is memory mapped from the file, like a chromatogram read from it by read_gcgc.
+    """
+    mapped = getattr(data, 'filename', None) if isinstance(data, np.memmap) else None
+    if mapped is None:
+        return False
+    try:
+        return os.path.samefile(mapped, file_name)
+    except OSError:
+        # either file does not exist (anymore).
+        return False
+
+
+def must_release(data, file_name):
+    """
+    :param data: A numpy array.
+    :param file_name: The name of a file that is about to be replaced.
+    :return: Whether the array has to stop mapping the file first, which is only so where mapped files can not be
+        replaced.
+    """
+    return not REPLACE_MAPPED and is_mapped_from(data, file_name)
+
+
+def write_gcgc(file_name, model, integrations, preferences):
+    """
+    Writes the program state as a binary gcgc file: a json header holding the integrations and preferences, followed
+    by the chromatogram as a raw, aligned, little-endian array.
+
+    The file is written next to the target and moved over it at the end, so a chromatogram that is currently memory
+    mapped from the target file is never truncated while it is being read. Windows does not replace a file that is
+    still mapped, so callers release the maps of the target first, see must_release.
+    :param file_name: The name of the file to write to.
+    :param model: The 2D numpy array holding the chromatogram.
+    :param integrations: The json serializable integration states.
+    :param preferences: The json serializable preference state.
+    :return: None
+    :raises OSError: If the file could not be written or replaced, the target is then left as it was.
+    """
+    data = np.asarray(model)
+    data = np.ascontiguousarray(data, dtype=data.dtype.newbyteorder('<'))
+
+    header = {
+        "integrations": integrations,
+        "preferences": preferences,
+        "model": {"dtype": data.dtype.str, "shape": list(data.shape)}
+    }
+    # the offset is part of the header, so its length has to be fixed before the offset can be computed.
+    header["model"]["offset"] = 0
+    length = len(json.dumps(header).encode('utf-8')) + 32
+    offset = -(-(_PREAMBLE.size + length) // ALIGNMENT) * ALIGNMENT
+    header["model"]["offset"] = offset
+    encoded = json.dumps(header).encode('utf-8').ljust(length)
+
+    temp_name = file_name + '.tmp'
+    with open(temp_name, 'wb') as file:
+        file.write(_PREAMBLE.pack(MAGIC, VERSION, length))
+        file.write(encoded)
+        file.write(b'\0' * (offset - _PREAMBLE.size - length))
+        data.tofile(file)
+    try:
+        os.replace(temp_name, file_name)
+    except OSError as error:
+        os.remove(temp_name)
+        raise OSError(error.errno, "could not replace '{}', it may be open in another program ({})".format(
+            file_name, error.strerror or error)) from error
+
+
+def read_gcgc(file_name):
+    """
+    Reads a gcgc file, either a binary or a json one. The chromatogram of a binary file is memory mapped read-only
+    rather than read, so opening the file costs no time or memory until the data is used. A shared read-only map is
+    not counted against the memory of the process, so chromatograms larger than memory can be opened.
+    :param file_name: The name of the gcgc file.
+    :return: A dictionary with optional "model", "integrations" and "preferences" entries, like a json gcgc file.
+    """
+    if not is_binary(file_name):
+        with open(file_name, 'r') as file:
+            loaded = json.load(file)
+        if "model" in loaded:
+            loaded["model"] = np.array(loaded["model"])
+        return loaded
+
+    with open(file_name, 'rb') as file:
+        _magic, version, length = _PREAMBLE.unpack(file.read(_PREAMBLE.size))
+        if version > VERSION:
+            raise ValueError("'{}' was written by a newer version (format {})".format(file_name, version))
+        loaded = json.loads(file.read(length).decode('utf-8'))
+
+    if "model" in loaded:
+        layout = loaded["model"]
+        loaded["model"] = np.memmap(file_name, dtype=np.dtype(layout["dtype"]), mode='r', offset=layout["offset"],
+                                    shape=tuple(layout["shape"]))
+    return loaded
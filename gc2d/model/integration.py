@@ -1,13 +1,10 @@
-import numpy as np
-
-
 class Integration:
 
     def __init__(self, key, selector):
         """
         Container for a selection mask of a chromatogram
         Holds its own selector controller object to enable interacting with specific selectors
-        Calculates mean area under the curve 
+        Holds the sum, mean, area and peak of the data under the selection
         :param key: an identifier which is unique over all integrations in the model
         :param selector: a Selector object which contains an ROI drawer
         :return: None
@@ -15,36 +12,36 @@ class Integration:
         self.label = "integration " + str(key + 1)  # generate name
         self.id = key
         self.selector = selector
+        self.statistics = None
         self.mask = None
-        self.pos = None  # track position of bounding box
+        self.pos = None  # track (x, y) cell index of bounding box
         self.show = False
         self.mean = None
         self.sum = None
+        self.area = None
+        self.peak = None
+        self.runs = {}  # the PolygonStatistics of the region over every run of the session, by run
 
-    def update(self, region=None, label=None):
+    def update(self, statistics=None, label=None):
         """
         updates the mask + integration value and/or the label
-        :param mask: an updated mask
+        :param statistics: the PolygonStatistics of the updated region
         :param label: an new label
         :return: None
         """
-        if region is not None:
-            mask = region[1]
-            self.mask = mask
-            self.pos = region[0].topLeft()
-            self.sum = np.sum(mask)
-            if self.sum > 0.0:
-                self.mean = self.sum / np.count_nonzero(mask)
-            else:
-                # outside of graph
-                self.sum = 0
-                self.mean = 0
+        if statistics is not None:
+            self.statistics = statistics
+            # the statistics over the runs were of the previous region, they are computed again.
+            self.runs = {}
+            self.mask = statistics.values
+            self.pos = statistics.pos
+            self.sum = statistics.sum
+            self.mean = statistics.mean
+            self.area = statistics.area
+            self.peak = statistics.peak
         if label is not None:
             self.label = label
 
-    def recompute(self):
-        self.selector.update_mask()
-
     def get_state(self):
         """ return state values to be serialized """
         handles, pos = self.selector.get_handles()
@@ -1,4 +1,7 @@
 from gc2d.model.palette import palette
+from gc2d.model.precision import Precision
+from gc2d.model.pyramid import Pyramid
+from gc2d.model.store import allocate, min_max, row_blocks, sum_rows
 
 
 class Model:
@@ -6,6 +9,8 @@ class Model:
     def __init__(self, chromatogram_data, period):
         """
         The Model is responsible for storing the state of the program.
+        The chromatogram data can be disk-backed, like the memory mapped chromatogram of a binary gcgc file. Statistics
+        over the whole data are computed chunk by chunk, and large derived data is disk-backed too.
 
         :param chromatogram_data: The 2D array containing the chromatography data.
         :param period: The period of the data.
@@ -20,10 +25,11 @@ class Model:
         self.palette = palette.viridis
         """The palette to color the data with """
 
-        self.lowest = self.__chromatogram_data.min()
-        """The lowest value in the chromatogram """
-        self.highest = self.__chromatogram_data.max()
-        """The highest value in the chromatogram """
+        self.precision = Precision.for_dtype(chromatogram_data.dtype)
+        """The storage precision of the raw data and the data derived from it"""
+
+        self.lowest, self.highest = min_max(self.__chromatogram_data)
+        """The lowest and highest value in the chromatogram, found in one pass over the data """
 
         self.lower_bound = self.lowest / 100
         """ The lower bound of the intensity scale """
@@ -33,6 +39,19 @@ class Model:
         self.period = period
         """The period of the second GC. """
 
+        self.__projections = {}
+        """The cached 1D projections, for the raw (False) and convolved (True) data."""
+        self.__pyramids = {}
+        """The cached level of detail pyramids, for the raw (False) and convolved (True) data."""
+        self.__lent = []
+        """The arrays that background jobs read and that are not written again until they are returned."""
+
+    def __is_convolved_shown(self):
+        """
+        :return: Whether get_2d_chromatogram_data returns the convolved data.
+        """
+        return self.show_convolved and self.convolved_data is not None
+
     def get_2d_chromatogram_data(self):
         """
         Returns either the convolved or the raw data depending on the state of show controlled.
@@ -49,6 +68,43 @@ class Model:
         :return: None
         """
         self.convolved_data = data
+        self.__projections.pop(True, None)
+        self.__pyramids.pop(True, None)
+
+    def get_transform_buffer(self):
+        """
+        Returns the array to write the next transformed data in. The convolved data is reused when it has the right
+        shape and dtype, so applying another transform does not allocate a new array, unless a background job still
+        reads it. Transformed data has the derived dtype of the storage precision.
+        :return: A 2D Numpy array with the shape of the raw data.
+        """
+        raw = self.__chromatogram_data
+        dtype = self.precision.get_derived_dtype()
+        if self.convolved_data is not None and self.convolved_data.shape == raw.shape and \
+                self.convolved_data.dtype == dtype and not any(lent is self.convolved_data for lent in self.__lent):
+            return self.convolved_data
+        return allocate(raw.shape, dtype, like=raw)
+
+    def lend_data(self, data):
+        """
+        Marks data of the model as read by a background job, so it is not written in place until it is returned. Data
+        can be lent to several jobs at once.
+        :param data: The array, like the shown data.
+        :return: The array.
+        """
+        self.__lent.append(data)
+        return data
+
+    def return_data(self, data):
+        """
+        Marks lent data as no longer read by a background job.
+        :param data: The array that was lent.
+        :return: None
+        """
+        for index, lent in enumerate(self.__lent):
+            if lent is data:
+                del self.__lent[index]
+                return
 
     def get_raw_data(self):
         """
@@ -56,6 +112,22 @@ class Model:
         """
         return self.__chromatogram_data
 
+    def copy_raw_data(self):
+        """
+        Replaces the raw data by a copy, so the file it is mapped from can be replaced. A large copy is disk-backed, like
+        everything derived from large disk-backed data.
+        :return: The previous raw data.
+        """
+        previous = self.__chromatogram_data
+        copy = allocate(previous.shape, previous.dtype, like=previous)
+        for start, stop in row_blocks(previous):
+            copy[start:stop] = previous[start:stop]
+        self.__chromatogram_data = copy
+        if False in self.__pyramids:
+            # the coarser levels are copies already, only the full resolution level refers to the file.
+            self.__pyramids[False].levels[0] = copy
+        return previous
+
     def toggle_convolved(self, b):
         """
         Sets whether to show the convolved data or not.
@@ -75,3 +147,25 @@ class Model:
         :return: the height of the data.
         """
         return self.get_2d_chromatogram_data().shape[1]
+
+    def get_projection(self):
+        """
+        Returns the 1D chromatogram of the shown data, the sum over the second dimension. It is cached until the data
+        changes.
+        :return: A 1D Numpy array.
+        """
+        key = self.__is_convolved_shown()
+        if key not in self.__projections:
+            self.__projections[key] = sum_rows(self.get_2d_chromatogram_data())
+        return self.__projections[key]
+
+    def get_pyramid(self):
+        """
+        Returns the max-pooled level of detail pyramid of the shown data, which the 2D and 3D views share. It is cached
+        until the data changes.
+        :return: A Pyramid.
+        """
+        key = self.__is_convolved_shown()
+        if key not in self.__pyramids:
+            self.__pyramids[key] = Pyramid(self.get_2d_chromatogram_data())
+        return self.__pyramids[key]
@@ -1,8 +1,11 @@
-import numpy as np
-
+from gc2d.model.gcgc_file import must_release
 from gc2d.model.integration import Integration
 from gc2d.model.model import Model
+from gc2d.model.polygon import recompute_all
 from gc2d.model.preferences import PreferenceEnum, Preferences
+from gc2d.model.reader import read_csv
+from gc2d.model.session import Session
+from gc2d.model.transformations import Pipeline, run_tiled, transform_from_json
 from gc2d.observable import Observable
 
 
@@ -16,8 +19,15 @@ class ModelWrapper(Observable):
         self.model = None
         """The model containing all information relating to the chromatogram"""
         self.integrations = {}
+        self.shown = set()
+        """The keys of the integrations that are shown, so setting the current one does not visit all of them"""
         self.integrate_id = 0
         self.preferences = Preferences()
+        self.session = Session()
+        """The other runs the integrations are evaluated against, they stay when another model is opened"""
+        self.run_in_background = None
+        """Called with a job and a function to hand its result to, runs the job off the thread of the wrapper and hands
+        the result back on it, like the job queue of the window; without it the runs are evaluated right away"""
 
     def set_palette(self, palette):
         """
@@ -25,9 +35,10 @@ class ModelWrapper(Observable):
         :return: None
         """
         if self.model is not None:
-            self.set_preference(PreferenceEnum.PALETTE, palette)
-            self.model.palette = palette
-            self.notify('model.palette', self.model)
+            with self.transaction('set_palette'):
+                self.set_preference(PreferenceEnum.PALETTE, palette)
+                self.model.palette = palette
+                self.notify('model.palette', self.model)
 
     def set_upper_bound(self, upper_bound):
         """
@@ -35,9 +46,10 @@ class ModelWrapper(Observable):
         :return: The lower bound of the palette
         """
         if self.model is not None:
-            self.set_preference(PreferenceEnum.UPPER_BOUND, upper_bound)
-            self.model.upper_bound = upper_bound
-            self.notify('model.upper_bound', self.model)
+            with self.transaction('set_upper_bound'):
+                self.set_preference(PreferenceEnum.UPPER_BOUND, upper_bound)
+                self.model.upper_bound = upper_bound
+                self.notify('model.upper_bound', self.model)
 
     def set_lower_bound(self, lower_bound):
         """
@@ -45,9 +57,10 @@ class ModelWrapper(Observable):
         :return: The lower bound of the palette
         """
         if self.model is not None:
-            self.set_preference(PreferenceEnum.LOWER_BOUND, lower_bound)
-            self.model.lower_bound = lower_bound
-            self.notify('model.lower_bound', self.model)
+            with self.transaction('set_lower_bound'):
+                self.set_preference(PreferenceEnum.LOWER_BOUND, lower_bound)
+                self.model.lower_bound = lower_bound
+                self.notify('model.lower_bound', self.model)
 
     def get_state(self):
         """ returns an array with the model data and the integration data for storage """
@@ -57,26 +70,65 @@ class ModelWrapper(Observable):
             self.preferences.get_state()
         )
 
+    @staticmethod
+    def create_model(arr):
+        """
+        Constructs a model for chromatogram data, with the pyramid the views draw it from. This scans the data, so
+        loaders call it off the GUI thread and hand the result to replace_model.
+        :param arr: numpy array with the chromatogram data
+        :return: the new Model
+        """
+        model = Model(arr, len(arr[0]))
+        model.get_pyramid()
+        return model
+
     def set_model(self, arr):
         """
         Overwrites the model data and notifies listeners
         :param arr: numpy array with the data to be set as the new model
         :return: None
         """
-        self.close_model()
-        self.model = Model(arr, len(arr[0]))
-        self.set_lower_bound(self.model.lower_bound)
-        self.set_upper_bound(self.model.upper_bound)
-        self.notify('model', self.model)  # Notify all observers.
+        self.replace_model(self.create_model(arr))
+
+    def replace_model(self, model):
+        """
+        Overwrites the model with an already constructed model and notifies listeners. The views draw the new model
+        once, with its bounds.
+        :param model: the Model to set
+        :return: None
+        """
+        with self.transaction('replace_model'):
+            self.close_model()
+            self.model = model
+            self.set_lower_bound(self.model.lower_bound)
+            self.set_upper_bound(self.model.upper_bound)
+            self.notify('model', self.model)  # Notify all observers.
 
-    def import_model(self, file_name):
+    def import_model(self, file_name, progress=None):
         """
         Loads the chromatogram data from a text file into a new model, omits last column (trailing commas).
         :param file_name: The name of the chromatogram file to open.
+        :param progress: An optional callback that is called with the fraction of the file that has been read.
+        :return: None
+        """
+        dtype = self.get_preference(PreferenceEnum.PRECISION).get_raw_dtype()
+        self.set_model(read_csv(file_name, dtype=dtype, progress=progress))
+
+    def release_file(self, file_name):
+        """
+        Stops mapping a file where the OS does not replace mapped files, so it can be replaced, like when the open
+        project is saved over itself. A chromatogram mapped from the file is replaced by a copy with the same values,
+        so nothing is notified; runs mapped from it read it again when they are next used.
+        :param file_name: The name of the file.
         :return: None
         """
-        arr = np.genfromtxt(file_name, delimiter=',', dtype=np.float64)
-        self.set_model(arr[:, :-1])
+        if self.model is not None and must_release(self.model.get_raw_data(), file_name):
+            previous = self.model.copy_raw_data()
+            transform = self.preferences.transform
+            if isinstance(transform, Pipeline) and transform.data is previous:
+                # the copy holds the same values, so the cached stage outputs stay valid.
+                transform.data = self.model.get_raw_data()
+        self.session.release_file(file_name)
 
     def close_model(self):
         """
@@ -84,12 +136,13 @@ class ModelWrapper(Observable):
         :return: None
         """
         if self.model is not None:
-            self.model = None
-            self.notify('model', self.model)  # Notify all observers
-            keys = [key for key in self.integrations]
-            for key in keys:
-                self.clear_integration(key)
-            self.integrate_id = 0
+            with self.transaction('close_model'):
+                self.model = None
+                self.notify('model', self.model)  # Notify all observers
+                keys = [key for key in self.integrations]
+                for key in keys:
+                    self.clear_integration(key)
+                self.integrate_id = 0
 
     def set_transform(self, transform):
         """
@@ -97,20 +150,31 @@ class ModelWrapper(Observable):
         :param transform: a Transform object (that has a transform method that takes and returns a 2d numpy array)
         :return: None
         """
-        self.model.set_convolved_data(transform.transform(self.model.get_raw_data()))
-        self.set_preference(PreferenceEnum.TRANSFORM, transform)
-        self.notify('model', self.model)
-        self.recompute_integrations()
+        previous = self.preferences.transform
+        if isinstance(transform, Pipeline) and isinstance(previous, Pipeline) and transform is not previous:
+            # only the stages from the first changed one onward are recomputed.
+            transform.take_cache(previous)
+        data = run_tiled(transform, self.model.get_raw_data(), out=self.model.get_transform_buffer())
+        with self.transaction('set_transform'):
+            self.model.set_convolved_data(data)
+            self.set_preference(PreferenceEnum.TRANSFORM, transform)
+            self.notify('model', self.model)
+            self.recompute_integrations()
 
     def toggle_convolved(self, convolved):
         """
-        Toggle whether to show convolved data.
+        Toggle whether to show convolved data. Nothing is notified if that does not change the shown data, as when there
+        is no convolved data yet.
         :param convolved: A boolean signifying whether to show convolved data or not.
         :return: None
         """
+        shown = self.model.get_2d_chromatogram_data()
         self.model.toggle_convolved(convolved)
-        self.notify('model.viewTransformed', self.model)
-        self.recompute_integrations()
+        if self.model.get_2d_chromatogram_data() is shown:
+            return
+        with self.transaction('toggle_convolved'):
+            self.notify('model.viewTransformed', self.model)
+            self.recompute_integrations()
 
     def add_integration(self, selector, key):
         """
@@ -120,9 +184,10 @@ class ModelWrapper(Observable):
         :param key: TODO What is this?
         :return index: the index of this integration, to be used as identifier
         """
-        self.integrations[key] = Integration(key, selector)
-        self.notify('newIntegration', self.integrations[key])
-        self.set_current(key)
+        with self.transaction('add_integration'):
+            self.integrations[key] = Integration(key, selector)
+            self.notify('newIntegration', self.integrations[key])
+            self.set_current(key)
 
     def set_current(self, key):
         """
@@ -130,8 +195,12 @@ class ModelWrapper(Observable):
         :param key: the key of the current ROI
         :return: None
         """
-        for curr_key in self.integrations:
-            self.set_show(curr_key, curr_key == key)
+        with self.transaction('set_current'):
+            # the set has no order, the integrations are hidden in the order they were made.
+            for curr_key in sorted(shown for shown in self.shown if shown != key):
+                self.set_show(curr_key, False)
+            if key in self.integrations:
+                self.set_show(key, True)
 
     def get_new_key(self):
         """
@@ -141,20 +210,151 @@ class ModelWrapper(Observable):
         self.integrate_id += 1
         return self.integrate_id - 1
 
-    def update_integration(self, key, mask=None, label=None):
+    def update_integration(self, key, statistics=None, label=None):
         """
         Update an integration mask, and notifies the view that integration values have been changed
         :param key: the key of the altered integration
-        :param mask: an updated mask
+        :param statistics: the PolygonStatistics of the updated region
         :param label: an updated label
         :return: None
         """
-        self.integrations[key].update(mask, label)
+        self.integrations[key].update(statistics, label)
+        if statistics is not None:
+            self.evaluate_runs([self.integrations[key]])
         self.notify('integrationUpdate', self.integrations[key])
 
     def recompute_integrations(self):
-        for integration in self.integrations.values():
-            integration.recompute()
+        """
+        Recomputes all integrations over the shown data in one batch, reusing their polygon coverage, and notifies the
+        view once with the list of updated integrations.
+        :return: None
+        """
+        integrations = [integration for integration in self.integrations.values() if integration.statistics is not None]
+        if self.model is None or not integrations:
+            return
+        data = self.model.get_2d_chromatogram_data()
+        statistics = recompute_all(data, [integration.statistics for integration in integrations])
+        for integration, integration_statistics in zip(integrations, statistics):
+            integration.update(integration_statistics)
+        self.evaluate_runs(integrations)
+        self.notify('integrationsUpdate', integrations)
+
+    def get_shown_transform(self):
+        """
+        :return: The transform the model shows its data with, or None if it shows the raw data or there is no model.
+        """
+        if self.model is None or self.model.get_2d_chromatogram_data() is self.model.get_raw_data():
+            return None
+        return self.preferences.transform
+
+    def evaluate_runs(self, integrations, runs=None):
+        """
+        Computes integrations over the runs of the session, with the transform the model is shown with, in parallel
+        over the runs. With run_in_background the runs are evaluated off the thread of the wrapper and the views are
+        notified of the integrations once their results are in; otherwise they are evaluated right away and the views
+        are not notified. When the session aligns the runs, the runs whose drift was not found are notified as
+        'unalignedRuns', their integrations are not moved.
+        :param integrations: the integrations to evaluate
+        :param runs: the runs to evaluate them against, by default all runs of the session
+        :return: None
+        """
+        runs = list(self.session.runs if runs is None else runs)
+        integrations = [integration for integration in integrations if integration.statistics is not None]
+        if not runs or not integrations:
+            return
+        statistics = [integration.statistics for integration in integrations]
+        transform = self.get_shown_transform()
+        if transform is not None:
+            # a copy, so the job does not read the transform of the model while it is changed.
+            transform = transform_from_json(transform.to_json())
+        model = self.model
+        reference = None if model is None else model.get_2d_chromatogram_data()
+        background = self.run_in_background
+        if model is not None and background is not None:
+            # the next transform is written in another array while the job reads this one.
+            model.lend_data(reference)
+        align = self.session.align
+
+        def evaluate():
+            results = self.session.evaluate(statistics, transform, runs, reference=reference)
+            return results, [run for run in runs if align and reference is not None and not run.is_aligned()]
+
+        def deliver(evaluated):
+            if model is not None and background is not None:
+                model.return_data(reference)
+            results, unaligned = evaluated
+            # an integration that was changed or removed since, or a removed run, is left to the evaluation that
+            # followed the change.
+            current = align == self.session.align
+            updated = []
+            for integration, evaluated, run_results in zip(integrations, statistics, zip(*results)):
+                if not current or self.integrations.get(integration.id) is not integration or \
+                        integration.statistics is not evaluated:
+                    continue
+                for run, run_statistics in zip(runs, run_results):
+                    if run in self.session.runs:
+                        integration.runs[run] = run_statistics
+                updated.append(integration)
+            if background is not None and updated:
+                self.notify('integrationsUpdate', updated)
+            unaligned = [run for run in unaligned if run in self.session.runs]
+            if current and unaligned:
+                self.notify('unalignedRuns', unaligned)
+
+        if background is None:
+            deliver(evaluate())
+        else:
+            background(evaluate, deliver)
+
+    def set_align_runs(self, align):
+        """
+        Sets whether the integrations are moved along with the retention time drift of every run against the model,
+        and evaluates them again.
+        :param align: whether to align the runs
+        :return: None
+        """
+        if align == self.session.align:
+            return
+        with self.transaction('set_align_runs'):
+            self.session.align = align
+            self.evaluate_runs(list(self.integrations.values()))
+            self.notify('integrationsUpdate', list(self.integrations.values()))
+
+    def add_runs(self, runs):
+        """
+        Adds runs to the session and evaluates the integrations against them.
+        :param runs: a list of Run objects, typically read already by a load task
+        :return: None
+        """
+        if not runs:
+            return
+        with self.transaction('add_runs'):
+            for run in runs:
+                self.session.add_run(run)
+            self.notify('newRuns', runs)
+            self.evaluate_runs(list(self.integrations.values()), runs)
+            self.notify('integrationsUpdate', list(self.integrations.values()))
+
+    def remove_run(self, run):
+        """
+        Removes a run from the session, with the statistics of the integrations over it.
+        :param run: the Run to remove
+        :return: None
+        """
+        with self.transaction('remove_run'):
+            self.notify('removeRun', run)
+            self.session.remove_run(run)
+            for integration in self.integrations.values():
+                integration.runs.pop(run, None)
+
+    def clear_runs(self):
+        """
+        Removes all runs from the session.
+        :return: None
+        """
+        with self.transaction('clear_runs'):
+            for run in list(self.session.runs):
+                self.remove_run(run)
 
     def set_show(self, key, mode):
         """ 
@@ -166,6 +366,10 @@ class ModelWrapper(Observable):
         """
         changed = self.integrations[key].set_show(mode)
         if changed:
+            if mode:
+                self.shown.add(key)
+            else:
+                self.shown.discard(key)
             self.notify('showIntegration', self.integrations[key])
 
     def clear_integration(self, key):
@@ -176,6 +380,7 @@ class ModelWrapper(Observable):
         """
         self.notify('removeIntegration', self.integrations[key])
         del self.integrations[key]
+        self.shown.discard(key)
 
     def get_preference(self, which):
         """
@@ -1,20 +1,25 @@
 import os
 
 import numpy as np
-from PyQt5.QtGui import QImage, qRgb
-from pyqtgraph import ColorMap
 
 palettes = []
 
 
-class Palette(ColorMap):
+class Palette:
 
     def __init__(self, name, colors):
         """
-        A callable implementation of the ColorMap from pyqtgraph that returns the lookup table when called.
-        :param colors: The array storing the colors of the palette
+        A color palette with its colors spread evenly from the lowest to the highest value. It returns the lookup table
+        when called, so it can be passed to images as a lut. Only numpy is used, the view converts it to Qt objects.
+        :param name: The name of the palette, a palette replaces a loaded palette with the same name.
+        :param colors: The colors of the palette, as RGB or RGBA tuples of bytes.
         """
-        super().__init__(pos=np.linspace(0.0, 1.0, len(colors)), color=colors)
+        colors = np.asarray(colors, dtype=np.float64).reshape(len(colors), -1)
+        self.colors = np.ones((len(colors), 4))
+        """The RGBA colors of the palette, as floats from 0 to 1."""
+        self.colors[:, :min(colors.shape[1], 4)] = colors[:, :4] / 255
+        self.positions = np.linspace(0.0, 1.0, len(colors))
+        """The value between 0 and 1 of every color."""
         self.name = name
 
         for i, p in enumerate(palettes):
@@ -29,17 +34,33 @@ class Palette(ColorMap):
         :param args:
         :return: the lookup table that corresponds to this palette.
         """
-        return self.getLookupTable(alpha=False)
-
-    def generate_preview(self, width=400, height=100):
-        gradient = self.getLookupTable(start=0.0, stop=1.0, nPts=width, mode='byte', alpha=False)
-        img = QImage(width, height, QImage.Format_RGB32)
-        x = 0
-        for color in gradient:
-            for y in range(0, height):
-                img.setPixel(x, y, qRgb(color[0], color[1], color[2]))
-            x += 1
-        return img
+        return self.get_lookup_table()
+
+    def get_colors(self, mode='byte'):
+        """
+        :param mode: 'byte' for colors from 0 to 255, 'float' for colors from 0 to 1.
+        :return: The RGBA colors of the palette, one row per color.
+        """
+        if mode == 'float':
+            return self.colors.copy()
+        return (self.colors * 255).astype(np.ubyte)
+
+    def get_lookup_table(self, start=0.0, stop=1.0, points=512, mode='byte', alpha=False):
+        """
+        Interpolates the palette linearly at evenly spaced values.
+        :param start: The value of the first entry.
+        :param stop: The value of the last entry.
+        :param points: The number of entries.
+        :param mode: 'byte' for colors from 0 to 255, 'float' for colors from 0 to 1.
+        :param alpha: Whether to include the alpha channel.
+        :return: The lookup table, one row per entry.
+        """
+        values = np.linspace(start, stop, points)
+        colors = self.get_colors(mode)
+        table = np.empty((points, 4 if alpha else 3), dtype=colors.dtype)
+        for i in range(table.shape[1]):
+            table[:, i] = np.interp(values, self.positions, colors[:, i])
+        return table
 
 
 jet = Palette(
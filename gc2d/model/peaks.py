@@ -0,0 +1,362 @@
+import math
+
+import numpy as np
+from scipy import ndimage, sparse
+from scipy.sparse.csgraph import minimum_spanning_tree
+
+from gc2d.model.store import all_finite
+
+NOISE_SAMPLE = 1 << 18
+""" The noise is estimated from at most this many cells, taken at a regular stride over the data. """
+MAD_TO_SIGMA = 1.4826
+""" Scales the median absolute deviation of normally distributed noise to its standard deviation. """
+
+
+def noise_level(data):
+    """
+    Estimates the baseline and noise of the data robustly, with the median and the median absolute deviation, so the
+    peaks themselves barely affect the estimate.
+    :param data: The 2D numpy array.
+    :return: The baseline and the standard deviation of the noise.
+    """
+    flat = data.reshape(-1)
+    sample = np.asarray(flat[::max(flat.size // NOISE_SAMPLE, 1)], dtype=np.float64)
+    sample = sample[np.isfinite(sample)]
+    if sample.size == 0:
+        return 0.0, 1.0
+    baseline = np.median(sample)
+    sigma = MAD_TO_SIGMA * np.median(np.abs(sample - baseline))
+    if sigma == 0:
+        # more than half of the cells are the baseline, as after a baseline subtraction.
+        sigma = np.std(sample)
+    return float(baseline), float(sigma) if sigma > 0 else 1.0
+
+
+def local_maxima(values, candidates, footprint):
+    """
+    Finds which cells are the maximum of the neighbourhood around them, like comparing the data to its maximum_filter,
+    but only at the candidate cells. Cells outside the data do not count.
+    :param values: The 2D data.
+    :param candidates: The flat indices of the cells to check.
+    :param footprint: The size of the neighbourhood, centred like the filters of ndimage.
+    :return: A boolean array, for every candidate whether it is a local maximum.
+    """
+    x, y = np.unravel_index(candidates, values.shape)
+    height = values.reshape(-1)[candidates]
+    is_maximum = np.ones(len(candidates), dtype=bool)
+    offsets = range(-(footprint // 2), footprint - footprint // 2)
+    for dx in offsets:
+        nx = x + dx
+        valid_x = (nx >= 0) & (nx < values.shape[0])
+        nx = np.clip(nx, 0, values.shape[0] - 1)
+        for dy in offsets:
+            if dx == 0 and dy == 0:
+                continue
+            ny = y + dy
+            valid = valid_x & (ny >= 0) & (ny < values.shape[1])
+            is_maximum &= ~valid | (values[nx, np.clip(ny, 0, values.shape[1] - 1)] <= height)
+    return is_maximum
+
+
+def basins(values, mask):
+    """
+    Splits the mask into the basins of its maxima. Every cell steps to its highest neighbour, if that is higher than the
+    cell itself, and belongs to the basin of the maximum the steps end at. Equal values are ranked by their flat index,
+    so there are no ties. The steps of all cells are followed at once by pointer jumping.
+    :param values: The 2D data, in float64.
+    :param mask: Whether every cell is in the mask.
+    :return: The label of the basin of every cell, 0 outside the mask, and the number of basins.
+    """
+    # a border of outside cells, so the neighbours of every cell are at fixed offsets of the flat index.
+    padded = np.full((values.shape[0] + 2, values.shape[1] + 2), -np.inf)
+    padded[1:-1, 1:-1][mask] = values[mask]
+    flat = padded.reshape(-1)
+    cells = np.flatnonzero(np.pad(mask, 1))
+    best, top = cells, flat[cells]
+    for offset in (-padded.shape[1], padded.shape[1], -1, 1):
+        neighbour = cells + offset
+        height = flat[neighbour]
+        higher = (height > top) | ((height == top) & (neighbour > best))
+        best, top = np.where(higher, neighbour, best), np.where(higher, height, top)
+
+    # the steps are followed by their position in cells, the pointers jump twice as far every round.
+    position = np.zeros(len(flat), dtype=np.intp)
+    position[cells] = np.arange(len(cells))
+    parent = position[best]
+    while True:
+        jumped = parent[parent]
+        if np.array_equal(jumped, parent):
+            break
+        parent = jumped
+    maxima = parent == np.arange(len(cells))
+    count = int(np.count_nonzero(maxima))
+    basin = np.zeros(len(cells), dtype=np.intp)
+    basin[maxima] = np.arange(1, count + 1)
+    labels = np.zeros(len(flat), dtype=np.intp)
+    labels[cells] = basin[parent]
+    return labels.reshape(padded.shape)[1:-1, 1:-1], count
+
+
+def basin_pairs(values, basin, count):
+    """
+    Finds the pairs of neighbouring basins and the saddle between them, the highest of the lower cells of the pairs of
+    neighbouring cells across their border. Only the pairs of a spanning forest with the highest saddles are kept, the
+    others join basins that are already connected over higher saddles, so they change nothing when the basins are
+    merged.
+    :param values: The 2D data, in float64.
+    :param basin: The label of the basin of every cell, 0 outside the mask.
+    :param count: The number of basins.
+    :return: The lower label, the higher label and the saddle of every kept pair of basins, highest saddle first.
+    """
+    keys, levels = [], []
+    for first, second in (((slice(None, -1), slice(None)), (slice(1, None), slice(None))),
+                          ((slice(None), slice(None, -1)), (slice(None), slice(1, None)))):
+        a, b = basin[first], basin[second]
+        border = (a != b) & (a > 0) & (b > 0)
+        a, b = a[border], b[border]
+        keys.append(np.minimum(a, b) * (count + 1) + np.maximum(a, b))
+        levels.append(np.minimum(values[first][border], values[second][border]))
+    keys, levels = np.concatenate(keys), np.concatenate(levels)
+    # sorted by pair and then by level, the last of every pair is its saddle.
+    order = np.lexsort((levels, keys))
+    keys, levels = keys[order], levels[order]
+    last = np.ones(len(keys), dtype=bool)
+    last[:-1] = keys[1:] != keys[:-1]
+    keys, levels = keys[last], levels[last]
+    order = np.argsort(-levels, kind='stable')
+    first, second, levels = keys[order] // (count + 1), keys[order] % (count + 1), levels[order]
+
+    # the minimum spanning forest of the ranks of the saddles, from 1 as the zero weights are no edges.
+    graph = sparse.coo_matrix((np.arange(1, len(levels) + 1), (first, second)), shape=(count + 1, count + 1))
+    kept = np.sort(minimum_spanning_tree(graph.tocsr()).tocoo().data).astype(np.intp) - 1
+    return first[kept], second[kept], levels[kept]
+
+
+def find(parents, node):
+    """
+    Finds the root of the set of a node in a union-find forest, and points the nodes on the way straight at it.
+    :param parents: The parent of every node, a root is its own parent.
+    :param node: The node.
+    :return: The root.
+    """
+    root = node
+    while parents[root] != root:
+        root = parents[root]
+    while parents[node] != root:
+        parents[node], node = root, parents[node]
+    return root
+
+
+def merge(pairs, owner, ranks, base):
+    """
+    Floods the graph of the basins from the basins of the markers. The pairs of neighbouring basins are joined from the
+    highest saddle down: a basin without a marker joins the segment it is first connected to, like the cells of a flood
+    from the markers, and two segments with a marker stay apart. Alongside, every basin is joined with all basins it is
+    connected to above the saddle, which gives the saddle where the peak of a marker first meets a higher one.
+    :param pairs: The two basins and the saddle of every pair of neighbouring basins, highest saddle first.
+    :param owner: The marker of every basin by label, 0 where there is none.
+    :param ranks: The rank of the peak of every marker by label, a higher peak has a higher rank, and -1 for label 0.
+    :param base: The saddle of the peaks that meet no higher one.
+    :return: The marker of the segment of every basin, 0 where no marker reaches it, and the saddle of every marker to
+    a higher peak by label.
+    """
+    owner, ranks = owner.tolist(), ranks.tolist()
+    segments, components = list(range(len(owner))), list(range(len(owner)))
+    # the marker of every segment and the highest marker of every component, at their roots.
+    tops = list(owner)
+    saddles = [base] * len(ranks)
+    for a, b, saddle in zip(*(pair.tolist() for pair in pairs)):
+        first, second = find(segments, a), find(segments, b)
+        if first != second and not (owner[first] and owner[second]):
+            if owner[first]:
+                segments[second] = first
+            else:
+                segments[first] = second
+        first, second = find(components, a), find(components, b)
+        if first != second:
+            if ranks[tops[first]] < ranks[tops[second]]:
+                first, second = second, first
+            if tops[second]:
+                saddles[tops[second]] = saddle
+            components[second] = first
+    return np.array([owner[find(segments, node)] for node in range(len(owner))], dtype=np.intp), np.array(saddles)
+
+
+class Peak:
+
+    def __init__(self, label, position, height, prominence, area, total, vertices):
+        """
+        A peak found by PeakDetection.
+        :param label: The label of its segment in the segmentation.
+        :param position: The (x, y) cell of its maximum.
+        :param height: The value at its maximum.
+        :param prominence: The height of its maximum above the highest saddle to a higher peak, or above the detection
+            threshold.
+        :param area: The number of cells of its segment.
+        :param total: The sum of the values of its segment.
+        :param vertices: The outline of its segment as a polygon of (x, y) vertices in data coordinates.
+        """
+        self.label = label
+        self.position = position
+        self.height = height
+        self.prominence = prominence
+        self.area = area
+        self.total = total
+        self.vertices = vertices
+
+
+class PeakDetection:
+
+    def __init__(self, data, prominence=5.0, threshold=3.0, footprint=3, min_area=4, tolerance=1.0):
+        """
+        Finds the peaks of 2D data and the area around each of them. The cells above a threshold are the mask; its local
+        maxima are the candidate peaks, and the mask is segmented around them by a watershed of the basins of its
+        maxima. Peaks that are not prominent enough, or whose segment is too small, are merged into a neighbouring
+        segment, or dropped if they have none, and the basins are merged again. The threshold and the prominence are in
+        units of the noise of the data, which is estimated robustly.
+        :param data: The 2D numpy array, the transformed data as shown.
+        :param prominence: The least prominence of a peak, in noise levels.
+        :param threshold: The level above the baseline the segments stand on, in noise levels.
+        :param footprint: The size of the neighbourhood a peak is the maximum of.
+        :param min_area: The least number of cells of a segment.
+        :param tolerance: The largest distance, in cells, the outline polygons deviate from the segment borders.
+        """
+        self.baseline, self.noise = noise_level(data)
+        """The median of the data, and the standard deviation of its noise"""
+        self.level = self.baseline + threshold * self.noise
+        """The level above which cells belong to a segment"""
+        values = np.asarray(data, dtype=np.float64)
+        if not all_finite(values):
+            values = np.where(np.isnan(values), -np.inf, values)
+        mask = values > self.level
+
+        # a peak below the level plus the prominence cannot be prominent enough.
+        candidates = np.flatnonzero(values >= self.level + prominence * self.noise)
+        maxima = np.zeros(values.shape, dtype=bool)
+        maxima.reshape(-1)[candidates[local_maxima(values, candidates, footprint)]] = True
+        # cells of a plateau are a single marker, the peaks are the markers and the first cell of a marker is its
+        # position.
+        markers, count = ndimage.label(maxima)
+        cells = np.flatnonzero(markers)
+        marker_of = markers.reshape(-1)[cells]
+        _, first = np.unique(marker_of, return_index=True)
+        cells = cells[first]
+
+        # the cells are only segmented once, into basins; the markers are merged on the graph of the basins.
+        basin, basin_count = basins(values, mask)
+        pairs = basin_pairs(values, basin, basin_count)
+        basin_areas = np.bincount(basin.reshape(-1), minlength=basin_count + 1)
+        basin_totals = np.bincount(basin.reshape(-1), weights=values.reshape(-1), minlength=basin_count + 1)
+        # a basin with cells of several markers goes to the highest one, the others climb to it and are not peaks.
+        owner = np.zeros(basin_count + 1, dtype=np.intp)
+        by_height = np.lexsort((-marker_of, values.reshape(-1)[cells[marker_of - 1]]))
+        owner[basin.reshape(-1)[np.flatnonzero(markers)][by_height]] = marker_of[by_height]
+
+        segment_of = np.zeros(basin_count + 1, dtype=np.intp)
+        heights = areas = totals = prominence_of = np.zeros(0)
+        while count:
+            heights = values.reshape(-1)[cells]
+            ranks = np.empty(count + 1, dtype=np.intp)
+            ranks[0] = -1
+            ranks[1 + np.lexsort((-np.arange(count), heights))] = np.arange(count)
+            segment_of, saddles = merge(pairs, owner, ranks, self.level)
+            areas = np.bincount(segment_of, weights=basin_areas, minlength=count + 1)[1:]
+            prominence_of = heights - saddles[1:]
+            # a marker without a basin of its own is not a peak, whatever the least area.
+            keep = (prominence_of >= prominence * self.noise) & (areas >= max(min_area, 1))
+            if keep.all():
+                totals = np.bincount(segment_of, weights=basin_totals, minlength=count + 1)[1:]
+                break
+            # the kept markers are renumbered in order, the dropped ones become 0.
+            renumber = np.concatenate(([0], np.cumsum(keep) * keep))
+            owner = renumber[owner]
+            cells = cells[keep]
+            count = len(cells)
+            segment_of = np.zeros(basin_count + 1, dtype=np.intp)
+        labels = segment_of[basin]
+
+        self.labels = labels
+        """The segment of every cell, by peak label, 0 outside the segments"""
+        self.peaks = []
+        """The Peaks, by label - 1"""
+        if count == 0:
+            return
+        positions = np.unravel_index(cells, values.shape)
+        for label, box in enumerate(ndimage.find_objects(labels), 1):
+            x0, y0 = box[0].start, box[1].start
+            outline = simplify(trace_outline(labels[box] == label), tolerance)
+            self.peaks.append(Peak(label, (int(positions[0][label - 1]), int(positions[1][label - 1])),
+                                   float(heights[label - 1]), float(prominence_of[label - 1]), int(areas[label - 1]),
+                                   float(totals[label - 1]), [(x + x0, y + y0) for x, y in outline]))
+
+
+def trace_outline(mask):
+    """
+    Traces the outer border of a region of cells, counterclockwise along the cell edges. Cell (i, j) spans
+    [i, i + 1) x [j, j + 1). Where two cells of the region only touch diagonally the border turns away from the other
+    cell, so only the part connected by edges to the first cell is traced.
+    :param mask: A 2D boolean array of the region.
+    :return: A list of the (x, y) corners of the border where it changes direction, relative to the mask.
+    """
+    padded = np.pad(mask, 1)
+    inner = padded[1:-1, 1:-1]
+    edges = {}
+    # the directed edges with the region on their left, from corner to corner.
+    for outside, (start_x, start_y), (end_x, end_y) in ((padded[:-2, 1:-1], (0, 1), (0, 0)),
+                                                        (padded[2:, 1:-1], (1, 0), (1, 1)),
+                                                        (padded[1:-1, :-2], (0, 0), (1, 0)),
+                                                        (padded[1:-1, 2:], (1, 1), (0, 1))):
+        x, y = np.nonzero(inner & ~outside)
+        for i, j in zip(x.tolist(), y.tolist()):
+            edges.setdefault((i + start_x, j + start_y), []).append((i + end_x, j + end_y))
+
+    # the lowest corner of the first column is a turn with a single edge leaving it.
+    first = min(edges)
+    corners = [first]
+    current = edges[first][0]
+    dx, dy = current[0] - first[0], current[1] - first[1]
+    while current != first:
+        following = edges[current]
+        x, y = current
+        if len(following) == 1:
+            next_corner = following[0]
+        else:
+            # a corner where the region touches itself diagonally, the sharpest left turn stays on the same cells.
+            next_corner = max(following, key=lambda corner: dx * (corner[1] - y) - dy * (corner[0] - x))
+        turn = (next_corner[0] - x, next_corner[1] - y)
+        if turn != (dx, dy):
+            corners.append(current)
+            dx, dy = turn
+        current = next_corner
+    return corners
+
+
+def simplify(points, tolerance):
+    """
+    Simplifies a closed polygon with the Douglas-Peucker algorithm.
+    :param points: A list of the (x, y) vertices.
+    :param tolerance: The largest distance of a dropped vertex to the simplified polygon.
+    :return: A list of the (x, y) vertices that are kept.
+    """
+    if len(points) <= 4 or tolerance <= 0:
+        return list(points)
+    # the ring is split at the vertex farthest from the first one, both halves are simplified as open lines.
+    x0, y0 = points[0]
+    far = max(range(len(points)), key=lambda i: (points[i][0] - x0) ** 2 + (points[i][1] - y0) ** 2)
+    ring = points + points[:1]
+    keep = {0, far}
+    stack = [(0, far), (far, len(points))]
+    while stack:
+        start, stop = stack.pop()
+        (ax, ay), (bx, by) = ring[start], ring[stop]
+        dx, dy = bx - ax, by - ay
+        length = math.hypot(dx, dy)
+        worst, middle = tolerance, None
+        for i in range(start + 1, stop):
+            distance = abs(dx * (ring[i][1] - ay) - dy * (ring[i][0] - ax)) / length
+            if distance > worst:
+                worst, middle = distance, i
+        if middle is not None:
+            keep.add(middle)
+            stack.extend(((start, middle), (middle, stop)))
+    return [points[i] for i in sorted(keep)]
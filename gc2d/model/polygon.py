@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+PARALLEL_THRESHOLD = 64
+""" Batches of at least this many polygons are recomputed on a thread pool. """
+
+
+def _ramp_integral(left, right, y_left, y_right, t):
+    """
+    Integrates max(y(x) - t, 0) over [left, right] for the line through (left, y_left) and (right, y_right).
+    :param left: The start of the interval, broadcastable against the other parameters.
+    :param right: The end of the interval.
+    :param y_left: The height of the line at the start of the interval.
+    :param y_right: The height of the line at the end of the interval.
+    :param t: The threshold.
+    :return: The integral, broadcast over the parameters.
+    """
+    length = right - left
+    high = np.maximum(y_left, y_right)
+    low = np.minimum(y_left, y_right)
+    above = length * ((y_left + y_right) / 2 - t)
+    spread = np.where(high > low, high - low, 1)
+    crossing = length * np.clip(high - t, 0, None) ** 2 / (2 * spread)
+    return np.where(t <= low, above, np.where(t >= high, 0, crossing))
+
+
+def coverage(vertices, shape):
+    """
+    Rasterizes a polygon into the exact fraction of every cell it covers. Cell (i, j) spans [i, i + 1) x [j, j + 1) in
+    data coordinates. Only the bounding box of the polygon, clipped to the data, is rasterized.
+
+    The covered area of a cell is the sum, over the edges, of the signed integral of the edge height clamped to the
+    row of the cell, over the part of the edge within the column of the cell.
+    :param vertices: A sequence of (x, y) vertices of the closed polygon in data coordinates.
+    :param shape: The shape of the data.
+    :return: The (x, y) cell index of the top left of the rasterized box and a 2D array with the covered fractions.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape((-1, 2))
+    x0 = min(max(int(np.floor(vertices[:, 0].min())), 0), shape[0])
+    x1 = min(max(int(np.ceil(vertices[:, 0].max())), x0), shape[0])
+    y0 = min(max(int(np.floor(vertices[:, 1].min())), 0), shape[1])
+    y1 = min(max(int(np.ceil(vertices[:, 1].max())), y0), shape[1])
+    if x0 == x1 or y0 == y1 or len(vertices) < 3:
+        return (x0, y0), np.zeros((x1 - x0, y1 - y0))
+
+    columns = np.arange(x0, x1, dtype=np.float64)[:, np.newaxis]
+    rows = np.arange(y0, y1 + 1, dtype=np.float64)[np.newaxis, :]
+    integral = np.zeros((x1 - x0, y1 - y0 + 1))
+    for (xa, ya), (xb, yb) in zip(vertices, np.roll(vertices, -1, axis=0)):
+        if xa == xb:
+            continue
+        sign = 1 if xb > xa else -1
+        (left_x, left_y), (right_x, right_y) = sorted(((xa, ya), (xb, yb)))
+        left = np.clip(columns, left_x, right_x)
+        right = np.clip(columns + 1, left_x, right_x)
+        slope = (right_y - left_y) / (right_x - left_x)
+        integral += sign * _ramp_integral(left, right, left_y + slope * (left - left_x),
+                                          left_y + slope * (right - left_x), rows)
+
+    # the area between two row boundaries is the difference of the ramps, the orientation sets the overall sign.
+    covered = integral[:, :-1] - integral[:, 1:]
+    if covered.sum() < 0:
+        covered = -covered
+    return (x0, y0), np.clip(covered, 0, 1)
+
+
+class PolygonStatistics:
+
+    def __init__(self, data, vertices, covered=None):
+        """
+        The integration statistics of a polygon over a chromatogram, computed from the exact cell coverage of the
+        polygon. Cells on the edge count for the fraction they are covered. Pure numpy, so it runs without a GUI.
+        :param data: The 2D numpy array with the chromatogram data.
+        :param vertices: A sequence of (x, y) vertices of the closed polygon in data coordinates.
+        :param covered: The result of coverage for these vertices and the shape of the data, if already known.
+        """
+        self.vertices = vertices
+        """ The vertices of the polygon """
+        self.shape = data.shape
+        """ The shape of the data the coverage was computed for """
+        self.pos, self.weights = coverage(vertices, data.shape) if covered is None else covered
+        """ The cell index of the top left of the box, and the covered fraction of each cell in it """
+        x, y = self.pos
+        region = data[x:x + self.weights.shape[0], y:y + self.weights.shape[1]]
+        self.values = self.weights * region
+        """ The data in the box, weighted by coverage """
+        self.area = float(self.weights.sum(dtype=np.float64))
+        """ The covered area in cells """
+        self.sum = float(self.values.sum(dtype=np.float64))
+        """ The coverage weighted sum of the data """
+        self.mean = self.sum / self.area if self.area > 0 else 0.0
+        """ The coverage weighted mean of the data """
+
+        self.peak = 0.0
+        """ The highest value in a covered cell """
+        self.peak_position = None
+        """ The cell index of the peak """
+        inside = self.weights > 0
+        if inside.any():
+            masked = np.where(inside, region, -np.inf)
+            peak_x, peak_y = np.unravel_index(np.argmax(masked), masked.shape)
+            self.peak = float(region[peak_x, peak_y])
+            self.peak_position = (x + int(peak_x), y + int(peak_y))
+
+    def recompute(self, data):
+        """
+        Computes the statistics of the same polygon over other data, such as the data after a new transform. The
+        coverage only depends on the geometry, so it is reused when the shape of the data did not change.
+        :param data: The 2D numpy array with the chromatogram data.
+        :return: The new PolygonStatistics
+        """
+        return PolygonStatistics(data, self.vertices, (self.pos, self.weights) if data.shape == self.shape else None)
+
+
+def recompute_all(data, statistics, workers=None):
+    """
+    Recomputes a batch of polygon statistics over new data. Large batches are spread over a thread pool, the numpy
+    reductions release the GIL.
+    :param data: The 2D numpy array with the chromatogram data.
+    :param statistics: A list of PolygonStatistics.
+    :param workers: The number of threads to use, by default the number of processors.
+    :return: A list with the new PolygonStatistics, in the same order.
+    """
+    if len(statistics) < PARALLEL_THRESHOLD:
+        return [polygon.recompute(data) for polygon in statistics]
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(lambda polygon: polygon.recompute(data), statistics))
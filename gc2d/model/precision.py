@@ -0,0 +1,38 @@
+from enum import Enum
+
+import numpy as np
+
+
+class Precision(Enum):
+    """
+    The storage precision of a chromatogram, as the dtype of the raw data and the dtype of the data derived from it,
+    like transformed data. Sums over the data are accumulated in float64 whatever the precision.
+    """
+    FLOAT64 = ('float64', 'float64')
+    FLOAT32 = ('float32', 'float32')
+    INT32 = ('int32', 'float32')
+
+    def get_raw_dtype(self):
+        """
+        :return: The dtype of the raw data.
+        """
+        return np.dtype(self.value[0])
+
+    def get_derived_dtype(self):
+        """
+        :return: The dtype of data derived from the raw data.
+        """
+        return np.dtype(self.value[1])
+
+    @staticmethod
+    def for_dtype(dtype):
+        """
+        :param dtype: The dtype of raw data.
+        :return: The precision that stores raw data of this dtype without losing precision.
+        """
+        dtype = np.dtype(dtype)
+        if dtype == np.float32 or dtype == np.float16:
+            return Precision.FLOAT32
+        if np.issubdtype(dtype, np.integer) and dtype.itemsize <= 4 and np.can_cast(dtype, np.int32):
+            return Precision.INT32
+        return Precision.FLOAT64
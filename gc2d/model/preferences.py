@@ -1,8 +1,7 @@
 from enum import Enum, auto
 
-from PyQt5.Qt import QColor, QPen
-
 from gc2d.model.palette import palette
+from gc2d.model.precision import Precision
 from gc2d.model.time_unit import TimeUnit
 from gc2d.model.transformations import Transform
 
@@ -14,6 +13,7 @@ class PreferenceEnum(Enum):
     PALETTE = auto()
     LOWER_BOUND = auto()
     UPPER_BOUND = auto()
+    PRECISION = auto()
 
 
 class PenEnum(Enum):
@@ -53,6 +53,7 @@ class Preferences:
         # bounds are written when a model is loaded
         self.lower_bound = None
         self.upper_bound = None
+        self.precision = Precision.FLOAT64
 
         self.getter_map = {
             PreferenceEnum.SAVE_FILE: self.get_save_file,
@@ -62,7 +63,8 @@ class Preferences:
             ScaleEnum.Y_UNIT_1D: self.get_y_unit_1d,
             ScaleEnum.X_PERIOD: self.get_x_period,
             ScaleEnum.Y_PERIOD: self.get_y_period,
-            PreferenceEnum.PALETTE: self.get_palette
+            PreferenceEnum.PALETTE: self.get_palette,
+            PreferenceEnum.PRECISION: self.get_precision
         }
         self.setter_map = {
             PreferenceEnum.SAVE_FILE: self.set_save_file,
@@ -75,7 +77,8 @@ class Preferences:
             PreferenceEnum.TRANSFORM: self.set_transform,
             PreferenceEnum.PALETTE: self.set_palette,
             PreferenceEnum.LOWER_BOUND: self.set_lower_bound,
-            PreferenceEnum.UPPER_BOUND: self.set_upper_bound
+            PreferenceEnum.UPPER_BOUND: self.set_upper_bound,
+            PreferenceEnum.PRECISION: self.set_precision
         }
         self.set_defaults()
 
@@ -90,13 +93,14 @@ class Preferences:
         state = {}
         state["PEN"] = {enum.name: self.pen[enum] for enum in PenEnum}
         state["TRANSFORM"] = self.transform.to_json()
-        state["PALETTE"] = {"Colors": self.palette.getColors().tolist(), "Name": self.palette.name}
+        state["PALETTE"] = {"Colors": self.palette.get_colors().tolist(), "Name": self.palette.name}
         state["AXES"] = {enum.name: self.get(enum) for enum in ScaleEnum if
                          enum not in {ScaleEnum.X_UNIT, ScaleEnum.Y_UNIT}}
         state["AXES"]["X_UNIT"] = self.get_x_unit().name
         state["AXES"]["Y_UNIT"] = self.get_y_unit().name
         state["UPPER_BOUND"] = self.upper_bound
         state["LOWER_BOUND"] = self.lower_bound
+        state["PRECISION"] = self.precision.name
         return state
 
     def get(self, which):
@@ -124,12 +128,8 @@ class Preferences:
         self.save_file = path
 
     def get_pen(self):
-        """ constructs and returns the set pen  """
-        pen = QPen()
-        pen.setWidth(self.pen[PenEnum.WIDTH])
-        pen.setColor(QColor(self.pen[PenEnum.COLOR]))
-        pen.setStyle(self.pen[PenEnum.STYLE])
-        return pen
+        """ returns a copy of the pen dictionary of the form {PenEnum.(spec) : value}, the view constructs the pen """
+        return dict(self.pen)
 
     def set_pen(self, pen_dict):
         """ 
@@ -224,3 +224,17 @@ class Preferences:
 
     def set_upper_bound(self, upper_bound):
         self.upper_bound = upper_bound
+
+    def get_precision(self):
+        """
+        :return: the Precision that imported chromatograms are stored in
+        """
+        return self.precision
+
+    def set_precision(self, precision):
+        """
+        Sets the precision that imported chromatograms are stored in
+        :param precision: a Precision
+        :return: None
+        """
+        self.precision = precision
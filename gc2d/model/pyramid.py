@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+
+from gc2d.model.store import allocate, row_blocks
+
+MIN_LEVEL_SIZE = 64
+""" No coarser levels are built once both dimensions of a level are at most this size. """
+
+
+def _max_pool_rows(data):
+    """
+    Halves the first dimension of a 2D array by taking the maximum of every pair of rows.
+    :param data: The 2D numpy array to pool.
+    :return: The pooled array.
+    """
+    even = data.shape[0] - data.shape[0] % 2
+    pooled = np.empty(((data.shape[0] + 1) // 2, data.shape[1]), dtype=data.dtype)
+    np.maximum(data[0:even:2], data[1:even:2], out=pooled[:even // 2])
+    if even != data.shape[0]:
+        pooled[-1] = data[-1]
+    return pooled
+
+
+def max_pool(data):
+    """
+    Halves both dimensions of a 2D array by taking the maximum of every 2x2 block, so narrow peaks survive. An odd
+    last row or column is pooled on its own. The array is pooled chunk by chunk, the result of disk-backed data is
+    disk-backed too when it is large.
+    :param data: The 2D numpy array to pool.
+    :return: The pooled array.
+    """
+    pooled = allocate(((data.shape[0] + 1) // 2, (data.shape[1] + 1) // 2), data.dtype, like=data)
+    for start, stop in row_blocks(data, multiple=2):
+        pooled[start // 2:(stop + 1) // 2] = _max_pool_rows(_max_pool_rows(data[start:stop]).T).T
+    return pooled
+
+
+class Pyramid:
+
+    def __init__(self, data):
+        """
+        A multi-resolution pyramid of a chromatogram. Level 0 is the data itself, every next level is max-pooled by a
+        factor two in both dimensions. The levels together take a third of the memory of the data, they are
+        disk-backed when the data is disk-backed and they are large.
+        :param data: The 2D numpy array with the chromatogram data.
+        """
+        self.levels = [data]
+        while max(self.levels[-1].shape) > MIN_LEVEL_SIZE and min(self.levels[-1].shape) > 1:
+            self.levels.append(max_pool(self.levels[-1]))
+
+    def get_shape(self):
+        """
+        :return: The shape of the full resolution data.
+        """
+        return self.levels[0].shape
+
+    def level_for(self, cells_per_pixel):
+        """
+        Picks the coarsest level that still has at least one cell per screen pixel.
+        :param cells_per_pixel: The number of full resolution cells that are drawn on one screen pixel.
+        :return: The index of the level.
+        """
+        if cells_per_pixel <= 1 or not math.isfinite(cells_per_pixel):
+            return 0
+        return min(int(math.log2(cells_per_pixel)), len(self.levels) - 1)
+
+    def level_for_size(self, cells, size):
+        """
+        Picks the finest level at which a number of full resolution cells fits in a budget.
+        :param cells: The number of full resolution cells along the longest side of a region.
+        :param size: The maximum number of level cells along that side.
+        :return: The index of the level.
+        """
+        if cells <= size:
+            return 0
+        return min(int(math.ceil(math.log2(cells / size))), len(self.levels) - 1)
+
+    def region(self, level, x_range, y_range):
+        """
+        Crops a level to a region given in full resolution coordinates. The crop is a view, no data is copied.
+        :param level: The index of the level to crop.
+        :param x_range: The (start, stop) of the region along the first dimension.
+        :param y_range: The (start, stop) of the region along the second dimension.
+        :return: The cropped level and the (x, y, width, height) it covers in full resolution coordinates.
+        """
+        data = self.levels[level]
+        scale = 2 ** level
+        x0 = min(max(int(x_range[0] // scale), 0), data.shape[0])
+        x1 = min(max(int(-(-x_range[1] // scale)), x0), data.shape[0])
+        y0 = min(max(int(y_range[0] // scale), 0), data.shape[1])
+        y1 = min(max(int(-(-y_range[1] // scale)), y0), data.shape[1])
+        return data[x0:x1, y0:y1], (x0 * scale, y0 * scale, (x1 - x0) * scale, (y1 - y0) * scale)
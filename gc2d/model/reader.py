@@ -0,0 +1,150 @@
+import numpy as np
+
+from gc2d.model.store import SPILL_BYTES, allocate
+
+CHUNK_SIZE = 1 << 22
+""" The number of bytes parsed at a time. """
+
+
+def count_rows(file_name, chunk_size=CHUNK_SIZE):
+    """
+    Counts the lines in a file without decoding it, used to preallocate the chromatogram buffer.
+    :param file_name: The name of the file to count the lines of.
+    :param chunk_size: The number of bytes read at a time.
+    :return: The number of lines, including a last line without a line break.
+    """
+    rows = 0
+    last = b'\n'
+    with open(file_name, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            rows += chunk.count(b'\n')
+            last = chunk[-1:]
+    if last != b'\n':
+        rows += 1
+    return rows
+
+
+def _ragged_line(chunk, columns):
+    """
+    Finds the first line of a block of complete lines that does not have as many fields as the first line of the
+    file. Every line has one separator per column, whether it ends with a trailing comma or not; blank lines are
+    skipped.
+    :param chunk: The bytes of the block.
+    :param columns: The number of columns of the file.
+    :return: The index of the line in the block, or None if every line has the number of columns.
+    """
+    raw = np.frombuffer(chunk, dtype=np.uint8)
+    ends = np.flatnonzero(raw == ord('\n'))
+    if len(raw) and raw[-1] != ord('\n'):
+        # the last line of the file may not end with a line break.
+        ends = np.append(ends, len(raw))
+    separators = np.diff(np.searchsorted(np.flatnonzero(raw == ord(',')), ends), prepend=0)
+    for index in np.flatnonzero(separators != columns):
+        start = ends[index - 1] + 1 if index else 0
+        if separators[index] or chunk[start:ends[index]].strip():
+            return int(index)
+    return None
+
+
+def _parse_chunk(chunk, dtype):
+    """
+    Parses a block of complete comma separated lines. A trailing comma at the end of the block is stripped, the
+    trailing commas at the end of the other lines are simply treated as separators.
+    :param chunk: The bytes to parse.
+    :param dtype: The dtype to parse the values as. Integer values are parsed as floating point, the acquisition
+        software writes counts like 15280.0.
+    :return: A flat numpy array with the values of the block.
+    :raises ValueError: If integer values do not fit the dtype or have a fractional part.
+    """
+    text = chunk.decode('ascii').rstrip()
+    if text.endswith(','):
+        text = text[:-1]
+    if not text:
+        return np.empty(0, dtype=dtype)
+    if np.issubdtype(dtype, np.integer):
+        values = np.fromstring(text, dtype=np.float64, sep=',')
+        limits = np.iinfo(dtype)
+        if values.size and not (limits.min <= values.min() and values.max() <= limits.max):
+            # NaN fails the comparison too, it has no integer value either.
+            raise ValueError("the data has values outside the range of {} ({} to {}), read it with a floating point "
+                             "precision like FLOAT32 or FLOAT64 instead".format(np.dtype(dtype).name, limits.min,
+                                                                                limits.max))
+        fractional = values != np.trunc(values)
+        if fractional.any():
+            raise ValueError("the data has values that are not whole numbers like {!r}, read it with a floating point "
+                             "precision like FLOAT32 or FLOAT64 instead".format(float(values[fractional][0])))
+        return values.astype(dtype)
+    return np.fromstring(text, dtype=dtype, sep=',')
+
+
+def read_csv(file_name, dtype=np.float64, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Reads a chromatogram from a comma separated text file, one first dimension slice per line. Like the files written
+    by the acquisition software, every line is expected to end with a trailing comma; the last column of each line is
+    omitted.
+
+    The file is parsed in blocks of whole lines straight into a preallocated array, so peak memory is the size of
+    the result plus one block. Large results are disk-backed.
+    :param file_name: The name of the chromatogram file to read.
+    :param dtype: The dtype of the returned array.
+    :param chunk_size: The number of bytes parsed at a time.
+    :param progress: An optional callback that is called with the fraction of the file that has been read.
+    :return: A 2D numpy array containing the chromatogram.
+    """
+    with open(file_name, 'rb') as file:
+        first_line = file.readline()
+        file.seek(0, 2)
+        size = file.tell()
+
+    fields = first_line.decode('ascii').rstrip().split(',')
+    trailing_comma = fields[-1].strip() == ''
+    width = len(fields)
+    columns = width - 1
+    if columns < 1:
+        raise ValueError("'{}' does not contain chromatogram data".format(file_name))
+
+    rows = count_rows(file_name, chunk_size)
+    # chromatograms larger than SPILL_BYTES are read into a temporary file rather than into memory.
+    data = allocate((rows, columns), dtype, disk_backed=rows * columns * np.dtype(dtype).itemsize >= SPILL_BYTES)
+    flat = data.reshape(-1)
+    row = 0
+    line = 0
+    read = 0
+    remainder = b''
+    with open(file_name, 'rb') as file:
+        eof = False
+        while not eof:
+            chunk = file.read(chunk_size)
+            read += len(chunk)
+            eof = not chunk
+            if eof:
+                chunk, remainder = remainder, b''
+            else:
+                chunk = remainder + chunk
+                end = chunk.rfind(b'\n') + 1
+                chunk, remainder = chunk[:end], chunk[end:]
+
+            ragged = _ragged_line(chunk, columns)
+            if ragged is not None:
+                raise ValueError("line {} of '{}' does not have {} columns like the first line".format(
+                    line + ragged + 1, file_name, columns))
+            line += chunk.count(b'\n')
+
+            values = _parse_chunk(chunk, dtype)
+            if trailing_comma:
+                if len(values) % columns != 0:
+                    raise ValueError("inconsistent number of columns in '{}' after line {}".format(file_name, row))
+                flat[row * columns:row * columns + len(values)] = values
+                row += len(values) // columns
+            else:
+                if len(values) % width != 0:
+                    raise ValueError("inconsistent number of columns in '{}' after line {}".format(file_name, row))
+                values = values.reshape((-1, width))
+                data[row:row + len(values)] = values[:, :-1]
+                row += len(values)
+
+            if progress is not None:
+                progress(read / size if size else 1.0)
+
+    # blank trailing lines were counted but hold no data, the slice is a view and does not copy.
+    return data[:row]
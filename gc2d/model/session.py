@@ -0,0 +1,255 @@
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from gc2d.model.alignment import Aligner
+from gc2d.model.gcgc_file import must_release, read_gcgc
+from gc2d.model.polygon import PolygonStatistics
+from gc2d.model.precision import Precision
+from gc2d.model.reader import read_csv
+from gc2d.model.store import is_disk_backed
+from gc2d.model.transformations import Transform, run_tiled, transform_from_json
+
+CACHE_BYTES = 1 << 30
+""" The memory the data of the runs of a session may take, that of the least recently used run is dropped first. """
+
+
+class Run:
+
+    def __init__(self, file_name, precision=Precision.FLOAT64):
+        """
+        A chromatogram of a session, other than the open model, that the integrations are evaluated against. The data
+        is only read when it is first used; the chromatogram of a binary gcgc file is memory mapped, so it costs no
+        memory until it is read. The chromatogram of a CSV file and the transformed data are kept, the latter for the
+        transform it was computed with, until the session drops them to stay within its memory budget.
+        :param file_name: The name of a chromatogram CSV file, or of a gcgc file that includes the chromatogram.
+        :param precision: The Precision to read a CSV file in.
+        """
+        self.file_name = file_name
+        """The file the chromatogram is read from"""
+        self.name = os.path.splitext(os.path.basename(file_name))[0]
+        """The name of the run, as shown"""
+        self.precision = precision
+        """The storage precision of a CSV file, a gcgc file keeps its own"""
+        self.__data = None
+        """The raw chromatogram, once read"""
+        self.__transform_state = None
+        """The json of the transform the transformed data was computed with"""
+        self.__transformed = None
+        """The transformed data"""
+        self.__warp_key = None
+        """The aligner and the json of the transform the warp was estimated with"""
+        self.__warp = None
+        """The Warp from the positions in the open model to the positions in the run"""
+
+    def load(self):
+        """
+        Reads the chromatogram, unless it has been read already.
+        :return: The raw chromatogram data.
+        """
+        if self.__data is None:
+            if os.path.splitext(self.file_name)[1].lower() == '.gcgc':
+                loaded = read_gcgc(self.file_name)
+                if "model" not in loaded:
+                    raise ValueError("'{}' holds no chromatogram".format(self.file_name))
+                self.__data = loaded["model"]
+            else:
+                self.__data = read_csv(self.file_name, dtype=self.precision.get_raw_dtype())
+        return self.__data
+
+    def release_file(self, file_name):
+        """
+        Forgets the raw chromatogram if it is memory mapped from a file that can not be replaced while it is, so the
+        file can be replaced. It is read again when it is next used.
+        :param file_name: The name of the file.
+        :return: None
+        """
+        if must_release(self.__data, file_name):
+            self.__data = None
+
+    def get_raw_data(self):
+        """
+        :return: The raw chromatogram data, read on first use.
+        """
+        return self.load()
+
+    def get_cached_bytes(self):
+        """
+        :return: The memory the raw and the transformed data take, disk-backed data does not count.
+        """
+        data, transformed = self.__data, self.__transformed
+        total = 0
+        if data is not None and not is_disk_backed(data):
+            total += data.nbytes
+        if transformed is not None and transformed is not data and not is_disk_backed(transformed):
+            total += transformed.nbytes
+        return total
+
+    def release_data(self):
+        """
+        Forgets the transformed data, and the raw chromatogram unless it is only memory mapped. Both are read and
+        computed again when they are next used. The warp is kept.
+        :return: None
+        """
+        self.__transformed = None
+        self.__transform_state = None
+        if not is_disk_backed(self.__data):
+            self.__data = None
+
+    def get_shown_data(self, transform=None, workers=None):
+        """
+        Transforms the chromatogram like the open model shows its own. The transform is rebuilt from its json, so the
+        run never shares the stage cache of the pipeline of the model. The result is kept until another transform is
+        asked for.
+        :param transform: The transform the open model shows its data with, or None if it shows the raw data.
+        :param workers: The number of threads to transform with, by default the number of processors.
+        :return: The shown 2D numpy array.
+        """
+        data = self.load()
+        if transform is None or type(transform) is Transform:
+            return data
+        state = transform.to_json()
+        if state != self.__transform_state:
+            self.__transformed = None
+            self.__transformed = run_tiled(transform_from_json(state), data, workers=workers,
+                                           dtype=Precision.for_dtype(data.dtype).get_derived_dtype())
+            self.__transform_state = state
+        return self.__transformed
+
+    def get_warp(self, aligner, transform=None, workers=None):
+        """
+        Estimates the retention time drift of the run against the open model. The warp is kept until another aligner or
+        transform is asked for.
+        :param aligner: The Aligner of the shown data of the open model.
+        :param transform: The transform the open model shows its data with, or None if it shows the raw data.
+        :param workers: The number of threads to transform with, by default the number of processors.
+        :return: The Warp from the positions in the open model to the positions in the run.
+        """
+        key = (aligner, None if transform is None else transform.to_json())
+        if key != self.__warp_key:
+            self.__warp = aligner.align(self.get_shown_data(transform, workers))
+            self.__warp_key = key
+        return self.__warp
+
+    def is_aligned(self):
+        """
+        :return: Whether the last warp estimated for the run found its drift, True if none has been estimated.
+        """
+        return self.__warp is None or self.__warp.aligned
+
+
+class Session:
+
+    def __init__(self):
+        """
+        The runs that are compared with the open model. They stay loaded when another model is opened, so replicate
+        runs are compared with one shared set of integrations without opening them one by one.
+        """
+        self.runs = []
+        """The runs, in the order they were added"""
+        self.align = False
+        """Whether the polygons are moved along with the retention time drift of every run"""
+        self.cache_bytes = CACHE_BYTES
+        """The memory the data of the runs may take"""
+        self.__used = []
+        """The runs that keep data in memory, least recently used first"""
+        self.__lock = threading.Lock()
+        """Guards the used runs, the runs are evaluated in parallel"""
+        self.__reference = None
+        """A weak reference to the data the aligner was made for"""
+        self.__reference_state = None
+        """The json of the transform of the data the aligner was made for"""
+        self.__aligner = None
+        """The Aligner of the shown data of the open model"""
+
+    def add_run(self, run):
+        """
+        :param run: The Run to add, its data counts as the most recently used.
+        :return: None
+        """
+        self.runs.append(run)
+        self.keep_data(run)
+
+    def remove_run(self, run):
+        """
+        :param run: The Run to remove.
+        :return: None
+        """
+        self.runs.remove(run)
+        with self.__lock:
+            if run in self.__used:
+                self.__used.remove(run)
+
+    def release_file(self, file_name):
+        """
+        Forgets the chromatograms of the runs that are memory mapped from a file, so the file can be replaced.
+        :param file_name: The name of the file.
+        :return: None
+        """
+        for run in self.runs:
+            run.release_file(file_name)
+
+    def get_aligner(self, reference, transform=None):
+        """
+        :param reference: The shown data of the open model.
+        :param transform: The transform the open model shows its data with, or None if it shows the raw data.
+        :return: The Aligner of the data, made once for every shown data. The model writes another transform in the
+            same array, so the aligner is made again when the transform changes.
+        """
+        state = None if transform is None else transform.to_json()
+        if self.__reference is None or self.__reference() is not reference or state != self.__reference_state:
+            self.__aligner = Aligner(reference)
+            self.__reference = weakref.ref(reference)
+            self.__reference_state = state
+        return self.__aligner
+
+    def keep_data(self, run):
+        """
+        Marks the data of a run as the most recently used, and drops that of the least recently used runs while they
+        take more memory than the budget. The data of the run itself is kept even if it exceeds the budget.
+        :param run: The Run that was just evaluated.
+        :return: None
+        """
+        with self.__lock:
+            if run in self.__used:
+                self.__used.remove(run)
+            self.__used.append(run)
+            total = sum(used.get_cached_bytes() for used in self.__used)
+            while total > self.cache_bytes and len(self.__used) > 1:
+                least = self.__used.pop(0)
+                total -= least.get_cached_bytes()
+                least.release_data()
+
+    def evaluate(self, statistics, transform=None, runs=None, workers=None, reference=None):
+        """
+        Computes the statistics of polygons over every run, in parallel over the runs. The coverage of a polygon is
+        reused for the runs with the shape of the data it was computed for. When the session aligns the runs, the
+        polygons are moved along with the drift of every run against the reference first. The raw and transformed data
+        of the runs is kept within the memory budget of the session.
+        :param statistics: A list of PolygonStatistics of the polygons, as computed over the open model.
+        :param transform: The transform the open model shows its data with, or None if it shows the raw data.
+        :param runs: The runs to evaluate, by default all runs of the session.
+        :param workers: The number of threads to use, by default the number of processors.
+        :param reference: The shown data of the open model, the runs are only aligned when it is given.
+        :return: A list with, for every run, a list of the new PolygonStatistics in the order of statistics.
+        """
+        runs = self.runs if runs is None else runs
+        aligner = self.get_aligner(reference, transform) if self.align and reference is not None else None
+
+        def evaluate_run(run, run_workers=1):
+            data = run.get_shown_data(transform, run_workers)
+            if aligner is None:
+                result = [polygon.recompute(data) for polygon in statistics]
+            else:
+                warp = run.get_warp(aligner, transform, run_workers)
+                result = [PolygonStatistics(data, warp.map_points(polygon.vertices)) for polygon in statistics]
+            self.keep_data(run)
+            return result
+
+        if len(runs) == 1:
+            # a single run is transformed on all threads instead.
+            return [evaluate_run(runs[0], workers)]
+
+        with ThreadPoolExecutor(workers) as pool:
+            return list(pool.map(evaluate_run, runs))
@@ -0,0 +1,88 @@
+import tempfile
+
+import numpy as np
+
+BLOCK_BYTES = 1 << 26
+""" The number of bytes of data that chunked operations read at a time. """
+SPILL_BYTES = 1 << 30
+""" Large arrays are kept in a temporary file rather than in memory from this size on. """
+
+
+def is_disk_backed(data):
+    """
+    :param data: A numpy array.
+    :return: Whether the array is memory mapped from a file, like the chromatogram of a binary gcgc file.
+    """
+    return isinstance(data, np.memmap)
+
+
+def allocate(shape, dtype, like=None, disk_backed=None):
+    """
+    Allocates an uninitialized array, in a temporary file when it is large and derived from disk-backed data, so data
+    larger than memory does not need memory for everything computed from it. The file is removed when the array is
+    collected.
+    :param shape: The shape of the array.
+    :param dtype: The dtype of the array.
+    :param like: The array the new array is derived from, if any.
+    :param disk_backed: Whether to back the array by a file, by default when like is disk-backed and the array is at
+        least SPILL_BYTES large.
+    :return: A numpy array or memmap.
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    if disk_backed is None:
+        disk_backed = like is not None and is_disk_backed(like) and nbytes >= SPILL_BYTES
+    if not disk_backed or nbytes == 0:
+        return np.empty(shape, dtype=dtype)
+    # the map keeps its own handle, the anonymous file is deleted once the map is closed.
+    with tempfile.TemporaryFile(prefix='gc2d-') as file:
+        return np.memmap(file, dtype=dtype, mode='w+', shape=shape)
+
+
+def row_blocks(data, block_bytes=BLOCK_BYTES, multiple=1):
+    """
+    Splits the rows of an array in blocks of about block_bytes, for operations that work chunk by chunk.
+    :param data: The 2D numpy array.
+    :param block_bytes: The number of bytes in a block.
+    :param multiple: The number of rows in every block but the last is a multiple of this.
+    :return: A list of (start, stop) row ranges.
+    """
+    row_bytes = max(data.shape[1] * data.dtype.itemsize, 1)
+    rows = max(block_bytes // row_bytes // multiple, 1) * multiple
+    return [(start, min(start + rows, data.shape[0])) for start in range(0, data.shape[0], rows)]
+
+
+def min_max(data):
+    """
+    Finds the lowest and highest value of an array in a single chunked pass.
+    :param data: The 2D numpy array.
+    :return: The lowest and highest value as floats.
+    """
+    if data.size == 0:
+        raise ValueError("zero-size array has no minimum or maximum")
+    lowest, highest = np.inf, -np.inf
+    for start, stop in row_blocks(data):
+        block = data[start:stop]
+        lowest = min(lowest, float(block.min()))
+        highest = max(highest, float(block.max()))
+    return lowest, highest
+
+
+def sum_rows(data):
+    """
+    Sums an array over its second dimension chunk by chunk, accumulating in float64.
+    :param data: The 2D numpy array.
+    :return: A 1D float64 array with the sum of every row.
+    """
+    sums = np.empty(data.shape[0], dtype=np.float64)
+    for start, stop in row_blocks(data):
+        np.sum(data[start:stop], axis=1, dtype=np.float64, out=sums[start:stop])
+    return sums
+
+
+def all_finite(data):
+    """
+    :param data: A 2D numpy array.
+    :return: Whether all values of the array are finite, checked chunk by chunk.
+    """
+    return all(np.isfinite(data[start:stop]).all() for start, stop in row_blocks(data))
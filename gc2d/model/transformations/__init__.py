@@ -4,7 +4,10 @@ from .convolution import Convolution
 from .dynamiccutoff import CutoffMode, DynamicCutoff
 from .gaussian import Gaussian
 from .min1d import Min1D
+from .pipeline import Pipeline
+from .preview import preview_transform
 from .staticcutoff import StaticCutoff
+from .tiled import run_tiled
 from .transform import Transform, TransformEnum
 
 
@@ -24,5 +27,8 @@ def transform_from_json(json_dict):
         return DynamicCutoff(json_dict["Data"], CutoffMode[json_dict["Mode"]])
     elif type == TransformEnum.CUSTOM.name:
         return Convolution(numpy.array(json_dict["Data"]))
+    elif type == TransformEnum.PIPELINE.name:
+        stages = [transform_from_json(stage) for stage in json_dict["Data"]]
+        return None if None in stages else Pipeline(stages)
     else:
         return None
@@ -1,18 +1,117 @@
+from enum import Enum, auto
+
+import numpy as np
 from scipy import ndimage
 
-from .transform import Transform, TransformEnum
+from gc2d.model.store import all_finite, is_disk_backed
+
+from .transform import Transform, TransformEnum, output_array
+
+LINE_MAX_LENGTH = 128
+""" Kernels of a single row or column up to this length are convolved as one 1D pass, longer ones by FFT. """
+DIRECT_MAX_AREA = 64
+""" Kernels up to this many elements are convolved directly, larger ones are separated or convolved by FFT. """
+SEPARABLE_MAX_LENGTH = 64
+""" Rank-1 kernels whose sides add up to at most this are convolved as two 1D passes, longer ones by FFT. """
+RANK_TOLERANCE = 1e-10
+""" Singular values below this fraction of the largest one are considered zero. """
+
+
+class ConvolutionStrategy(Enum):
+    DIRECT = auto()
+    LINE = auto()
+    SEPARABLE = auto()
+    FFT = auto()
+
+
+def separate(matrix):
+    """
+    Splits a rank-1 kernel into the two 1D kernels it is the outer product of.
+    :param matrix: The 2D kernel.
+    :return: The 1D kernels along the first and second dimension, or None if the kernel is not rank-1.
+    """
+    u, s, vt = np.linalg.svd(matrix)
+    if len(s) > 1 and s[1] > RANK_TOLERANCE * s[0]:
+        return None
+    scale = np.sqrt(s[0])
+    return u[:, 0] * scale, vt[0] * scale
 
 
 class Convolution(Transform):
 
     def __init__(self, matrix):
+        """
+        Convolves the data with a custom kernel, with the semantics of ndimage.convolve with mode='constant'. The
+        execution strategy is picked from the kernel: kernels of a single row or column are convolved as one 1D pass,
+        other small kernels directly, rank-1 kernels as two 1D passes and large kernels by overlap-add FFT convolution.
+        :param matrix: The 2D kernel.
+        """
         self.matrix = matrix
+        self.strategy = ConvolutionStrategy.DIRECT
+        self.separated = None
+        if matrix is not None and 1 in matrix.shape and matrix.size <= LINE_MAX_LENGTH:
+            self.strategy = ConvolutionStrategy.LINE
+        elif matrix is not None and matrix.size > DIRECT_MAX_AREA:
+            self.separated = separate(matrix)
+            if self.separated is not None and sum(matrix.shape) <= SEPARABLE_MAX_LENGTH:
+                self.strategy = ConvolutionStrategy.SEPARABLE
+            else:
+                self.strategy = ConvolutionStrategy.FFT
+
+    def strategy_for(self, data):
+        """
+        :param data: The 2D numpy array to convolve.
+        :return: The ConvolutionStrategy used for the data.
+        """
+        # FFT spreads non-finite values over the whole result, and the two pass and FFT paths only compute in floating
+        # point. A single 1D pass computes like the direct convolution.
+        if self.strategy in (ConvolutionStrategy.SEPARABLE, ConvolutionStrategy.FFT) and \
+                (not np.issubdtype(data.dtype, np.floating) or not all_finite(data)):
+            return ConvolutionStrategy.LINE if 1 in self.matrix.shape else ConvolutionStrategy.DIRECT
+        return self.strategy
+
+    def transform(self, data, out=None, dtype=None):
+        if self.matrix is None:
+            return data if out is None and dtype is None else super().transform(data, out, dtype)
+        strategy = self.strategy_for(data)
+        result = output_array(data, out, dtype)
+        if strategy is ConvolutionStrategy.LINE:
+            axis = 1 if self.matrix.shape[0] == 1 else 0
+            return ndimage.convolve1d(data, self.matrix.reshape(-1), axis=axis, mode='constant', output=result)
+        if strategy is ConvolutionStrategy.SEPARABLE:
+            first, second = self.separated
+            # the first pass is only rounded to the output when that is floating point too.
+            floating = np.issubdtype(result.dtype, np.floating)
+            first_pass = ndimage.convolve1d(data, first, axis=0, mode='constant', output=result if floating else None)
+            return ndimage.convolve1d(first_pass, second, axis=1, mode='constant', output=result)
+        if strategy is ConvolutionStrategy.FFT:
+            # scipy.signal is imported here as it takes longer to import than the rest of the model together.
+            from scipy import signal
+            # the full convolution, cropped to the origin ndimage uses: the kernel centre at index size // 2.
+            full = signal.oaconvolve(data, self.matrix, mode='full')
+            x, y = self.matrix.shape[0] // 2, self.matrix.shape[1] // 2
+            np.copyto(result, full[x:x + data.shape[0], y:y + data.shape[1]], casting='unsafe')
+            return result
+        return ndimage.convolve(data, weights=self.matrix, output=result, mode='constant')
+
+    def support(self, data):
+        if self.matrix is None:
+            return 0
+        # FFT results depend on the tile size in the last bits, so only disk-backed data, which cannot be transformed at
+        # once, is tiled. Tiles could also pick a different strategy than the whole data when it has non-finite values.
+        if self.strategy is ConvolutionStrategy.FFT and not is_disk_backed(data) or \
+                self.strategy_for(data) is not self.strategy:
+            return None
+        return self.matrix.shape[0] // 2
 
-    def transform(self, data):
-        if self.matrix is not None:
-            return ndimage.convolve(data, weights=self.matrix, mode='constant')
-        else:
-            return data
+    def for_proxy(self, steps):
+        if self.matrix is None:
+            return self
+        # samples the kernel at the step of the proxy around its centre, scaled to keep the total weight.
+        x, y = (self.matrix.shape[0] // 2) % steps[0], (self.matrix.shape[1] // 2) % steps[1]
+        sampled = self.matrix[x::steps[0], y::steps[1]]
+        total = sampled.sum()
+        return Convolution(sampled * (self.matrix.sum() / total if total != 0 else steps[0] * steps[1]))
 
     def to_json(self):
         return {
@@ -2,7 +2,10 @@ from enum import Enum
 
 import numpy as np
 
-from .transform import TransformEnum
+from .transform import TransformEnum, output_array
+
+BLOCK_CELLS = 1 << 16
+""" The number of cells in the scratch buffer the rows are partitioned in. """
 
 
 class CutoffMode(Enum):
@@ -16,19 +19,59 @@ class DynamicCutoff:
         self.quantile = percentile / 100
         self.mode = mode
 
-    def transform(self, data):
-        data = np.clip(data, 0, None)
-        quantiles = np.quantile(data, self.quantile, axis=1)
-        if self.mode == CutoffMode.MEAN:
-            quantiles = quantiles.reshape((len(quantiles), 1))
-            mask = data <= quantiles
-            averages = np.average(data, axis=1, weights=mask)
-            cutoffs = averages
-        elif self.mode == CutoffMode.QUANTILE:
-            cutoffs = quantiles
-        else:
-            raise ValueError("unknown cut-off mode '{}'".format(mode))
-        return np.clip((data.transpose() - cutoffs).transpose(), 0, None)
+    def transform(self, data, out=None, dtype=None):
+        """
+        Subtracts a cut-off from every row of the data, clipped at zero. The quantile of every row is found by
+        selection instead of sorting, a block of rows at a time in a small scratch buffer, and the result is computed
+        in place in a single output array. Like np.quantile, a row with a NaN gets a NaN cut-off, so it is NaN all over.
+        :param data: The 2D numpy array to transform.
+        :param out: A preallocated array with the shape of the data to write the result in, if any.
+        :param dtype: The dtype of the result when no out is given, by default that of floating point data.
+        :return: The transformed data.
+        """
+        if self.mode not in (CutoffMode.MEAN, CutoffMode.QUANTILE):
+            raise ValueError("unknown cut-off mode '{}'".format(self.mode))
+        result = output_array(data, out, dtype, data.dtype if np.issubdtype(data.dtype, np.floating) else np.float64)
+        np.maximum(data, 0, out=result, casting='unsafe')
+        if result.size == 0:
+            return result
+
+        # the interpolation of np.quantile with its default linear method, between the two neighbouring ranks.
+        index = self.quantile * (result.shape[1] - 1)
+        low = int(np.floor(index))
+        high = min(low + 1, result.shape[1] - 1)
+        gamma = index - low
+
+        rows = max(BLOCK_CELLS // result.shape[1], 1)
+        scratch = np.empty((min(rows, result.shape[0]), result.shape[1]), dtype=result.dtype)
+        cutoffs = np.empty(result.shape[0], dtype=np.float64)
+        for start in range(0, result.shape[0], rows):
+            block = scratch[:min(rows, result.shape[0] - start)]
+            block[...] = result[start:start + len(block)]
+            # the last rank is selected too: the partition sorts NaN last, and a row with a NaN has a NaN quantile.
+            block.partition(sorted({low, high, block.shape[1] - 1}), axis=1)
+            lower, upper = block[:, low], block[:, high]
+            difference = upper - lower
+            quantiles = upper - difference * (1 - gamma) if gamma >= 0.5 else lower + difference * gamma
+            if self.mode == CutoffMode.MEAN:
+                # the mean of all values up to the quantile, the partition leaves them anywhere in the row.
+                below = block <= quantiles[:, np.newaxis]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    quantiles = np.add.reduce(block, axis=1, dtype=np.float64, where=below) / below.sum(axis=1)
+            cutoffs[start:start + len(block)] = quantiles
+            if np.issubdtype(block.dtype, np.floating):
+                cutoffs[start:start + len(block)][np.isnan(block[:, -1])] = np.nan
+
+        np.subtract(result, cutoffs[:, np.newaxis], out=result, casting='unsafe')
+        return np.maximum(result, 0, out=result)
+
+    def support(self, data):
+        # the cut-off of a row only depends on the row itself.
+        return 0
+
+    def for_proxy(self, steps):
+        # the cut-offs are quantiles, they do not depend on the number of cells.
+        return self
 
     def to_json(self):
         return {"Type": TransformEnum.DYNAMIC.name, "Mode": self.mode.name, "Data": self.quantile * 100}
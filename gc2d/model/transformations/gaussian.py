@@ -1,15 +1,30 @@
 from scipy import ndimage
 
-from .transform import Transform, TransformEnum
+from .transform import Transform, TransformEnum, output_array
 
 
 class Gaussian(Transform):
 
     def __init__(self, sigma):
+        """
+        Convolves the data with a Gaussian kernel.
+        :param sigma: The standard deviation of the kernel in cells, either one for both dimensions or an (x, y) pair.
+        """
         self.sigma = sigma
+        """The standard deviation as given, which is what is saved"""
+        self.sigmas = tuple(sigma) if isinstance(sigma, (tuple, list)) else (sigma, sigma)
+        """The standard deviation along the first and the second dimension"""
 
-    def transform(self, data):
-        return ndimage.gaussian_filter(data, self.sigma, mode='constant')
+    def transform(self, data, out=None, dtype=None):
+        return ndimage.gaussian_filter(data, self.sigmas, output=output_array(data, out, dtype), mode='constant')
+
+    def support(self, data):
+        # tiles are rows of the first dimension, so only the radius along it counts. gaussian_filter truncates the
+        # kernel at 4 standard deviations by default.
+        return int(4.0 * self.sigmas[0] + 0.5)
+
+    def for_proxy(self, steps):
+        return Gaussian((self.sigmas[0] / steps[0], self.sigmas[1] / steps[1]))
 
     def to_json(self):
         return {"Type": TransformEnum.GAUSSIAN.name, "Data": self.sigma}
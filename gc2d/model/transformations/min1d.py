@@ -1,7 +1,7 @@
 import numpy as np
 from scipy import ndimage
 
-from .transform import Transform, TransformEnum
+from .transform import Transform, TransformEnum, output_array
 
 
 class Min1D(Transform):
@@ -9,10 +9,17 @@ class Min1D(Transform):
     def __init__(self, size):
         self.size = size
 
-    def transform(self, data):
-        filtered_1d = ndimage.minimum_filter(np.sum(a=data, axis=1), self.size) / data.shape[1]
-        mask_2d = np.tile(filtered_1d, (data.shape[1], 1)).transpose()
-        return data - mask_2d
+    def transform(self, data, out=None, dtype=None):
+        filtered_1d = ndimage.minimum_filter(np.sum(a=data, axis=1, dtype=np.float64), self.size) / data.shape[1]
+        result = output_array(data, out, dtype, np.result_type(data.dtype, filtered_1d.dtype))
+        # broadcasting the 1D baseline over the slices, instead of tiling it into a 2D mask.
+        return np.subtract(data, filtered_1d[:, np.newaxis], out=result, casting='unsafe')
+
+    def support(self, data):
+        return self.size // 2
+
+    def for_proxy(self, steps):
+        return Min1D(max(int(round(self.size / steps[0])), 1))
 
     def to_json(self):
         return {"Type": TransformEnum.MIN1D.name, "Data": self.size}
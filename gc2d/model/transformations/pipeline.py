@@ -0,0 +1,92 @@
+import json
+
+from gc2d.model.precision import Precision
+
+from .tiled import run_tiled
+from .transform import Transform, TransformEnum
+
+
+class Pipeline(Transform):
+
+    def __init__(self, stages):
+        """
+        Chains transforms, every stage transforms the output of the previous one. The output of each stage is cached
+        under its parameters and those of all stages before it, for the same input data. Transforming again after a
+        change, with take_cache, only recomputes from the first stage that changed onward.
+        The cached outputs are returned as is when no output array is passed to transform, so that result must not be
+        modified in place, except as the output array of the next transform, which drops the cache first. An input that
+        is rewritten in place in any other way needs invalidate.
+        :param stages: A list of transforms, applied in order.
+        """
+        self.stages = list(stages)
+        self.data = None
+        """The input data the cache was computed for."""
+        self.cache = []
+        """The (key, output) of the leading stages that have been computed, the key identifies the stage parameters."""
+
+    @staticmethod
+    def stage_key(stage):
+        """
+        :param stage: A transform.
+        :return: A key that is equal for transforms of the same type with the same parameters.
+        """
+        return json.dumps(stage.to_json(), sort_keys=True)
+
+    def take_cache(self, other):
+        """
+        Takes over the cached stage outputs of another pipeline, typically the one this pipeline replaces.
+        :param other: The previous Pipeline.
+        :return: None
+        """
+        self.data = other.data
+        self.cache = other.cache
+        other.data = None
+        other.cache = []
+
+    def invalidate(self):
+        """
+        Drops the cached stage outputs, for when the input data has been rewritten in place.
+        :return: None
+        """
+        self.data = None
+        self.cache = []
+
+    def transform(self, data, out=None, dtype=None):
+        if data is not self.data or out is data or any(out is output for _, output in self.cache):
+            # the cached outputs are of other data, or are about to be overwritten, like the buffer of the model that
+            # holds the previous output.
+            self.cache = []
+        # the input itself is overwritten by the output, so nothing computed from it is valid afterwards.
+        self.data = data if out is not data else None
+        # the stages in between keep the precision of derived data, so integer data is not rounded after every stage.
+        derived = Precision.for_dtype(data.dtype).get_derived_dtype()
+        result = data
+        for index, stage in enumerate(self.stages):
+            key = self.stage_key(stage)
+            # a cached output is only valid when all stages up to and including this one are unchanged.
+            if index < len(self.cache) and self.cache[index][0] == key:
+                result = self.cache[index][1]
+                continue
+            del self.cache[index:]
+            if index == len(self.stages) - 1 and (out is not None or dtype is not None):
+                # the caller owns the output, so the last stage writes it directly and is not cached.
+                return run_tiled(stage, result, out=out, dtype=dtype)
+            result = run_tiled(stage, result, dtype=derived)
+            self.cache.append((key, result))
+        del self.cache[len(self.stages):]
+        if out is None and dtype is None and result is not data:
+            return result
+        return super().transform(result, out, dtype)
+
+    def support(self, data):
+        # the stages are tiled one by one, tiling the pipeline as a whole would bypass the cache.
+        return None
+
+    def for_proxy(self, steps):
+        return Pipeline([stage.for_proxy(steps) for stage in self.stages])
+
+    def to_json(self):
+        return {
+            "Type": TransformEnum.PIPELINE.name,
+            "Data": [stage.to_json() for stage in self.stages]
+        }
@@ -0,0 +1,26 @@
+PREVIEW_SIZE = 384
+""" The maximum number of cells along each side of a preview proxy. """
+
+
+def decimate(data, size=PREVIEW_SIZE):
+    """
+    Decimates the data to a proxy that fits in a preview, by taking every n-th cell along each dimension.
+    :param data: The 2D numpy array to decimate.
+    :param size: The maximum number of cells along each side of the proxy.
+    :return: The proxy, a view on the data, and the (x, y) steps between the cells it takes.
+    """
+    steps = (max(-(-data.shape[0] // size), 1), max(-(-data.shape[1] // size), 1))
+    return data[::steps[0], ::steps[1]], steps
+
+
+def preview_transform(transform, data, size=PREVIEW_SIZE):
+    """
+    Approximates a transform of the data quickly, by transforming a decimated proxy with the transform scaled to the
+    cells of the proxy.
+    :param transform: The transform to preview.
+    :param data: The 2D numpy array to transform.
+    :param size: The maximum number of cells along each side of the proxy.
+    :return: The transformed proxy and the (x, y) steps between its cells in the data.
+    """
+    proxy, steps = decimate(data, size)
+    return transform.for_proxy(steps).transform(proxy), steps
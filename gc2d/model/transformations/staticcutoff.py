@@ -1,6 +1,6 @@
-from numpy import clip
+import numpy as np
 
-from .transform import Transform, TransformEnum
+from .transform import Transform, TransformEnum, output_array
 
 
 class StaticCutoff(Transform):
@@ -8,8 +8,10 @@ class StaticCutoff(Transform):
     def __init__(self, cut_value):
         self.cut_value = cut_value
 
-    def transform(self, data):
-        return clip(data - self.cut_value, 0, None)
+    def transform(self, data, out=None, dtype=None):
+        result = output_array(data, out, dtype, np.result_type(data, self.cut_value))
+        np.subtract(data, self.cut_value, out=result, casting='unsafe')
+        return np.maximum(result, 0, out=result)
 
     def to_json(self):
         return {"Type": TransformEnum.STATIC.name, "Data": self.cut_value}
@@ -0,0 +1,77 @@
+import math
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from gc2d.model.store import allocate, is_disk_backed
+
+TILE_CELLS = 1 << 20
+""" The maximum number of cells in the interior of a tile, so the temporaries of a transform stay small. """
+
+
+def tile_rows(shape, support, workers):
+    """
+    Picks the number of rows of a tile: small enough to give every worker a tile and to bound the memory of a tile,
+    but large enough that the halo does not dominate.
+    :param shape: The shape of the data.
+    :param support: The number of halo rows on each side of a tile.
+    :param workers: The number of threads.
+    :return: The number of rows in the interior of a tile.
+    """
+    rows = min(TILE_CELLS // max(shape[1], 1), math.ceil(shape[0] / workers))
+    return max(rows, 4 * support, 1)
+
+
+def run_tiled(transform, data, workers=None, out=None, dtype=None):
+    """
+    Applies a transform to the data in tiles of rows on a thread pool, numpy and ndimage release the GIL. Every tile is
+    padded with the rows its output depends on, as reported by the support of the transform, so the result is
+    identical to transforming the data at once. Rows at the edges of the data are not padded, so boundary modes behave
+    as before. Only a few tiles are in flight at any time.
+    Transforms that report no support, or data that fits in a single tile, are transformed directly. Disk-backed data
+    is tiled even on a single processor, so the transform only reads a tile at a time, and a large result is
+    disk-backed too.
+    :param transform: The transform to apply.
+    :param data: The 2D numpy array to transform.
+    :param workers: The number of threads to use, by default the number of processors.
+    :param out: A preallocated array with the shape of the data to write the result in, if any.
+    :param dtype: The dtype of the result when no out is given, by default it depends on the transform.
+    :return: The transformed data, out if it was given.
+    """
+    workers = workers or os.cpu_count() or 1
+    support = transform.support(data) if (workers > 1 or is_disk_backed(data)) and data.ndim == 2 else None
+    if support is None or tile_rows(data.shape, support, workers) >= data.shape[0]:
+        return transform.transform(data, out, dtype)
+    rows = tile_rows(data.shape, support, workers)
+
+    def run(start, stop):
+        low = max(start - support, 0)
+        high = min(stop + support, data.shape[0])
+        if support == 0 and out is not None:
+            # without a halo the tiles do not overlap, so they are written in the output directly.
+            transform.transform(data[start:stop], out[start:stop])
+            return None
+        return transform.transform(data[low:high], dtype=dtype if out is None else out.dtype)[start - low:stop - low]
+
+    result = out
+    pending = deque()
+
+    def write_next():
+        nonlocal result
+        start, stop, future = pending.popleft()
+        tile = future.result()
+        if tile is None:
+            return
+        if result is None:
+            result = allocate(data.shape, tile.dtype, like=data)
+        result[start:stop] = tile
+
+    with ThreadPoolExecutor(workers) as pool:
+        for start in range(0, data.shape[0], rows):
+            stop = min(start + rows, data.shape[0])
+            pending.append((start, stop, pool.submit(run, start, stop)))
+            if len(pending) > 2 * workers:
+                write_next()
+        while pending:
+            write_next()
+    return result
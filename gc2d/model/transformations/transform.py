@@ -1,10 +1,55 @@
 from enum import Enum, auto
 
+import numpy as np
+
+
+def output_array(data, out=None, dtype=None, default=None):
+    """
+    Returns the array a transform writes its result in.
+    :param data: The 2D numpy array being transformed.
+    :param out: A preallocated array with the shape of the data to write the result in, if any.
+    :param dtype: The dtype of a new array, if no out is given.
+    :param default: The dtype of a new array if neither is given, the dtype of the data by default.
+    :return: The out array, or a new array.
+    """
+    if out is not None:
+        if out.shape != data.shape:
+            raise ValueError("the output has shape {}, the data {}".format(out.shape, data.shape))
+        return out
+    if dtype is None:
+        dtype = data.dtype if default is None else default
+    return np.empty(data.shape, dtype=dtype)
+
 
 class Transform:
 
-    def transform(self, data):
-        return data.copy()
+    def transform(self, data, out=None, dtype=None):
+        """
+        Transforms the data. Transforms allocate at most the output array, and none when one is passed in.
+        :param data: The 2D numpy array to transform, it is not modified.
+        :param out: A preallocated array with the shape of the data to write the result in, if any.
+        :param dtype: The dtype of the result when no out is given, by default it depends on the transform.
+        :return: The transformed data, out if it was given.
+        """
+        result = output_array(data, out, dtype)
+        np.copyto(result, data, casting='unsafe')
+        return result
+
+    def support(self, data):
+        """
+        :param data: The 2D numpy array that would be tiled.
+        :return: The number of rows along the first dimension, on each side of a row, that the output of the row
+            depends on. None if it depends on the whole data, in which case the transform is never tiled.
+        """
+        return 0
+
+    def for_proxy(self, steps):
+        """
+        :param steps: The (x, y) steps between the cells of a decimated proxy of the data.
+        :return: A transform that approximates this transform on the proxy, for previews. Parameters given in cells
+            are scaled to the proxy.
+        """
+        return self
 
     def to_json(self):
         return {"Type": TransformEnum.NONE.name}
@@ -17,3 +62,4 @@ class TransformEnum(Enum):
     STATIC = auto()
     MIN1D = auto()
     CUSTOM = auto()
+    PIPELINE = auto()
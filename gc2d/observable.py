@@ -1,33 +1,166 @@
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+RENDER_HISTORY = 64
+""" The number of transactions whose render count is kept. """
+
+logger = logging.getLogger(__name__)
+
+
 class Observable:
 
     def __init__(self):
         """
         An Observable object can have observers added and removed from it that can be notified when required.
+        Observers either subscribe to single topics, the event names, or observe all of them. Events are delivered right
+        away, except within a transaction: then they are collected and delivered once when the outermost transaction
+        ends, with redundant events coalesced.
         """
         self.__observers = dict()
+        """The observers of all topics, with their notify function."""
+        self.__subscriptions = dict()
+        """The subscribers of every topic, with their callback."""
+        self.__order = dict()
+        """The registration number of every observer, events are delivered in registration order."""
+        self.__index = dict()
+        """The (observer, callback, observes all) to deliver every topic to, built on first use."""
+        self.__depth = 0
+        """The number of transactions that have begun and not ended."""
+        self.__pending = dict()
+        """The events collected in the current transaction, by (name, id of value), in order of last notification."""
+        self.__label = None
+        """The label of the outermost transaction."""
+        self.renders = 0
+        """The number of renders since the last transaction began, counted by the views with count_render."""
+        self.render_counts = deque(maxlen=RENDER_HISTORY)
+        """The (label, renders) of the last transactions, the renders every user action triggered."""
+
+    def __register(self, observer):
+        if observer not in self.__order:
+            self.__order[observer] = len(self.__order)
+        self.__index.clear()
 
     def add_observer(self, observer, notify):
         """
-        Adds an observer and its notify function to the Observable object
+        Adds an observer and its notify function to the Observable object, it is notified of all topics.
         :param observer: the observing object
-        :param notify: the function to notify the observer with
+        :param notify: the function to notify the observer with, it is called with the name and value of the event
         :return: None
         """
         if observer not in self.__observers:
             self.__observers[observer] = notify
+            self.__register(observer)
+
+    def subscribe(self, observer, topic, callback):
+        """
+        Subscribes an observer to a single topic.
+        :param observer: the observing object
+        :param topic: the name of the events to receive
+        :param callback: the function to call with the value of every event of the topic
+        :return: None
+        """
+        self.__subscriptions.setdefault(topic, dict())[observer] = callback
+        self.__register(observer)
 
     def remove_observer(self, observer):
         """
+        Removes an observer and all of its subscriptions.
         :param observer: The observer to remove
         :return: None
         """
-        if observer in self.__observers:
-            self.__observers.pop(observer)
+        self.__observers.pop(observer, None)
+        for subscribers in self.__subscriptions.values():
+            subscribers.pop(observer, None)
+        self.__order.pop(observer, None)
+        self.__index.clear()
+
+    def __receivers(self, name):
+        """
+        :param name: The name of an event.
+        :return: The (observer, callback, observes all) the event is delivered to, in registration order.
+        """
+        if name not in self.__index:
+            receivers = [(observer, notify, True) for observer, notify in self.__observers.items()]
+            receivers.extend((observer, callback, False) for observer, callback in
+                             self.__subscriptions.get(name, dict()).items())
+            receivers.sort(key=lambda receiver: self.__order[receiver[0]])
+            self.__index[name] = receivers
+        return self.__index[name]
+
+    def __deliver(self, name, value, skip=()):
+        for observer, callback, observes_all in list(self.__receivers(name)):
+            if observer in skip:
+                continue
+            if observes_all:
+                callback(name, value)
+            else:
+                callback(value)
 
     def notify(self, name, value):
         """
-        Notify all the observers.
+        Notifies the observers of the topic and of all topics, or collects the event until the transaction ends.
+        :param name: the name of the event, its topic
+        :param value: the value of the event
+        :return: None
+        """
+        if self.__depth == 0:
+            self.__deliver(name, value)
+            return
+        # the same event twice is delivered once, at the position of the last notification.
+        key = (name, id(value))
+        self.__pending.pop(key, None)
+        self.__pending[key] = (name, value)
+
+    @contextmanager
+    def transaction(self, label=None):
+        """
+        Collects the events notified within it and delivers them when the outermost transaction ends. An event is
+        delivered once even if it was notified repeatedly with the same value. An event 'a.b' is not delivered to the
+        observers that also receive the event 'a' with the same value, as those update everything of the value anyway.
+        The events are only delivered when the outermost transaction ends normally: when an exception leaves it, the
+        collected events are dropped, so observers never see a half applied operation. An exception that is caught
+        within an outer transaction does not drop anything.
+        The renders counted during the outermost transaction are recorded in render_counts.
+        :param label: A name for the transaction, the user action it performs.
+        :return: A context manager.
+        """
+        if self.__depth == 0:
+            self.renders = 0
+            self.__label = label
+        self.__depth += 1
+        try:
+            yield
+            # an exception leaves the operation half done, the events of the outermost transaction are then dropped.
+            if self.__depth == 1:
+                self.__flush()
+        finally:
+            self.__depth -= 1
+            if self.__depth == 0:
+                self.__pending.clear()
+                self.render_counts.append((self.__label, self.renders))
+                logger.debug("%s triggered %d renders", self.__label, self.renders)
+
+    def __flush(self):
+        """
+        Delivers the collected events. The events the observers notify in turn are collected too, and delivered in the
+        next round, until no more events are notified.
+        :return: None
+        """
+        while self.__pending:
+            pending, self.__pending = self.__pending, dict()
+            for name, value in pending.values():
+                skip = set()
+                parent = name
+                while '.' in parent:
+                    parent = parent.rpartition('.')[0]
+                    if (parent, id(value)) in pending:
+                        skip.update(observer for observer, _callback, _observes_all in self.__receivers(parent))
+                self.__deliver(name, value, skip)
+
+    def count_render(self):
+        """
+        Counts a render, the views call this whenever they upload new data to draw.
         :return: None
         """
-        for x in self.__observers:
-            self.__observers[x](name, value)
+        self.renders += 1
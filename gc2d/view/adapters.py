@@ -0,0 +1,32 @@
+from PyQt5.QtGui import QColor, QImage, QPen, qRgb
+
+from gc2d.model.preferences import PenEnum
+
+
+def make_pen(pen_dict):
+    """
+    Constructs a Qt pen from the pen preferences, the model only holds their values.
+    :param pen_dict: a dictionary of the form {PenEnum.(spec) : value}, as returned by the PEN preference.
+    :return: the QPen
+    """
+    pen = QPen()
+    pen.setWidth(pen_dict[PenEnum.WIDTH])
+    pen.setColor(QColor(pen_dict[PenEnum.COLOR]))
+    pen.setStyle(pen_dict[PenEnum.STYLE])
+    return pen
+
+
+def palette_image(palette, width=400, height=100):
+    """
+    Draws the gradient of a palette from its lowest to its highest color.
+    :param palette: The Palette to draw.
+    :param width: The width of the image, the number of colors sampled from the palette.
+    :param height: The height of the image.
+    :return: the QImage
+    """
+    gradient = palette.get_lookup_table(points=width)
+    img = QImage(width, height, QImage.Format_RGB32)
+    for x, color in enumerate(gradient):
+        for y in range(0, height):
+            img.setPixel(x, y, qRgb(int(color[0]), int(color[1]), int(color[2])))
+    return img
@@ -3,14 +3,19 @@ import os.path
 import sys
 
 import numpy
-from PyQt5.QtWidgets import QComboBox, QDialog, QDoubleSpinBox, QFileDialog, QHBoxLayout, QLabel, QPushButton, \
+from PyQt5.QtCore import QObject, QRectF, QThread, pyqtSignal, pyqtSlot
+from PyQt5.QtWidgets import QCheckBox, QComboBox, QDialog, QDoubleSpinBox, QFileDialog, QHBoxLayout, QLabel, QPushButton, \
     QRadioButton, QSpinBox, QTextEdit, QVBoxLayout, QWidget
+from pyqtgraph import ImageItem, PlotWidget
 
-from gc2d.model.transformations import Convolution, DynamicCutoff, Gaussian, Min1D, StaticCutoff, Transform
+from gc2d.model.transformations import Convolution, DynamicCutoff, Gaussian, Min1D, Pipeline, StaticCutoff, \
+    Transform
+from gc2d.model.transformations import preview_transform
 from gc2d.model.transformations.dynamiccutoff import CutoffMode
 
 
 class ConvolutionPicker(QDialog):
+    preview_requested = pyqtSignal(int, object, object)
 
     def __init__(self, model_wrapper):
         """
@@ -83,6 +88,34 @@ class ConvolutionPicker(QDialog):
                        "open convolution kernel CSV")]
         )
 
+        self.chain_box = QCheckBox('Apply after the current transformation')
+        self.chain_box.setToolTip('Chains the transformation to the current one, for example a dynamic cut-off followed '
+                                  'by a gaussian convolution. Unchanged leading steps are not recomputed.')
+        vlayout.addWidget(self.chain_box)
+
+        self.preview_box = QCheckBox('Live preview')
+        self.preview_box.setToolTip('Shows the transformation of a decimated copy of the data while the parameters '
+                                    'change. The full data is only transformed on Apply.')
+        self.preview_box.setChecked(True)
+        self.preview_box.toggled.connect(self.refresh_preview)
+        vlayout.addWidget(self.preview_box)
+
+        self.preview_plot = PlotWidget()
+        """The plot showing the preview, in the coordinates of the data"""
+        self.preview_plot.getPlotItem().setMenuEnabled(False)
+        self.preview_plot.setMinimumHeight(240)
+        self.preview_image = ImageItem()
+        self.preview_plot.addItem(self.preview_image)
+        vlayout.addWidget(self.preview_plot)
+
+        self.generation = 0
+        """The number of the latest preview request, results of older requests are dropped"""
+        self.preview_thread = QThread()
+        self.preview_worker = _PreviewWorker()
+        self.preview_worker.moveToThread(self.preview_thread)
+        self.preview_requested.connect(self.preview_worker.run)
+        self.preview_worker.finished.connect(self.show_preview)
+
         cancel_select = QWidget()
         vlayout.addWidget(cancel_select)
         cancel_select_layout = QHBoxLayout()
@@ -100,12 +133,15 @@ class ConvolutionPicker(QDialog):
         select_button.clicked.connect(self.select_and_close)
         cancel_select_layout.addWidget(select_button)
 
+        self.chain_box.toggled.connect(self.refresh_preview)
+
     def add_button(self, transform_type, label, info, parameters, checked=False):
 
         radio_button = QRadioButton(label, self.radio_buttons)
         if checked:
             radio_button.setChecked(True)
         radio_button.toggled.connect(self.switch_params)
+        radio_button.toggled.connect(self.refresh_preview)
         self.radio_button_layout.addWidget(radio_button)
 
         param_area = QWidget()
@@ -119,6 +155,7 @@ class ConvolutionPicker(QDialog):
         params_layout.addWidget(info_label)
 
         for param in parameters:
+            param.connect(self.refresh_preview)
             label = QLabel(param.label)
             label.setBuddy(param.selector)
             gsb = QWidget()
@@ -136,22 +173,123 @@ class ConvolutionPicker(QDialog):
         for button in self.buttons:
             button.param_area.setVisible(button.radio_button.isChecked())
 
-    def select(self):
+    def selected_transform(self):
+        """
+        :return: The transform with the chosen type and parameters, chained to the current one if that is checked.
+        """
         for button in self.buttons:
             if button.radio_button.isChecked():
                 parameters = [param.get_value() for param in button.parameters]
                 transform = button.transform_type(*parameters)
-                self.model_wrapper.set_transform(transform)
+                if self.chain_box.isChecked():
+                    transform = self.chain(transform)
+                return transform
+        return None
+
+    def select(self):
+        transform = self.selected_transform()
+        if transform is not None:
+            self.model_wrapper.set_transform(transform)
+
+    def chain(self, transform):
+        """
+        :param transform: The selected transform.
+        :return: A Pipeline applying the selected transform after the stages of the current transform.
+        """
+        current = self.model_wrapper.preferences.transform
+        if isinstance(current, Pipeline):
+            stages = current.stages
+        elif type(current) is Transform:
+            stages = []
+        else:
+            stages = [current]
+        return Pipeline(stages + [transform])
+
+    def refresh_preview(self, *args):
+        """
+        Requests a preview of the selected transform in the background. Requests made while one is computed replace
+        each other, only the latest is computed next.
+        :return: None
+        """
+        self.generation += 1
+        self.preview_worker.latest = self.generation
+        self.preview_plot.setVisible(self.preview_box.isChecked())
+        model = self.model_wrapper.model
+        if not self.preview_box.isChecked() or model is None:
+            return
+        if not self.preview_thread.isRunning():
+            self.preview_thread.start()
+        self.preview_requested.emit(self.generation, self.selected_transform(), model.get_raw_data())
+
+    def show_preview(self, generation, result):
+        """
+        Shows a finished preview, unless it has been superseded by a newer request.
+        :param generation: The number of the preview request.
+        :param result: The transformed proxy and the steps between its cells, or None if the transform failed.
+        :return: None
+        """
+        model = self.model_wrapper.model
+        if generation != self.generation or model is None:
+            return
+        if result is None:
+            self.preview_image.clear()
+            return
+        proxy, steps = result
+        self.preview_image.setImage(proxy, lut=model.palette, levels=(model.lower_bound, model.upper_bound))
+        self.preview_image.setRect(QRectF(0, 0, proxy.shape[0] * steps[0], proxy.shape[1] * steps[1]))
+
+    def stop_preview(self):
+        """
+        Drops the queued previews and stops the preview thread, a new preview request starts it again.
+        :return: None
+        """
+        self.preview_worker.latest = None
+        self.preview_thread.quit()
+        self.preview_thread.wait()
 
     def select_and_close(self):
         self.select()
         self.close()
 
+    def done(self, result):
+        """ Stops the preview thread when the dialog is accepted or rejected, like by pressing escape. """
+        self.stop_preview()
+        super().done(result)
+
     def closeEvent(self, event):
         """ Overrides the closing event to execute the on_close callback after closing.
         This is better than overriding close() because this will also execute when the user presses the x button on the top of the window."""
+        self.stop_preview()
         event.accept()
 
+    def showEvent(self, event):
+        """ Refreshes the preview when the dialog is shown again, the model may have changed while it was closed. """
+        super().showEvent(event)
+        self.refresh_preview()
+
+
+class _PreviewWorker(QObject):
+    finished = pyqtSignal(int, object)
+
+    def __init__(self):
+        """
+        Computes transform previews on the thread it is moved to.
+        """
+        super().__init__()
+        self.latest = None
+        """The number of the latest request, older requests that are still queued are skipped"""
+
+    @pyqtSlot(int, object, object)
+    def run(self, generation, transform, data):
+        if generation != self.latest:
+            return
+        try:
+            result = preview_transform(transform, data) if transform is not None else None
+        except Exception:
+            # parameters that are still being entered can be invalid, the preview is cleared until they are not.
+            result = None
+        self.finished.emit(generation, result)
+
 
 class _Button:
 
@@ -171,6 +309,9 @@ class _ParamDouble:
         self.selector.setMaximum(maximum)
         self.selector.setValue(value)
 
+    def connect(self, callback):
+        self.selector.valueChanged.connect(callback)
+
     def get_value(self):
         return self.selector.value()
 
@@ -183,6 +324,9 @@ class _ParamInt:
         self.selector.setMinimum(minimum)
         self.selector.setMaximum(maximum)
 
+    def connect(self, callback):
+        self.selector.valueChanged.connect(callback)
+
     def get_value(self):
         return self.selector.value()
 
@@ -200,6 +344,9 @@ class _ParamOption:
             self.selector.addItem(text)
             self.text_to_value[text] = value
 
+    def connect(self, callback):
+        self.selector.currentIndexChanged.connect(callback)
+
     def get_value(self):
         return self.text_to_value[self.selector.currentText()]
 
@@ -221,6 +368,10 @@ class _ParamCSV:
         layout.addWidget(fileopenbutton)
         self.path = None
         self.matrix = None
+        self.callbacks = []
+
+    def connect(self, callback):
+        self.callbacks.append(callback)
 
     def pick_file(self):
         path, _ = QFileDialog.getOpenFileName(None, self.filedialogtext, "", self.extension)
@@ -239,6 +390,8 @@ class _ParamCSV:
         self.matrix = npmatrix
         self.fnamebox.setText(os.path.basename(path))
         self.path = path
+        for callback in self.callbacks:
+            callback()
 
     def get_value(self):
         return self.matrix
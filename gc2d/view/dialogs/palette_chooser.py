@@ -8,6 +8,7 @@ from PyQt5.QtWidgets import QDialog, QFileDialog, QHBoxLayout, QLabel, QListWidg
 import gc2d.main as main
 from gc2d.model.palette.palette import load_custom_palettes, palettes
 from gc2d.model.preferences import PreferenceEnum
+from gc2d.view.adapters import palette_image
 
 
 class PaletteChooser(QDialog):
@@ -108,7 +109,7 @@ class PaletteChooser(QDialog):
             grad = QLabel()
             grad.setScaledContents(True)
             grad.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-            grad.setPixmap(QPixmap(palt.generate_preview(width=100, height=1)))
+            grad.setPixmap(QPixmap(palette_image(palt, width=100, height=1)))
             # grad.setStyleSheet("background-color:green")
 
             layo.addWidget(text)
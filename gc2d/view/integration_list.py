@@ -2,7 +2,8 @@ from decimal import Decimal
 from enum import Enum
 
 from PyQt5 import QtCore
-from PyQt5.Qt import QHeaderView, QPushButton, QTableWidget, QTableWidgetItem
+from PyQt5.Qt import QAbstractItemView, QAbstractTableModel, QApplication, QEvent, QHeaderView, QItemSelectionModel, \
+    QModelIndex, QStyle, QStyledItemDelegate, QStyleOptionButton, QTableView
 
 from gc2d.controller.integration.handler import Handler
 
@@ -11,137 +12,318 @@ class Col(Enum):
     label = 0
     mean = 1
     integration = 2
-    clear = 3
 
 
-class IntegrationList(QTableWidget):
+HEADERS = ('Label', 'Mean Count', 'Sum')
+""" The header of every column before the columns of the runs. """
+CLEAR_HEADER = ' '
+""" The header of the column of clear buttons, after the columns of the runs. """
+
+
+class IntegrationTableModel(QAbstractTableModel):
+
     def __init__(self, model_wrapper, parent=None):
         """
-        The IntegrationList class shows the integration and selection data from model_wrapper
-        It is also responsible for handling some user interaction with integration data
+        The rows of the integration list, one per integration in the order they were added. The integrations are kept
+        in an array with a map from their id to their row, the view only asks for the cells it shows. Every run of the
+        session adds a column with the sum of the integrations over it, so the list is a matrix of areas by runs.
         :param model_wrapper: the wrapper of the model.
-        :param parent: the parent of this Widget.
+        :param parent: the parent of this model.
         """
         super().__init__(parent)
+        self.handler = Handler(model_wrapper)
+        """The controller of the edits in the list"""
+        self.integrations = []
+        """The shown integrations, by row"""
+        self.rows = {}
+        """The row of every shown integration, by id"""
+        self.precision = 5
+        """The amount of decimals displayed"""
+        self.runs = list(model_wrapper.session.runs)
+        """The runs of the session, by column after the fixed columns"""
 
-        # self.showing contains the id of each shown integration
-        # the index in showing corresponds with the row in the table
-        self.showing = []
+        model_wrapper.subscribe(self, 'integrationUpdate', self.update_row)
+        model_wrapper.subscribe(self, 'integrationsUpdate', self.update_rows)
+        model_wrapper.subscribe(self, 'newIntegration', self.add_row)
+        model_wrapper.subscribe(self, 'removeIntegration', self.remove_row)
+        model_wrapper.subscribe(self, 'model', self.show_model)
+        model_wrapper.subscribe(self, 'model.viewTransformed', self.show_model)
+        model_wrapper.subscribe(self, 'newRuns', self.add_columns)
+        model_wrapper.subscribe(self, 'removeRun', self.remove_column)
 
-        # self.handler is a controller for all actions from this view with model_wrapper
-        self.handler = Handler(model_wrapper)
-        model_wrapper.add_observer(self, self.notify)
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.integrations)
 
-        self.cellChanged.connect(self.change_label)
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.clear_column() + 1
 
-        self.previous_selection = []
-        self.itemSelectionChanged.connect(self.select)
+    def clear_column(self):
+        """
+        :return: the column of the clear buttons, the last one
+        """
+        return len(Col) + len(self.runs)
 
-        self.precision = 5  # amount of decimals displayed
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            if section < len(Col):
+                return HEADERS[section]
+            if section < self.clear_column():
+                return self.runs[section - len(Col)].name
+            return CLEAR_HEADER
+        return super().headerData(section, orientation, role)
 
-        self.setColumnCount(len(Col))
-        self.setHorizontalHeaderLabels(('Label', 'Mean Count', 'Sum', ' '))
-        self.horizontalHeader().setDefaultSectionSize(130)
-        self.horizontalHeader().setSectionResizeMode(Col.label.value, QHeaderView.Interactive)
-        self.horizontalHeader().setSectionResizeMode(Col.mean.value, QHeaderView.Interactive)
-        self.horizontalHeader().setSectionResizeMode(Col.integration.value, QHeaderView.Interactive)
-        self.horizontalHeader().setSectionResizeMode(Col.clear.value, QHeaderView.Stretch)
+    def flags(self, index):
+        if index.column() == Col.label.value:
+            return QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsEditable
+        return QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role not in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole) or not index.isValid():
+            return None
+        integration = self.integrations[index.row()]
+        column = index.column()
+        if column == Col.label.value:
+            return integration.label
+        if column == Col.mean.value:
+            return self.format(integration.mean)
+        if column == Col.integration.value:
+            return self.format(integration.sum)
+        if column < self.clear_column():
+            statistics = integration.runs.get(self.runs[column - len(Col)])
+            return self.format(None if statistics is None else statistics.sum)
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        """
+        Hands an edited label to the handler, the row is redrawn when the model wrapper reports the update.
+        """
+        if role != QtCore.Qt.EditRole or index.column() != Col.label.value:
+            return False
+        self.handler.change_label(self.integrations[index.row()].id, value)
+        return True
+
+    def format(self, value):
+        """
+        :param value: a mean or sum
+        :return: the value in scientific notation, or an empty string if it has not been computed
+        """
+        if value is None:
+            return ''
+        return '{num:.{precision}E}'.format(num=Decimal(value), precision=self.precision)
+
+    def get_row(self, key):
+        """
+        :param key: the id of an integration
+        :return: the row of the integration, or None if it is not shown
+        """
+        return self.rows.get(key)
 
-    def notify(self, name, value):
+    def add_row(self, integration):
         """
-        Updates the image rendered to match current integration data.
-        Clears list if no chromatogram is opened
+        Appends a row for a new integration.
+        :param integration: the new integration
         :return: None
         """
-        self.blockSignals(True)
-        if name == 'integrationUpdate':
-            self.redraw_row(value)
-        elif name == 'newIntegration':
-            self.new_row(value)
-        elif name == 'removeIntegration' and value.id in self.showing:
-            self.clear_row(self.showing.index(value.id))
-        elif name == 'showIntegration':
-            if self.showing.index(value.id) not in self.previous_selection and value.show is True:
-                self.set_selected_row(self.showing.index(value.id))
-        elif name in {'model', 'model.viewTransformed'}:
-            if value is None:
-                self.setRowCount(0)
-        self.blockSignals(False)
-
-    def new_row(self, integration):
-        """
-        Initializes a new row with the appropriate fields
-        :param integration: the new integration value
-        """
-        row = self.rowCount()
-        self.previous_selection = [row]
-        self.insertRow(row)
-
-        clear_button = QPushButton()
-        clear_button.setText('Clear')
-        clear_button.setMinimumWidth(2)
-        clear_button.pressed.connect(lambda: self.clear_value(integration.id))
-        self.setCellWidget(row, Col.clear.value, clear_button)
-
-        self.showing.append(integration.id)
-        self.redraw_row(integration)
-        self.set_selected_row(self.showing[row])
-
-    def redraw_row(self, integration):
-        """
-        Takes the integration, and redraws the variable fields in the row
-        :param value: list of Integration objects
+        row = len(self.integrations)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.integrations.append(integration)
+        self.rows[integration.id] = row
+        self.endInsertRows()
+
+    def remove_row(self, integration):
+        """
+        Removes the row of an integration, the rows below it move up.
+        :param integration: the removed integration
         :return: None
         """
-        if integration.id not in self.showing:
+        row = self.rows.get(integration.id)
+        if row is None:
             return
-        self.blockSignals(True)  # signals are blocked during redraw so cellChanged -> change_label is not called
-        row = self.showing.index(integration.id)
-        self.setItem(row, Col.label.value, QTableWidgetItem(integration.label))
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.integrations[row]
+        del self.rows[integration.id]
+        for moved in range(row, len(self.integrations)):
+            self.rows[self.integrations[moved].id] = moved
+        self.endRemoveRows()
 
-        mean_item = QTableWidgetItem(
-            '{num:.{precision}E}'.format(num=Decimal(integration.mean), precision=self.precision))
-        mean_item.setFlags(QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled)
-        self.setItem(row, Col.mean.value, mean_item)
+    def update_row(self, integration):
+        """
+        :param integration: the updated integration
+        :return: None
+        """
+        self.update_rows([integration])
 
-        sum_item = QTableWidgetItem(
-            '{num:.{precision}E}'.format(num=Decimal(integration.sum), precision=self.precision))
-        sum_item.setFlags(QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled)
-        self.setItem(row, Col.integration.value, sum_item)
-        self.blockSignals(False)
+    def update_rows(self, integrations):
+        """
+        Redraws the rows of updated integrations with a single dataChanged over the range of rows they span.
+        :param integrations: the list of updated integrations
+        :return: None
+        """
+        rows = [self.rows[integration.id] for integration in integrations if integration.id in self.rows]
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), Col.label.value), self.index(max(rows), self.clear_column() - 1))
 
-    def select(self):
+    def add_columns(self, runs):
         """
-        Records which elements in the list are selected and deselected. 
-        The new selection is highlighted in the 2d/3d view, all that are deselected are faded out
+        Adds a column for every new run, before the column of the clear buttons.
+        :param runs: the list of new runs
         :return: None
         """
-        current_selection = []
-        for selected in self.selectedIndexes():
-            row = selected.row()
-            if row not in current_selection:  # to counteract multiple columns registering as multiple indices
-                self.handler.show(self.showing[row])
-                current_selection.append(row)
-                if row in self.previous_selection:
-                    self.previous_selection.remove(row)
-        to_hide = [previous for previous in self.previous_selection if previous < len(self.showing)]
-        self.previous_selection = current_selection
-        for previous in to_hide:
-            self.handler.hide(self.showing[previous])
+        first = self.clear_column()
+        self.beginInsertColumns(QModelIndex(), first, first + len(runs) - 1)
+        self.runs.extend(runs)
+        self.endInsertColumns()
+
+    def remove_column(self, run):
+        """
+        Removes the column of a run, the columns after it move left.
+        :param run: the removed run
+        :return: None
+        """
+        column = len(Col) + self.runs.index(run)
+        self.beginRemoveColumns(QModelIndex(), column, column)
+        self.runs.remove(run)
+        self.endRemoveColumns()
+
+    def show_model(self, model):
+        """
+        Clears the list if no chromatogram is opened
+        :param model: the shown model, or None
+        :return: None
+        """
+        if model is None and self.integrations:
+            self.beginResetModel()
+            self.integrations = []
+            self.rows = {}
+            self.endResetModel()
+
 
-    def change_label(self):
+class ClearButtonDelegate(QStyledItemDelegate):
+
+    def __init__(self, on_click, parent=None):
+        """
+        Draws a clear button in the cells of a column, and calls back when one is clicked. The buttons are only painted,
+        so a list of any length needs no widgets per row.
+        :param on_click: the function to call with the row of a clicked button.
+        :param parent: the parent of this delegate.
         """
-        Takes an edited label and hands this to the handler, with the key of the appropriate integration and the edited text
+        super().__init__(parent)
+        self.on_click = on_click
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect
+        button.text = 'Clear'
+        button.state = QStyle.State_Enabled | QStyle.State_Raised
+        QApplication.style().drawControl(QStyle.CE_PushButton, button, painter)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and option.rect.contains(event.pos()):
+            self.on_click(index.row())
+            return True
+        # the press is consumed too, so clicking the button does not select the row.
+        return event.type() in (QEvent.MouseButtonPress, QEvent.MouseButtonDblClick)
+
+
+class IntegrationList(QTableView):
+    def __init__(self, model_wrapper, parent=None):
+        """
+        The IntegrationList class shows the integration and selection data from model_wrapper
+        It is also responsible for handling some user interaction with integration data
+        :param model_wrapper: the wrapper of the model.
+        :param parent: the parent of this Widget.
+        """
+        super().__init__(parent)
+
+        self.table = IntegrationTableModel(model_wrapper, self)
+        """The rows of the list"""
+        # self.handler is a controller for all actions from this view with model_wrapper, shared with the rows
+        self.handler = self.table.handler
+        self.setModel(self.table)
+        self.clear_delegate = ClearButtonDelegate(self.clear_value, self)
+        self.clear_column = None
+        """The column the clear delegate is set for"""
+
+        # the integrations that were selected, by id, so they are faded when deselected
+        self.previous_selection = set()
+        # whether the selection is being set from the model wrapper, select is then called once it is set
+        self.selecting = False
+        self.selectionModel().selectionChanged.connect(self.select)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+
+        # subscribed after the table, so new rows exist when they are selected.
+        model_wrapper.subscribe(self, 'newIntegration', self.select_new)
+        model_wrapper.subscribe(self, 'showIntegration', self.show_row)
+
+        self.horizontalHeader().setDefaultSectionSize(130)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.place_clear_buttons()
+        self.table.columnsInserted.connect(self.place_clear_buttons)
+        self.table.columnsRemoved.connect(self.place_clear_buttons)
+        # rows of a fixed height without a row number header, the header would measure its sections whenever a new row
+        # is selected.
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().hide()
+
+    def place_clear_buttons(self):
+        """
+        Moves the clear buttons to the last column, which changes when runs are added or removed. The other columns can
+        be resized, the clear buttons fill the rest of the width.
+        :return: None
+        """
+        if self.clear_column is not None:
+            self.setItemDelegateForColumn(self.clear_column, None)
+            if self.clear_column < self.table.columnCount():
+                self.horizontalHeader().setSectionResizeMode(self.clear_column, QHeaderView.Interactive)
+        self.clear_column = self.table.clear_column()
+        self.setItemDelegateForColumn(self.clear_column, self.clear_delegate)
+        self.horizontalHeader().setSectionResizeMode(self.clear_column, QHeaderView.Stretch)
+
+    def select_new(self, integration):
+        """
+        Selects the row of a new integration.
+        :param integration: the new integration
+        :return: None
+        """
+        row = self.table.get_row(integration.id)
+        if row is not None:
+            self.set_selected_row(row)
+
+    def show_row(self, integration):
+        """
+        Selects the row of an integration that is shown, unless it is selected already.
+        :param integration: the integration whose show has toggled
+        :return: None
+        """
+        row = self.table.get_row(integration.id)
+        if row is not None and integration.id not in self.previous_selection and integration.show is True:
+            self.set_selected_row(row)
+
+    def select(self):
+        """
+        Records which elements in the list are selected and deselected.
+        The new selection is highlighted in the 2d/3d view, all that are deselected are faded out
         :return: None
         """
-        self.handler.change_label(self.showing[self.currentRow()], self.currentItem().text())
+        if self.selecting:
+            return
+        current_selection = {self.table.integrations[index.row()].id for index in self.selectionModel().selectedRows()}
+        to_hide = [key for key in self.previous_selection if key not in current_selection and
+                   self.table.get_row(key) is not None]
+        self.previous_selection = current_selection
+        for key in current_selection:
+            self.handler.show(key)
+        for key in to_hide:
+            self.handler.hide(key)
 
-    def clear_value(self, key):
+    def clear_value(self, row):
         """
-        Removes row and signals to controller to remove the integration value from the model
-        :param key: identifier of the row to be removed
+        Signals to controller to remove the integration value from the model, the row is removed when the model wrapper
+        reports the removal
+        :param row: the row of the integration to be removed
         """
-        self.clear_row(self.showing.index(key))
+        key = self.table.integrations[row].id
+        self.previous_selection.discard(key)
         self.handler.clear_value(key)
 
     def set_selected_row(self, row):
@@ -150,20 +332,9 @@ class IntegrationList(QTableWidget):
         :param row: the row to select
         :return: None
         """
-        self.blockSignals(True)
-        self.clearSelection()
-        self.setCurrentCell(row, Col.label.value)
+        index = self.table.index(row, Col.label.value)
+        self.selecting = True
+        self.selectionModel().setCurrentIndex(index, QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows)
+        self.selecting = False
+        self.scrollTo(index)
         self.select()
-        self.previous_selection = [row]
-        self.blockSignals(False)
-
-    def clear_row(self, row):
-        """
-        Removes row the corresponding integration from local data
-        :param row: which row to remove
-        """
-        self.removeRow(row)
-        del self.showing[row]
-        for ix, selected in enumerate(self.previous_selection):
-            if selected > row:
-                self.previous_selection[ix] -= 1
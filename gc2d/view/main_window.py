@@ -1,8 +1,12 @@
 import os.path
 
-from PyQt5.QtWidgets import QMainWindow
+from PyQt5.QtWidgets import QActionGroup, QMainWindow
 from pyqtgraph.dockarea import Dock, DockArea
 
+from gc2d.controller.action.add_runs_action import AddRunsAction
+from gc2d.controller.action.align_runs_action import AlignRunsAction
+from gc2d.controller.action.clear_runs_action import ClearRunsAction
+from gc2d.controller.action.detect_peaks_action import DetectPeaksAction
 from gc2d.controller.action.draw_action import DrawAction
 from gc2d.controller.action.exit_action import ExitAction
 from gc2d.controller.action.export_action import ExportAction
@@ -19,7 +23,10 @@ from gc2d.controller.action.save_action import SaveAction
 from gc2d.controller.action.save_as_action import SaveAsAction
 from gc2d.controller.action.save_integrations_action import SaveIntegrationsAction
 from gc2d.controller.action.save_prefs_action import SavePrefsAction
+from gc2d.controller.action.set_precision_action import SetPrecisionAction
 from gc2d.controller.action.toggle_convolution_action import ToggleConvolutionAction
+from gc2d.controller.loader import JobQueue, Loader
+from gc2d.model.precision import Precision
 from gc2d.model.preferences import PreferenceEnum
 from gc2d.view.integration_list import IntegrationList
 from gc2d.view.plot_1d_widget import Plot1DWidget
@@ -29,6 +36,7 @@ from gc2d.view.plot_3d_widget import Plot3DWidget
 # FILE
 SHORTCUT_OPEN = 'Ctrl+O'
 SHORTCUT_IMPORT = 'Ctrl+I'
+SHORTCUT_ADD_RUNS = None
 SHORTCUT_SAVE = 'Ctrl+S'
 SHORTCUT_SAVE_AS = 'Ctrl+Shift+S'
 SHORTCUT_SAVE_INTEGRATIONS = None
@@ -46,6 +54,11 @@ SHORTCUT_TOGGLE_CONVOLUTION = None
 
 # TOOLS
 SHORTCUT_CHOOSE_CONVOLUTION = None
+SHORTCUT_DETECT_PEAKS = None
+SHORTCUT_ALIGN_RUNS = None
+
+UNALIGNED_MESSAGE_TIME = 10000
+""" How long the status bar names the runs that could not be aligned, in milliseconds. """
 
 
 class Window(QMainWindow):
@@ -76,8 +89,15 @@ class Window(QMainWindow):
         self.plot_3d = None
         """The Plot3DWidget."""
 
+        self.loader = Loader(self.statusBar())
+        """The loader that opens files on a worker thread."""
+        self.jobs = JobQueue(self.statusBar())
+        """The queue that evaluates the runs of the session on a worker thread."""
+        model_wrapper.run_in_background = self.jobs.submit
+
         # add this as an observer
         model_wrapper.add_observer(self, self.notify)
+        model_wrapper.subscribe(self, 'unalignedRuns', self.show_unaligned)
 
         # init the window settings.
         self.resize(500, 500)
@@ -105,6 +125,12 @@ class Window(QMainWindow):
         file_menu.addAction(OpenFileAction(self, self.model_wrapper, SHORTCUT_OPEN))
 
         file_menu.addAction(ImportDataAction(self, self.model_wrapper, SHORTCUT_IMPORT))
+        precision_menu = file_menu.addMenu('Import precision')
+        precision_group = QActionGroup(self)
+        for precision in Precision:
+            precision_menu.addAction(SetPrecisionAction(self, self.model_wrapper, precision, precision_group))
+        file_menu.addAction(AddRunsAction(self, self.model_wrapper, SHORTCUT_ADD_RUNS))
+        file_menu.addAction(ClearRunsAction(self, self.model_wrapper))
         file_menu.addAction(SaveAction(self, self.model_wrapper, SHORTCUT_SAVE))
         file_menu.addAction(SaveAsAction(self, self.model_wrapper, SHORTCUT_SAVE_AS))
         file_menu.addAction(SaveIntegrationsAction(self, self.model_wrapper, SHORTCUT_SAVE_INTEGRATIONS))
@@ -128,6 +154,8 @@ class Window(QMainWindow):
 
         tools_menu = main_menu.addMenu('Tools')
         tools_menu.addAction(OpenConvolutionPickerAction(self, self.model_wrapper, SHORTCUT_CHOOSE_CONVOLUTION))
+        tools_menu.addAction(DetectPeaksAction(self, self.model_wrapper, SHORTCUT_DETECT_PEAKS))
+        tools_menu.addAction(AlignRunsAction(self, self.model_wrapper, SHORTCUT_ALIGN_RUNS))
         # TODO
 
         help_menu = main_menu.addMenu('Help')
@@ -198,6 +226,25 @@ class Window(QMainWindow):
         dialog.showNormal()  # Unminimise it.
         self.dialogs.append(dialog)
 
+    def closeEvent(self, event):
+        """
+        Stops the worker thread of the job queue before the window goes, later evaluations run right away.
+        :param event: The close event.
+        :return: None
+        """
+        self.model_wrapper.run_in_background = None
+        self.jobs.stop()
+        super().closeEvent(event)
+
+    def show_unaligned(self, runs):
+        """
+        Shows in the status bar which runs could not be aligned to the model.
+        :param runs: The Runs whose drift was not found.
+        :return: None
+        """
+        self.statusBar().showMessage("Could not align {}, the integrations are not moved for {}".format(
+            ", ".join(run.name for run in runs), "it" if len(runs) == 1 else "them"), UNALIGNED_MESSAGE_TIME)
+
     def notify(self, name, value):
         """Called when the model updates. Used to set the window name. Appends asterisk if there are unsaved changes"""
         if name == PreferenceEnum.SAVE_FILE.name and value is not None:
@@ -1,4 +1,3 @@
-import numpy as np
 from pyqtgraph import PlotWidget
 
 from gc2d.controller.listener.plot_1d_listener import Plot1DListener
@@ -27,12 +26,16 @@ class Plot1DWidget(PlotWidget):
         self.getPlotItem().setMenuEnabled(False)
         self.getPlotItem().getAxis('bottom').enableAutoSIPrefix(False)
 
-        # Register this widget as an observer of the model_wrapper.
-        model_wrapper.add_observer(self, self.notify)
+        # Subscribe this widget to the events of the model_wrapper it draws.
+        model_wrapper.subscribe(self, 'model', self.show_model)
+        model_wrapper.subscribe(self, 'model.viewTransformed', self.show_model)
+        model_wrapper.subscribe(self, ScaleEnum.X_UNIT.name, self.refresh_x_unit)
+        model_wrapper.subscribe(self, ScaleEnum.Y_UNIT_1D.name, self.refresh_y_unit)
+        model_wrapper.subscribe(self, ScaleEnum.X_PERIOD.name, self.refresh_x_period)
 
-        # call notify to draw the model.
+        # draw the model.
         if model_wrapper.model is not None:
-            self.notify('model', model_wrapper.model)
+            self.show_model(model_wrapper.model)
 
     def refresh_x_period(self, x_period):
         if x_period == 0:
@@ -52,28 +55,20 @@ class Plot1DWidget(PlotWidget):
         else:
             self.getPlotItem().getAxis('left').setLabel(units=y_unit)
 
-    def notify(self, name, value):
+    def show_model(self, model):
         """
         Updates the image rendered to match the model.
-        :param name: A String representation of the data that has changed.
-        :param value: The Value of the data that has changed.
+        :param model: the model to show, or None
         :return: None
         """
-
-        if name in {'model', 'model.viewTransformed'}:
-            if value is None or value.get_2d_chromatogram_data() is None:
-                # Then Draw nothing.
-                self.curve.setData([])
-            else:
-                # Draw the 2D chromatogram data as a 1D plot. This reversal of GCxGC is simply the integration over each
-                # Column. Thanks to the nature of GC data, this is simply the sum of each column.
-                self.curve.setData(np.sum(a=value.get_2d_chromatogram_data(), axis=1))
-                self.refresh_x_period(self.model_wrapper.get_preference(ScaleEnum.X_PERIOD))
-                self.refresh_x_unit(self.model_wrapper.get_preference(ScaleEnum.X_UNIT))
-                self.refresh_y_unit(self.model_wrapper.get_preference(ScaleEnum.Y_UNIT_1D))
-        elif name == ScaleEnum.X_UNIT.name:
-            self.refresh_x_unit(value)
-        elif name == ScaleEnum.Y_UNIT_1D.name:
-            self.refresh_y_unit(value)
-        elif name == ScaleEnum.X_PERIOD.name:
-            self.refresh_x_period(value)
+        if model is None or model.get_2d_chromatogram_data() is None:
+            # Then Draw nothing.
+            self.curve.setData([])
+        else:
+            # Draw the 2D chromatogram data as a 1D plot. This reversal of GCxGC is simply the integration over each
+            # Column. Thanks to the nature of GC data, this is simply the sum of each column.
+            self.curve.setData(model.get_projection())
+            self.model_wrapper.count_render()
+            self.refresh_x_period(self.model_wrapper.get_preference(ScaleEnum.X_PERIOD))
+            self.refresh_x_unit(self.model_wrapper.get_preference(ScaleEnum.X_UNIT))
+            self.refresh_y_unit(self.model_wrapper.get_preference(ScaleEnum.Y_UNIT_1D))
@@ -1,3 +1,4 @@
+from PyQt5.QtCore import QRectF
 from pyqtgraph import ImageItem, PlotWidget
 
 from gc2d.controller.listener.plot_2d_listener import Plot2DListener
@@ -10,6 +11,8 @@ class Plot2DWidget(PlotWidget):
     def __init__(self, model_wrapper, statusbar, parent=None):
         """
         The Plot2DWidget is responsible for rendering the 2D chromatogram data.
+        Only the part of the data in view is uploaded, taken from the level of a max-pooled pyramid that matches the
+        number of screen pixels, so zooming and panning large chromatograms stays interactive.
         :param model_wrapper: the wrapper of the model.
         :param parent: the parent of this Widget.
         """
@@ -21,20 +24,43 @@ class Plot2DWidget(PlotWidget):
         """ The image of the chromatogram"""
         self.wrapper_temp = model_wrapper  # TEMPORARY TODO What is this for?
         """A temporary reference to the wrapper?"""
+        self.frame = ImageItem()
+        """ An empty, hidden image in data coordinates for the selectors, the shown image is moved and scaled """
+        self.pyramid = None
+        """ The level of detail pyramid of the shown data """
+        self.shown = None
+        """ The level and the (padded) ranges of the region that is currently uploaded """
 
         # Add the image to the plot.
         self.addItem(self.img)
+        self.addItem(self.frame)
+        self.frame.setVisible(False)
+
+        # The image bounds follow the view, so the range is set explicitly when new data is shown.
+        view_box = self.getPlotItem().getViewBox()
+        view_box.disableAutoRange()
+        view_box.sigRangeChanged.connect(self.refresh_image)
+        view_box.sigResized.connect(self.refresh_image)
 
         # Disable right click context menu.
         self.getPlotItem().setMenuEnabled(False)
         self.getPlotItem().getAxis('bottom').enableAutoSIPrefix(False)
         self.getPlotItem().getAxis('left').enableAutoSIPrefix(False)
 
-        model_wrapper.add_observer(self, self.notify)
-
-        # call notify to draw the model. NOTE: The if statement isn't nesessary, it checks in notify if there is
-        # a model or not.
-        self.notify('model', model_wrapper.model)
+        model_wrapper.subscribe(self, 'newIntegration', self.add_selector)
+        model_wrapper.subscribe(self, 'removeIntegration', self.remove_selector)
+        model_wrapper.subscribe(self, 'model', self.show_model)
+        model_wrapper.subscribe(self, 'model.viewTransformed', self.show_model)
+        model_wrapper.subscribe(self, 'model.palette', self.refresh_palette)
+        model_wrapper.subscribe(self, 'model.lower_bound', self.refresh_levels)
+        model_wrapper.subscribe(self, 'model.upper_bound', self.refresh_levels)
+        model_wrapper.subscribe(self, ScaleEnum.X_UNIT.name, self.refresh_x_unit)
+        model_wrapper.subscribe(self, ScaleEnum.Y_UNIT.name, self.refresh_y_unit)
+        model_wrapper.subscribe(self, ScaleEnum.X_PERIOD.name, self.refresh_x_period)
+        model_wrapper.subscribe(self, ScaleEnum.Y_PERIOD.name, self.refresh_y_period)
+
+        # draw the model, show_model checks if there is a model or not.
+        self.show_model(model_wrapper.model)
 
     def refresh_x_period(self, x_period):
         if x_period == 0:
@@ -60,38 +86,89 @@ class Plot2DWidget(PlotWidget):
         else:
             self.getPlotItem().getAxis('left').setLabel(units=y_unit.name.lower())
 
-    def notify(self, name, value):
+    def add_selector(self, integration):
+        """
+        Adds the region of interest of a new integration to the plot.
+        :param integration: the new integration
+        :return: None
+        """
+        self.addItem(integration.selector.roi)
+        integration.selector.set_viewport(self.frame)
+
+    def remove_selector(self, integration):
+        """
+        Removes the region of interest of an integration from the plot.
+        :param integration: the removed integration
+        :return: None
+        """
+        self.removeItem(integration.selector.roi)
+
+    def show_model(self, model):
         """
         Updates the image rendered to match the model.
+        :param model: the model to show, or None
         :return: None
         """
+        if model is None or model.get_2d_chromatogram_data() is None:
+            self.pyramid = None
+            self.shown = None
+            self.img.clear()
+        else:
+            previous_shape = None if self.pyramid is None else self.pyramid.get_shape()
+            self.pyramid = model.get_pyramid()
+            self.shown = None
+            if self.pyramid.get_shape() != previous_shape:
+                width, height = self.pyramid.get_shape()
+                self.getPlotItem().getViewBox().setRange(xRange=(0, width), yRange=(0, height))
+            self.refresh_image()
+
+            self.refresh_x_period(self.wrapper_temp.get_preference(ScaleEnum.X_PERIOD))
+            self.refresh_y_period(self.wrapper_temp.get_preference(ScaleEnum.Y_PERIOD))
+            self.refresh_x_unit(self.wrapper_temp.get_preference(ScaleEnum.X_UNIT))
+            self.refresh_y_unit(self.wrapper_temp.get_preference(ScaleEnum.Y_UNIT))
+
+    def refresh_palette(self, model):
+        """
+        :param model: the model holding the palette
+        :return: None
+        """
+        self.img.setLookupTable(model.palette)
+
+    def refresh_levels(self, model):
+        """
+        The bounds only change the levels of the lookup, the uploaded data stays the same.
+        :param model: the model holding the bounds
+        :return: None
+        """
+        self.img.setLevels((model.lower_bound, model.upper_bound))
 
-        if name == 'newIntegration':
-            self.addItem(value.selector.roi)
-            value.selector.set_viewport(self.img)
-        elif name == 'removeIntegration':
-            self.removeItem(value.selector.roi)
-        elif name in {'model', 'model.viewTransformed'}:
-            if value is None or value.get_2d_chromatogram_data() is None:
-                self.img.clear()
-            else:
-                self.img.setImage(value.get_2d_chromatogram_data().clip(value.lower_bound, value.upper_bound),
-                                  lut=value.palette)
-
-                self.refresh_x_period(self.wrapper_temp.get_preference(ScaleEnum.X_PERIOD))
-                self.refresh_y_period(self.wrapper_temp.get_preference(ScaleEnum.Y_PERIOD))
-                self.refresh_x_unit(self.wrapper_temp.get_preference(ScaleEnum.X_UNIT))
-                self.refresh_y_unit(self.wrapper_temp.get_preference(ScaleEnum.Y_UNIT))
-        elif name == 'model.palette':
-            self.img.setLookupTable(value.palette)
-        elif name == 'model.lower_bound' or name == 'model.upper_bound':
-            self.img.setImage(value.get_2d_chromatogram_data().clip(value.lower_bound, value.upper_bound),
-                              lut=value.palette)
-        elif name == ScaleEnum.X_UNIT.name:
-            self.refresh_x_unit(value)
-        elif name == ScaleEnum.Y_UNIT.name:
-            self.refresh_y_unit(value)
-        elif name == ScaleEnum.X_PERIOD.name:
-            self.refresh_x_period(value)
-        elif name == ScaleEnum.Y_PERIOD.name:
-            self.refresh_y_period(value)
+    def refresh_image(self, *args):
+        """
+        Uploads the region in view from the matching pyramid level, unless the uploaded region already covers it.
+        The uploaded region is padded by half the view on each side, so small pans don't need a new upload.
+        :return: None
+        """
+        if self.pyramid is None:
+            return
+        view_box = self.getPlotItem().getViewBox()
+        (x0, x1), (y0, y1) = view_box.viewRange()
+        pixel_width, pixel_height = view_box.viewPixelSize()
+        level = self.pyramid.level_for(min(pixel_width, pixel_height))
+
+        if self.shown is not None:
+            shown_level, shown_x0, shown_x1, shown_y0, shown_y1 = self.shown
+            if shown_level == level and shown_x0 <= x0 and x1 <= shown_x1 and shown_y0 <= y0 and y1 <= shown_y1:
+                return
+
+        margin_x, margin_y = (x1 - x0) / 2, (y1 - y0) / 2
+        self.shown = (level, x0 - margin_x, x1 + margin_x, y0 - margin_y, y1 + margin_y)
+        region, rect = self.pyramid.region(level, (x0 - margin_x, x1 + margin_x), (y0 - margin_y, y1 + margin_y))
+        if region.size == 0:
+            self.img.clear()
+            return
+
+        model = self.wrapper_temp.model
+        # values outside the levels get the end colours of the lookup table, so the data does not need clipping.
+        self.img.setImage(region, lut=model.palette, levels=(model.lower_bound, model.upper_bound))
+        self.wrapper_temp.count_render()
+        self.img.setRect(QRectF(*rect))
@@ -1,10 +1,15 @@
+import math
+
 import numpy as np
 import pyqtgraph.opengl as gl
 from pyqtgraph.opengl import GLViewWidget
 
 from gc2d.controller.listener.plot_3d_listener import Plot3DListener
 from gc2d.model.palette import palette
-from gc2d.model.palette.shader import PaletteShader
+from gc2d.view.shader import PaletteShader
+
+MESH_SIZE = 768
+""" The maximum number of vertices along each side of the surface mesh. """
 
 
 class Plot3DWidget(GLViewWidget):
@@ -12,16 +17,28 @@ class Plot3DWidget(GLViewWidget):
     def __init__(self, model_wrapper, parent=None):
         """
         The Plot3DWidget is responsible for rendering the 3D chromatogram data, and showing highlights of integration areas
+        The surface is a bounded mesh taken from a max-pooled pyramid of the data: the whole chromatogram at a coarse
+        level when zoomed out, and a finer crop around the camera focus when zoomed in.
         :param model_wrapper: the wrapper of the model.
         :param parent: the parent of this Widget.
         """
         super().__init__(parent=parent)
         self.listener = Plot3DListener(self, model_wrapper)
         """The listener for the 3D plot"""
+        self.model_wrapper = model_wrapper
+        """The model wrapper, the renders of the surface are counted in it"""
         self.integrations = {}
         """The integrations array"""
         self.surface = gl.GLSurfacePlotItem(computeNormals=False)
         """The surface to render the chromatogram"""
+        self.shader = None
+        """The shader of the surface, its bounds and palette are updated in place"""
+        self.highlight_shader = PaletteShader(0, 1, palette.jet)
+        """The shader shared by all integration highlights"""
+        self.pyramid = None
+        """The level of detail pyramid of the shown data"""
+        self.shown = None
+        """The level and region of the current surface mesh"""
 
         # add the surface to the plot
         self.addItem(self.surface)
@@ -34,59 +51,140 @@ class Plot3DWidget(GLViewWidget):
 
         # TODO What is this? -> To get the indices working, the plot is translated depending on how large the data is,
         # to get the integration highlights to know where to be, this needs to be recorded
-        # because the plot is called within self.notify() they are set in there, that they are here is mostly for clarity
+        # because the plot is called within self.show_model() they are set in there, that they are here is mostly for
+        # clarity
         self.translation_x, self.translation_y = 0, 0
 
-        # Register this widget as an observer of the model_wrapper.
-        model_wrapper.add_observer(self, self.notify)
+        # Subscribe this widget to the events of the model_wrapper it draws.
+        model_wrapper.subscribe(self, 'integrationUpdate', self.update_highlight)
+        model_wrapper.subscribe(self, 'integrationsUpdate', self.update_highlights)
+        model_wrapper.subscribe(self, 'newIntegration', self.add_highlight)
+        model_wrapper.subscribe(self, 'showIntegration', self.show_highlight)
+        model_wrapper.subscribe(self, 'removeIntegration', self.remove_highlight)
+        model_wrapper.subscribe(self, 'model', self.show_model)
+        model_wrapper.subscribe(self, 'model.viewTransformed', self.show_model)
+        model_wrapper.subscribe(self, 'model.palette', self.set_shading)
+        model_wrapper.subscribe(self, 'model.lower_bound', self.set_shading)
+        model_wrapper.subscribe(self, 'model.upper_bound', self.set_shading)
+
+        # draw the model, show_model checks if there is a model or not.
+        self.show_model(model_wrapper.model)
+
+    def update_highlight(self, integration):
+        """
+        :param integration: the updated integration
+        :return: None
+        """
+        if integration.show is True:
+            self.set_highlight(integration)
 
-        # call notify to draw the model. NOTE: again, if statement not  required as notify already checks if   model is None.
-        self.notify('model', model_wrapper.model)
+    def update_highlights(self, integrations):
+        """
+        :param integrations: the list of updated integrations
+        :return: None
+        """
+        for integration in integrations:
+            self.update_highlight(integration)
+
+    def add_highlight(self, integration):
+        """
+        :param integration: the new integration
+        :return: None
+        """
+        highlight = gl.GLSurfacePlotItem(computeNormals=False)
+        self.addItem(highlight)
+        highlight.setShader(self.highlight_shader)
+        highlight.scale(1, 1, 0.00001)
+        self.integrations[integration.id] = highlight
 
-    def notify(self, name, value):
+    def show_highlight(self, integration):
         """
-        Updates the image rendered to match the model; is able to draw and remove integration highlights.
+        :param integration: the integration whose show has toggled
         :return: None
         """
+        if integration.show is True:
+            self.set_highlight(integration)
+            self.integrations[integration.id].setVisible(True)
+        else:
+            self.integrations[integration.id].setVisible(False)
 
-        if name == 'integrationUpdate' and value.show is True:
-            self.set_highlight(value)
-
-        if name == "newIntegration":
-            highlight = gl.GLSurfacePlotItem(computeNormals=False)
-            self.addItem(highlight)
-            highlight.setShader(
-                PaletteShader(self.lower_bound + self.offset, self.upper_bound + self.offset, palette.jet))
-            highlight.scale(1, 1, 0.00001)
-            self.integrations[value.id] = highlight
-
-        if name == "showIntegration":
-            if value.show is True:
-                self.set_highlight(value)
-                self.integrations[value.id].setVisible(True)
-            else:
-                self.integrations[value.id].setVisible(False)
-
-        if name == "removeIntegration":
-            self.removeItem(self.integrations[value.id])
-            self.integrations.pop(value.id)
-
-        if name in {'model', 'model.viewTransformed'}:
-            if value is None or value.get_2d_chromatogram_data() is None:
-                self.setVisible(False)
-            else:
-                prev_x, prev_y = self.translation_x, self.translation_y
-                self.translation_x = -len(value.get_2d_chromatogram_data()) / 2
-                self.translation_y = -len(value.get_2d_chromatogram_data()[0]) / 2
-                self.surface.translate(self.translation_x - prev_x, self.translation_y - prev_y, 0)
-                self.surface.setData(z=value.get_2d_chromatogram_data())
-                self.setVisible(True)
-                self.surface.setShader(PaletteShader(value.lower_bound, value.upper_bound, value.palette))
-                self.lower_bound = value.lower_bound
-                self.upper_bound = value.upper_bound
-                self.offset = self.upper_bound
-        if name == 'model.palette' or name == 'model.lower_bound' or name == 'model.upper_bound':
-            self.surface.setShader(PaletteShader(value.lower_bound, value.upper_bound, value.palette))
+    def remove_highlight(self, integration):
+        """
+        :param integration: the removed integration
+        :return: None
+        """
+        self.removeItem(self.integrations[integration.id])
+        self.integrations.pop(integration.id)
+
+    def show_model(self, model):
+        """
+        Updates the surface rendered to match the model.
+        :param model: the model to show, or None
+        :return: None
+        """
+        if model is None or model.get_2d_chromatogram_data() is None:
+            self.pyramid = None
+            self.setVisible(False)
+        else:
+            prev_x, prev_y = self.translation_x, self.translation_y
+            self.translation_x = -len(model.get_2d_chromatogram_data()) / 2
+            self.translation_y = -len(model.get_2d_chromatogram_data()[0]) / 2
+            self.surface.translate(self.translation_x - prev_x, self.translation_y - prev_y, 0)
+            self.pyramid = model.get_pyramid()
+            self.shown = None
+            self.refresh_mesh()
+            self.setVisible(True)
+            self.set_shading(model)
+            self.lower_bound = model.lower_bound
+            self.upper_bound = model.upper_bound
+            self.offset = self.upper_bound
+            self.highlight_shader.set_bounds(self.lower_bound + self.offset, self.upper_bound + self.offset)
+
+    def set_shading(self, model):
+        """
+        Updates the bounds and palette of the surface shader. The program is only created once, after that only its
+        uniforms change.
+        :param model: the model holding the bounds and palette
+        :return: None
+        """
+        if self.shader is None:
+            self.shader = PaletteShader(model.lower_bound, model.upper_bound, model.palette)
+            self.surface.setShader(self.shader)
+        else:
+            self.shader.set_bounds(model.lower_bound, model.upper_bound)
+            self.shader.set_palette(model.palette)
+        self.surface.update()
+
+    def refresh_mesh(self):
+        """
+        Rebuilds the surface mesh for the current camera. The mesh covers twice the visible extent around the camera
+        focus, at the finest pyramid level that fits in MESH_SIZE vertices per side, so memory and frame time stay
+        bounded regardless of the size of the data. Max-pooling keeps the peak maxima in the coarse levels.
+        :return: None
+        """
+        if self.pyramid is None:
+            return
+        width, height = self.pyramid.get_shape()
+        center_x = self.opts['center'].x() - self.translation_x
+        center_y = self.opts['center'].y() - self.translation_y
+        extent = 2 * self.opts['distance'] * math.tan(math.radians(self.opts['fov']) / 2)
+        x_range = (max(center_x - extent, 0), min(center_x + extent, width))
+        y_range = (max(center_y - extent, 0), min(center_y + extent, height))
+        if x_range[0] >= x_range[1] or y_range[0] >= y_range[1]:
+            # looking away from the data, show all of it.
+            x_range, y_range = (0, width), (0, height)
+
+        level = self.pyramid.level_for_size(max(x_range[1] - x_range[0], y_range[1] - y_range[0]), MESH_SIZE)
+        region, (x, y, _w, _h) = self.pyramid.region(level, x_range, y_range)
+        shown = (level, x, y, region.shape)
+        if shown == self.shown or min(region.shape) < 2:
+            return
+        self.shown = shown
+
+        scale = 2 ** level
+        self.surface.setData(x=x + scale * np.arange(region.shape[0]), y=y + scale * np.arange(region.shape[1]),
+                             z=region)
+        self.model_wrapper.count_render()
 
     def set_highlight(self, integration):
         """
@@ -94,8 +192,10 @@ class Plot3DWidget(GLViewWidget):
         with, if the data is inside the ROI the model data (somewhat higher to avoid clipping) and np.nan in the rest of the 
         bounding box + outside model region
         """
-        bound_x = int(integration.pos.x()) + self.translation_x
-        bound_y = int(integration.pos.y()) + self.translation_y
+        if integration.mask is None or integration.mask.size == 0:
+            return
+        bound_x = integration.pos[0] + self.translation_x
+        bound_y = integration.pos[1] + self.translation_y
         range_x = np.arange(bound_x, bound_x + len(integration.mask))
         range_y = np.arange(bound_y, bound_y + len(integration.mask[0]))
 
@@ -0,0 +1,178 @@
+import weakref
+
+import numpy as np
+from OpenGL import GL
+from PyQt5 import sip
+from PyQt5.QtGui import QOpenGLContext
+from pyqtgraph.opengl.shaders import FragmentShader, ShaderProgram, VertexShader
+
+_programs = {}
+""" The compiled palette programs, by GL context. """
+_shaders = weakref.WeakSet()
+""" The palette shaders that may hold a texture in some GL context. """
+
+
+def _context_key():
+    """
+    :return: A key identifying the current GL context, or None if there is no current Qt context.
+    """
+    context = QOpenGLContext.currentContext()
+    if context is None:
+        return None
+    key = int(sip.unwrapinstance(context))
+    if key not in _programs:
+        # release the objects of the context when it goes away, a new context could reuse the address.
+        context.aboutToBeDestroyed.connect(lambda: _release_context(context, key))
+    return key
+
+
+def delete_context_objects(key):
+    """
+    Deletes the palette program and the palette textures of a GL context, and forgets them. The context must be
+    current.
+    :param key: The key of the context, as made by _context_key.
+    :return: None
+    """
+    program = _programs.pop(key, None)
+    textures = []
+    for shader in list(_shaders):
+        if key in shader.textures:
+            textures.append(shader.textures.pop(key))
+        shader.uploaded.discard(key)
+    if textures:
+        GL.glDeleteTextures(textures)
+    if program is not None and program != -1:
+        GL.glDeleteProgram(program)
+
+
+def _release_context(context, key):
+    """
+    Releases the objects of a GL context that is about to be destroyed. Qt emits aboutToBeDestroyed without making the
+    context current, so it is made current for the deletion when it is not.
+    :param context: The QOpenGLContext.
+    :param key: The key of the context.
+    :return: None
+    """
+    current = QOpenGLContext.currentContext()
+    if current is not None and int(sip.unwrapinstance(current)) == key:
+        delete_context_objects(key)
+    elif context.surface() is not None and context.makeCurrent(context.surface()):
+        delete_context_objects(key)
+        context.doneCurrent()
+    else:
+        # the objects go with the context, only the references to them are stale.
+        _programs.pop(key, None)
+        for shader in list(_shaders):
+            shader.textures.pop(key, None)
+            shader.uploaded.discard(key)
+
+
+class PaletteShader(ShaderProgram):
+
+    def __init__(self, lower_bound, upper_bound, palette):
+        """
+        This is a custom height shader that will shade the graph based on the supplied palette and bounds.
+        The program is compiled once per GL context and shared by all palette shaders. Each shader only holds its own
+        uniforms: the bounds, and the palette as a 1D texture, so palettes of any size are supported and changing them
+        with set_bounds or set_palette does not recompile anything. Views keep one shader and change it rather than
+        making new ones; the program and textures of a context are deleted when the context is destroyed.
+        :param lower_bound: The lowest point of the shading. Points below this will be the lowest color.
+        :param upper_bound: The highest point of the shading. Points above this will be the highest color.
+        :param palette: The palette to use.
+        """
+        self.textures = {}
+        """The palette texture of this shader, by GL context."""
+        self.uploaded = set()
+        """The GL contexts whose palette texture is up to date."""
+        self.colors = None
+
+        super().__init__('palette', [
+            VertexShader("""
+                            varying vec4 pos;
+                            void main() {
+                                gl_FrontColor = gl_Color;
+                                gl_BackColor = gl_Color;
+                                pos = gl_Vertex;
+                                gl_Position = ftransform();
+                            }
+                        """),
+            FragmentShader("""
+                            #version 120
+                            uniform float lower;
+                            uniform float upper;
+                            uniform float size;
+                            uniform sampler1D palette;
+
+                            varying vec4 pos;
+
+                            void main() {
+                                float perc = clamp((pos.z - lower) / max(upper - lower, 1e-30), 0.0, 1.0);
+                                // sample between the first and last texel centres, the texture interpolates linearly.
+                                vec4 color = texture1D(palette, (perc * (size - 1.0) + 0.5) / size);
+                                color.w = 1.0;
+                                gl_FragColor = color;
+                            }
+                        """),
+        ])
+        self.set_bounds(lower_bound, upper_bound)
+        self.set_palette(palette)
+        _shaders.add(self)
+
+    def set_bounds(self, lower_bound, upper_bound):
+        """
+        :param lower_bound: The lowest point of the shading.
+        :param upper_bound: The highest point of the shading.
+        :return: None
+        """
+        self['lower'] = [lower_bound]
+        self['upper'] = [upper_bound]
+
+    def set_palette(self, palette):
+        """
+        :param palette: The palette to use.
+        :return: None
+        """
+        palette_colors = np.asarray(palette.get_colors('float'))
+        colors = np.ones((len(palette_colors), 4), dtype=np.float32)
+        colors[:, :3] = palette_colors[:, :3]
+        if self.colors is not None and np.array_equal(colors, self.colors):
+            return
+        self.colors = colors
+        self['size'] = [len(colors)]
+        self.uploaded.clear()
+
+    def program(self, **kwargs):
+        """
+        Returns the palette program of the current GL context, compiling it only the first time.
+        :return: The GL program
+        """
+        key = _context_key()
+        if key is None:
+            return super().program(**kwargs)
+        if key not in _programs:
+            self.prog = None
+            _programs[key] = super().program(**kwargs)
+        self.prog = _programs[key]
+        return self.prog
+
+    def __enter__(self):
+        super().__enter__()
+        if self.program() == -1:
+            return
+        key = _context_key()
+        if key not in self.textures:
+            self.textures[key] = GL.glGenTextures(1)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_1D, self.textures[key])
+        if key not in self.uploaded:
+            GL.glTexParameteri(GL.GL_TEXTURE_1D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+            GL.glTexParameteri(GL.GL_TEXTURE_1D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+            GL.glTexParameteri(GL.GL_TEXTURE_1D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+            GL.glTexImage1D(GL.GL_TEXTURE_1D, 0, GL.GL_RGBA, len(self.colors), 0, GL.GL_RGBA, GL.GL_FLOAT,
+                            self.colors)
+            self.uploaded.add(key)
+        GL.glUniform1i(self.uniform('palette'), 0)
+
+    def __exit__(self, *args):
+        GL.glBindTexture(GL.GL_TEXTURE_1D, 0)
+        super().__exit__(*args)
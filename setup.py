@@ -16,6 +16,11 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/GeorgeArgyrousisUni/2D-GC",
     packages=setuptools.find_packages(),
+    entry_points={
+        "console_scripts": [
+            "gc2d-batch=gc2d.batch:main"
+        ]
+    },
     install_requires=[
         "numpy",
         "PyOpenGL",
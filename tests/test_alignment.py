@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from gc2d.model.alignment import Aligner
+from gc2d.model.polygon import PolygonStatistics
+from gc2d.model.session import Run, Session
+
+SHAPE = (256, 128)
+TRIANGLE = [(40.0, 20.0), (200.0, 30.0), (120.0, 100.0)]
+
+
+def render(shape, centres, heights, seed):
+    """
+    :return: Gaussian peaks at the centres, on noise of a standard deviation of 1.
+    """
+    x = np.arange(shape[0]).reshape((-1, 1))
+    y = np.arange(shape[1]).reshape((1, -1))
+    data = np.random.default_rng(seed).normal(0, 1, shape)
+    for (cx, cy), height in zip(centres, heights):
+        data += height * np.exp(-((x - cx) ** 2 / 8 + (y - cy) ** 2 / 4.5))
+    return data
+
+
+def shift_and_drift(points):
+    """
+    :return: The displacement of points by a global shift plus a drift that grows along the first dimension.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape((-1, 2))
+    return np.column_stack([3 + 0.02 * points[:, 0], -2 + 0.01 * points[:, 0]])
+
+
+@pytest.fixture(scope='module')
+def peaks():
+    rng = np.random.default_rng(0)
+    centres = np.column_stack([rng.uniform(8, SHAPE[0] - 8, 80), rng.uniform(8, SHAPE[1] - 8, 80)])
+    return centres, rng.uniform(50, 200, 80)
+
+
+def test_follows_shift_and_drift(peaks):
+    centres, heights = peaks
+    aligner = Aligner(render(SHAPE, centres, heights, 1))
+    warp = aligner.align(render(SHAPE, centres + shift_and_drift(centres), heights, 2))
+
+    # the global shift is the drift around the middle of the run.
+    np.testing.assert_allclose(warp.shift, shift_and_drift([(SHAPE[0] / 2, 0)])[0], atol=1)
+    grid = np.stack(np.meshgrid(aligner.centres_x, aligner.centres_y, indexing='ij'), axis=-1)
+    expected = shift_and_drift(grid.reshape((-1, 2))).reshape(warp.displacements.shape)
+    np.testing.assert_allclose(warp.displacements, expected, atol=0.5)
+
+    # the drift is linear, so it is interpolated exactly between the centres of the tiles.
+    rng = np.random.default_rng(3)
+    points = np.column_stack([rng.uniform(aligner.centres_x[0], aligner.centres_x[-1], 50),
+                              rng.uniform(aligner.centres_y[0], aligner.centres_y[-1], 50)])
+    np.testing.assert_allclose(warp.map_points(points), points + shift_and_drift(points), atol=0.5)
+
+
+def test_follows_a_global_shift(peaks):
+    centres, heights = peaks
+    aligner = Aligner(render(SHAPE, centres, heights, 1))
+    warp = aligner.align(render(SHAPE, centres + (-4, 2.5), heights, 2))
+    np.testing.assert_allclose(warp.shift, (-4, 2.5), atol=0.3)
+    np.testing.assert_allclose(warp.displacements.reshape((-1, 2)), [(-4, 2.5)] * len(aligner.corners), atol=0.3)
+    np.testing.assert_allclose(warp.map_points(TRIANGLE), np.array(TRIANGLE) + (-4, 2.5), atol=0.3)
+
+
+def test_noise_is_not_aligned(peaks):
+    centres, heights = peaks
+    warp = Aligner(render(SHAPE, centres, heights, 1)).align(render(SHAPE, [], [], 2))
+    np.testing.assert_array_equal(warp.displacements, 0)
+    assert warp.map_points(TRIANGLE) == TRIANGLE
+
+
+def test_warp_tells_whether_it_is_aligned(peaks):
+    centres, heights = peaks
+    assert Aligner(render(SHAPE, centres, heights, 1)).align(render(SHAPE, centres, heights, 2)).aligned
+    assert not Aligner(render(SHAPE, centres, heights, 1)).align(render(SHAPE, [], [], 2)).aligned
+
+
+@pytest.mark.parametrize('shape', [(250, 128), (262, 128), (256, 120), (251, 134)])
+def test_other_shape_is_aligned_over_the_overlap(peaks, shape):
+    # a run a few modulations shorter or longer, or with a few more or fewer cells per modulation at its end.
+    centres, heights = peaks
+    aligner = Aligner(render(SHAPE, centres, heights, 1))
+    warp = aligner.align(render(shape, centres + (-4, 2.5), heights, 2))
+    assert warp.aligned
+    np.testing.assert_allclose(warp.shift, (-4, 2.5), atol=0.3)
+    np.testing.assert_allclose(warp.map_points(TRIANGLE), np.array(TRIANGLE) + (-4, 2.5), atol=0.5)
+
+
+def test_session_moves_polygons_with_the_drift(peaks, tmp_path):
+    centres, heights = peaks
+    reference = render(SHAPE, centres, heights, 1)
+    runs = []
+    for name, shape in (('drifted', SHAPE), ('shorter', (250, 128))):
+        data = render(shape, centres + shift_and_drift(centres), heights, 2)
+        file_name = str(tmp_path / (name + '.csv'))
+        with open(file_name, 'w') as file:
+            for row in data:
+                file.write(','.join(repr(float(value)) for value in row) + ',\n')
+        runs.append((Run(file_name), data))
+    session = Session()
+    for run, _ in runs:
+        session.add_run(run)
+    session.align = True
+    (drifted,), (shorter,) = session.evaluate([PolygonStatistics(reference, TRIANGLE)], reference=reference)
+
+    aligner = Aligner(reference)
+    for result, (run, data) in zip((drifted, shorter), runs):
+        warp = aligner.align(data)
+        assert run.is_aligned()
+        assert result.sum == pytest.approx(PolygonStatistics(data, warp.map_points(TRIANGLE)).sum)
+    # the shorter run is moved like the one of the same shape.
+    np.testing.assert_allclose(aligner.align(runs[1][1]).map_points(TRIANGLE),
+                               np.array(TRIANGLE) + shift_and_drift(TRIANGLE), atol=1)
@@ -0,0 +1,100 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from gc2d import batch
+from gc2d.model.alignment import Aligner
+from gc2d.model.gcgc_file import read_gcgc, write_gcgc
+from gc2d.model.polygon import PolygonStatistics
+from gc2d.model.transformations import Gaussian
+
+SHAPE = (128, 96)
+SQUARE = [(30.5, 20.5), (60.5, 20.5), (60.5, 45.5), (30.5, 45.5)]
+TRIANGLE = [(70.0, 50.0), (110.0, 55.0), (90.0, 85.0)]
+SHIFT = (3, -2)
+
+
+def render(centres, heights, seed):
+    """
+    :return: Gaussian peaks at the centres on a baseline of 10, with noise of a standard deviation of 1.
+    """
+    x = np.arange(SHAPE[0]).reshape((-1, 1))
+    y = np.arange(SHAPE[1]).reshape((1, -1))
+    data = np.random.default_rng(seed).normal(10, 1, SHAPE)
+    for (cx, cy), height in zip(centres, heights):
+        data += height * np.exp(-((x - cx) ** 2 / 8 + (y - cy) ** 2 / 4.5))
+    return data
+
+
+def write_csv(file_name, data):
+    with open(file_name, 'w') as file:
+        for row in data:
+            file.write(','.join(repr(float(value)) for value in row) + ',\n')
+
+
+def read_rows(file_name):
+    with open(file_name, newline='') as file:
+        return [(label, float(mean), float(total)) for label, mean, total in csv.reader(file)]
+
+
+@pytest.fixture
+def setup(tmp_path):
+    rng = np.random.default_rng(0)
+    centres = np.column_stack([rng.uniform(8, SHAPE[0] - 8, 40), rng.uniform(8, SHAPE[1] - 8, 40)])
+    heights = rng.uniform(50, 200, 40)
+    transform = Gaussian(1.5)
+    template = str(tmp_path / 'template.gcgc')
+    # the handles of an integration are relative to its position.
+    integrations = [('square', [(x - 30.5, y - 20.5) for x, y in SQUARE], (30.5, 20.5)),
+                    ('triangle', [(x - 70.0, y - 50.0) for x, y in TRIANGLE], (70.0, 50.0))]
+    write_gcgc(template, render(centres, heights, 1), integrations, {"TRANSFORM": transform.to_json()})
+    runs = {}
+    for index, offset in enumerate(((0, 0), SHIFT)):
+        file_name = str(tmp_path / 'run{}.csv'.format(index))
+        runs[file_name] = render(centres + offset, heights, 2 + index)
+        write_csv(file_name, runs[file_name])
+    return template, runs, transform
+
+
+def test_writes_the_integrations_of_every_run(setup, tmp_path):
+    template, runs, transform = setup
+    output = tmp_path / 'out'
+    assert batch.main([template, *runs, '-o', str(output), '-j', '1']) == 0
+    for index, (file_name, data) in enumerate(runs.items()):
+        shown = transform.transform(data)
+        expected = [PolygonStatistics(shown, SQUARE), PolygonStatistics(shown, TRIANGLE)]
+        rows = read_rows(output / 'run{}.csv'.format(index))
+        assert [label for label, _, _ in rows] == ['square', 'triangle']
+        for (_, mean, total), statistics in zip(rows, expected):
+            assert mean == pytest.approx(statistics.mean)
+            assert total == pytest.approx(statistics.sum)
+
+
+def test_align_moves_the_integrations_with_the_drift(setup, tmp_path):
+    template, runs, transform = setup
+    output = tmp_path / 'out'
+    assert batch.main([template, *runs, '-o', str(output), '-j', '1', '--align']) == 0
+    aligner = Aligner(transform.transform(read_gcgc(template)["model"]))
+    for index, (file_name, data) in enumerate(runs.items()):
+        shown = transform.transform(data)
+        warp = aligner.align(shown)
+        rows = read_rows(output / 'run{}.csv'.format(index))
+        for (_, mean, total), vertices in zip(rows, (SQUARE, TRIANGLE)):
+            statistics = PolygonStatistics(shown, warp.map_points(vertices))
+            assert mean == pytest.approx(statistics.mean)
+            assert total == pytest.approx(statistics.sum)
+    # the shifted run is integrated over the shifted polygons, which hold the same peaks as the template.
+    np.testing.assert_allclose(aligner.align(transform.transform(runs[list(runs)[1]])).map_points(SQUARE),
+                               np.array(SQUARE) + SHIFT, atol=0.5)
+
+
+def test_align_without_a_chromatogram_fails(setup, tmp_path, capsys):
+    _, runs, transform = setup
+    # a json gcgc file of only the integrations and preferences.
+    template = str(tmp_path / 'empty.gcgc')
+    with open(template, 'w') as file:
+        json.dump({"integrations": [], "preferences": {"TRANSFORM": transform.to_json()}}, file)
+    assert batch.main([template, *runs, '-o', str(tmp_path / 'out'), '-j', '1', '--align']) == 1
+    assert 'holds no chromatogram' in capsys.readouterr().err
@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pytest
+from scipy import ndimage
+
+from gc2d.model.transformations import Convolution, CutoffMode, DynamicCutoff, Gaussian, Min1D, Pipeline, \
+    StaticCutoff, Transform, run_tiled, tiled
+from gc2d.model.transformations.convolution import ConvolutionStrategy, separate
+
+
+def gaussian_kernel(rows, columns):
+    """
+    :return: A rank-1 kernel, the outer product of two sampled Gaussians.
+    """
+    first = np.exp(-np.linspace(-2, 2, rows) ** 2)
+    second = np.exp(-np.linspace(-2, 2, columns) ** 2)
+    return np.outer(first, second)
+
+
+@pytest.fixture(scope='module')
+def data():
+    return np.random.default_rng(0).random((90, 70)) * 100
+
+
+def convolve_with(matrix, strategy, data):
+    convolution = Convolution(matrix)
+    convolution.strategy = strategy
+    if strategy is ConvolutionStrategy.SEPARABLE:
+        convolution.separated = separate(matrix)
+    assert convolution.strategy_for(data) is strategy
+    return convolution.transform(data)
+
+
+@pytest.mark.parametrize('shape', [(3, 3), (4, 4), (5, 8), (9, 9), (12, 7)])
+@pytest.mark.parametrize('strategy', [ConvolutionStrategy.DIRECT, ConvolutionStrategy.SEPARABLE,
+                                      ConvolutionStrategy.FFT])
+def test_strategies_match_ndimage(data, shape, strategy):
+    matrix = gaussian_kernel(*shape)
+    expected = ndimage.convolve(data, matrix, mode='constant')
+    np.testing.assert_allclose(convolve_with(matrix, strategy, data), expected, rtol=1e-12, atol=1e-9)
+
+
+@pytest.mark.parametrize('shape', [(3, 3), (4, 6)])
+def test_fft_matches_ndimage_for_any_kernel(data, shape):
+    matrix = np.random.default_rng(1).standard_normal(shape)
+    expected = ndimage.convolve(data, matrix, mode='constant')
+    np.testing.assert_allclose(convolve_with(matrix, ConvolutionStrategy.FFT, data), expected, rtol=1e-12, atol=1e-9)
+
+
+@pytest.mark.parametrize('shape', [(1, 1), (1, 4), (1, 7), (1, 101), (6, 1), (99, 1)])
+def test_line_matches_ndimage(data, shape):
+    matrix = np.random.default_rng(2).random(shape)
+    convolution = Convolution(matrix)
+    assert convolution.strategy is ConvolutionStrategy.LINE
+    np.testing.assert_allclose(convolution.transform(data), ndimage.convolve(data, matrix, mode='constant'),
+                               rtol=1e-12, atol=1e-9)
+
+
+@pytest.mark.parametrize('shape', [(1, 80), (1, 300)])
+def test_line_handles_integers_and_nan(data, shape):
+    matrix = np.ones(shape)
+    integers = np.rint(data).astype(np.int32)
+    assert Convolution(matrix).strategy_for(integers) is ConvolutionStrategy.LINE
+    np.testing.assert_array_equal(Convolution(matrix).transform(integers),
+                                  ndimage.convolve(integers, matrix, mode='constant'))
+    holes = data.copy()
+    holes[10, 10] = np.nan
+    np.testing.assert_array_equal(np.isnan(Convolution(matrix).transform(holes)),
+                                  np.isnan(ndimage.convolve(holes, matrix, mode='constant')))
+
+
+def test_strategy_from_kernel():
+    assert Convolution(np.ones((3, 3))).strategy is ConvolutionStrategy.DIRECT
+    assert Convolution(gaussian_kernel(15, 15)).strategy is ConvolutionStrategy.SEPARABLE
+    assert Convolution(gaussian_kernel(40, 40)).strategy is ConvolutionStrategy.FFT
+    assert Convolution(np.random.default_rng(3).random((9, 9))).strategy is ConvolutionStrategy.FFT
+    assert Convolution(np.ones((1, 100))).strategy is ConvolutionStrategy.LINE
+    assert Convolution(np.ones((100, 1))).strategy is ConvolutionStrategy.LINE
+    assert Convolution(np.ones((1, 300))).strategy is ConvolutionStrategy.FFT
+
+
+def test_non_finite_data_is_convolved_directly(data):
+    holes = data.copy()
+    holes[5, 5] = np.inf
+    convolution = Convolution(gaussian_kernel(40, 40))
+    assert convolution.strategy_for(holes) is ConvolutionStrategy.DIRECT
+    assert convolution.strategy_for(np.rint(data).astype(np.int32)) is ConvolutionStrategy.DIRECT
+
+
+@pytest.mark.parametrize('shape', [(1, 101), (31, 1), (15, 15), (1, 300)])
+def test_tiled_matches_whole(data, shape, monkeypatch):
+    monkeypatch.setattr(tiled, 'TILE_CELLS', 8 * data.shape[1])
+    convolution = Convolution(gaussian_kernel(*shape))
+    np.testing.assert_allclose(run_tiled(convolution, data, workers=4), convolution.transform(data), rtol=1e-12,
+                               atol=1e-9)
+
+
+TRANSFORMS = [
+    Transform(),
+    Convolution(np.ones((3, 3)) / 9),
+    Convolution(gaussian_kernel(15, 15)),
+    Convolution(gaussian_kernel(40, 40)),
+    Convolution(np.ones((1, 101))),
+    Gaussian(2.0),
+    Gaussian((3.5, 1.0)),
+    Min1D(7),
+    StaticCutoff(40),
+    DynamicCutoff(30, CutoffMode.MEAN),
+    DynamicCutoff(60, CutoffMode.QUANTILE),
+    Pipeline([Gaussian((1.5, 2.0)), Min1D(5), DynamicCutoff(30, CutoffMode.MEAN)]),
+    Pipeline([Convolution(gaussian_kernel(9, 5)), StaticCutoff(45)]),
+]
+""" A transform of every type, and convolutions of every strategy. """
+
+
+@pytest.mark.parametrize('transform', TRANSFORMS, ids=lambda transform: transform.to_json()["Type"])
+@pytest.mark.parametrize('disk_backed', [False, True], ids=['memory', 'disk'])
+@pytest.mark.parametrize('into_out', [False, True], ids=['new', 'out'])
+def test_every_transform_tiled_matches_whole(data, transform, disk_backed, into_out, tmp_path, monkeypatch):
+    # tiles of the least number of rows, 4 times the halo, so the halo of every tile reaches into its neighbours.
+    # Disk-backed data is tiled on a single worker too, the stages of a pipeline on the number of processors.
+    monkeypatch.setattr(tiled, 'TILE_CELLS', data.shape[1])
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    odd = data[:89]
+    expected = odd.copy()
+    # the stages of a pipeline one by one, as the pipeline tiles them itself.
+    for stage in transform.stages if isinstance(transform, Pipeline) else [transform]:
+        expected = stage.transform(expected)
+    source = odd
+    if disk_backed:
+        source = np.memmap(str(tmp_path / 'data'), dtype=odd.dtype, mode='w+', shape=odd.shape)
+        source[:] = odd
+    out = np.empty_like(expected) if into_out else None
+    result = run_tiled(transform, source, workers=1 if disk_backed else 4, out=out)
+    if into_out:
+        assert result is out
+    np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-9)
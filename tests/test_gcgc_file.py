@@ -0,0 +1,95 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from gc2d.model import gcgc_file, store
+from gc2d.model.gcgc_file import is_binary, is_mapped_from, read_gcgc, write_gcgc
+from gc2d.model.model_wrapper import ModelWrapper
+
+
+def test_round_trip(tmp_path):
+    file_name = str(tmp_path / 'state.gcgc')
+    data = np.arange(12, dtype=np.float32).reshape((3, 4))
+    write_gcgc(file_name, data, [{"label": "a"}], {"palette": "viridis"})
+    assert is_binary(file_name)
+    loaded = read_gcgc(file_name)
+    assert isinstance(loaded["model"], np.memmap)
+    assert loaded["model"].dtype == np.float32
+    np.testing.assert_array_equal(loaded["model"], data)
+    assert loaded["integrations"] == [{"label": "a"}]
+    assert loaded["preferences"] == {"palette": "viridis"}
+
+
+def test_read_json(tmp_path):
+    file_name = str(tmp_path / 'state.gcgc')
+    with open(file_name, 'w') as file:
+        json.dump({"model": [[1.0, 2.0], [3.0, 4.0]], "integrations": []}, file)
+    assert not is_binary(file_name)
+    loaded = read_gcgc(file_name)
+    np.testing.assert_array_equal(loaded["model"], [[1, 2], [3, 4]])
+
+
+def test_is_mapped_from(tmp_path):
+    file_name = str(tmp_path / 'state.gcgc')
+    write_gcgc(file_name, np.ones((4, 4)), [], {})
+    mapped = read_gcgc(file_name)["model"]
+    assert is_mapped_from(mapped, file_name)
+    assert is_mapped_from(mapped[1:, :2], file_name)
+    assert not is_mapped_from(np.array(mapped), file_name)
+    assert not is_mapped_from(mapped, str(tmp_path / 'other.gcgc'))
+
+
+def test_save_over_mapped_file(tmp_path):
+    file_name = str(tmp_path / 'state.gcgc')
+    write_gcgc(file_name, np.ones((4, 4)), [], {})
+    mapped = read_gcgc(file_name)["model"]
+    write_gcgc(file_name, mapped * 2, [], {})
+    np.testing.assert_array_equal(read_gcgc(file_name)["model"], 2)
+
+
+def test_failed_replace(tmp_path):
+    # a directory that is not empty can not be replaced by a file on any platform.
+    target = tmp_path / 'state.gcgc'
+    target.mkdir()
+    (target / 'inside').write_text('')
+    with pytest.raises(OSError, match='could not replace'):
+        write_gcgc(str(target), np.ones((2, 2)), [], {})
+    assert os.listdir(str(tmp_path)) == ['state.gcgc']
+
+
+def open_mapped(tmp_path):
+    file_name = str(tmp_path / 'state.gcgc')
+    write_gcgc(file_name, np.arange(20, dtype=np.float64).reshape((4, 5)), [], {})
+    model_wrapper = ModelWrapper()
+    model_wrapper.replace_model(ModelWrapper.create_model(read_gcgc(file_name)["model"]))
+    events = []
+    model_wrapper.add_observer(object(), lambda name, value: events.append(name))
+    return file_name, model_wrapper, events
+
+
+def test_release_file_keeps_maps_that_do_not_block_replacing(tmp_path, monkeypatch):
+    monkeypatch.setattr(gcgc_file, 'REPLACE_MAPPED', True)
+    file_name, model_wrapper, events = open_mapped(tmp_path)
+    model_wrapper.release_file(file_name)
+    assert is_mapped_from(model_wrapper.model.get_raw_data(), file_name)
+    assert events == []
+
+
+@pytest.mark.parametrize('spill_bytes', [store.SPILL_BYTES, 0])
+def test_release_file_copies_where_mapped_files_are_not_replaced(tmp_path, monkeypatch, spill_bytes):
+    monkeypatch.setattr(gcgc_file, 'REPLACE_MAPPED', False)
+    monkeypatch.setattr(store, 'SPILL_BYTES', spill_bytes)
+    file_name, model_wrapper, events = open_mapped(tmp_path)
+    model_wrapper.release_file(file_name)
+    raw = model_wrapper.model.get_raw_data()
+    assert not is_mapped_from(raw, file_name)
+    # a large chromatogram is copied to a temporary file rather than into memory.
+    assert isinstance(raw, np.memmap) == (spill_bytes == 0)
+    np.testing.assert_array_equal(raw, np.arange(20).reshape((4, 5)))
+    # the pyramid the views draw from holds the copy too, and the copy holds the same values, so nothing is redrawn.
+    assert model_wrapper.model.get_pyramid().levels[0] is raw
+    assert events == []
+    write_gcgc(file_name, raw * 2, [], {})
+    np.testing.assert_array_equal(read_gcgc(file_name)["model"], raw * 2)
@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORBIDDEN = ['PyQt5', 'pyqtgraph', 'OpenGL', 'scipy.signal']
+""" Modules the model layer and the batch command must not import: the GUI stack, and scipy.signal, which is only
+imported when a kernel is convolved by FFT as it takes longer to import than the model together. """
+OWN_BUDGET = 0.25
+""" The seconds importing the gc2d modules may take on top of numpy and scipy.ndimage. """
+TOTAL_BUDGET = 2.0
+""" The seconds the whole import may take in a fresh interpreter, numpy and scipy.ndimage included. """
+
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import numpy, scipy.ndimage
+dependencies = time.perf_counter()
+import {modules}
+end = time.perf_counter()
+print(json.dumps({{
+    "dependencies": dependencies - start,
+    "own": end - dependencies,
+    "loaded": [name for name in {forbidden!r} if name in sys.modules],
+}}))
+'''
+
+
+def measure(modules):
+    """
+    Imports modules in a fresh interpreter.
+    :return: The seconds taken by numpy and scipy.ndimage, by the modules on top of them, and the forbidden modules that
+        were loaded. The fastest of three runs counts, so a busy machine does not fail the budget.
+    """
+    code = SCRIPT.format(modules=', '.join(modules), forbidden=FORBIDDEN)
+    runs = []
+    for _ in range(3):
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT, universal_newlines=True)
+        runs.append(json.loads(output))
+    return min(runs, key=lambda run: run["dependencies"] + run["own"])
+
+
+@pytest.mark.parametrize('modules', [
+    ['gc2d.model', 'gc2d.model.transformations', 'gc2d.batch'],
+    ['gc2d.model.model_wrapper', 'gc2d.model.session', 'gc2d.model.peaks', 'gc2d.model.alignment',
+     'gc2d.model.pyramid', 'gc2d.model.palette.palette', 'gc2d.batch'],
+])
+def test_model_imports_without_qt_within_budget(modules):
+    run = measure(modules)
+    assert run["loaded"] == []
+    assert run["own"] < OWN_BUDGET, 'importing {} took {:.3f} s'.format(modules, run["own"])
+    assert run["dependencies"] + run["own"] < TOTAL_BUDGET
@@ -0,0 +1,24 @@
+from gc2d.model.model_wrapper import ModelWrapper
+
+
+class Selector:
+    """ Stands in for the ROI drawer of an integration. """
+
+    def set_current(self, mode):
+        pass
+
+
+def test_set_current_hides_shown_integrations_in_key_order():
+    model_wrapper = ModelWrapper()
+    keys = (3, 0, 2, 1)
+    for key in keys:
+        model_wrapper.add_integration(Selector(), key)
+    # adding an integration makes it the current one, show all of them again.
+    for key in keys:
+        model_wrapper.set_show(key, True)
+    shows = []
+    model_wrapper.subscribe(object(), 'showIntegration',
+                            lambda integration: shows.append((integration.id, integration.show)))
+    model_wrapper.set_current(2)
+    assert shows == [(0, False), (1, False), (3, False)]
+    assert model_wrapper.shown == {2}
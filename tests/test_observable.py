@@ -0,0 +1,84 @@
+import pytest
+
+from gc2d.observable import Observable
+
+
+class Recorder:
+
+    def __init__(self, observable, *topics):
+        self.events = []
+        if topics:
+            for topic in topics:
+                observable.subscribe(self, topic, lambda value, topic=topic: self.events.append((topic, value)))
+        else:
+            observable.add_observer(self, lambda name, value: self.events.append((name, value)))
+
+
+def test_notify_delivers_to_subscribers_and_observers():
+    observable = Observable()
+    everything = Recorder(observable)
+    model = Recorder(observable, 'model')
+    observable.notify('model', 1)
+    observable.notify('palette', 2)
+    assert everything.events == [('model', 1), ('palette', 2)]
+    assert model.events == [('model', 1)]
+
+
+def test_transaction_coalesces():
+    observable = Observable()
+    everything = Recorder(observable)
+    with observable.transaction('edit'):
+        observable.notify('model', 1)
+        observable.notify('model.palette', 1)
+        observable.notify('model', 1)
+        assert everything.events == []
+    # 'model.palette' is covered by 'model' with the same value.
+    assert everything.events == [('model', 1)]
+    assert observable.render_counts[-1] == ('edit', 0)
+
+
+def test_exception_drops_events():
+    observable = Observable()
+    everything = Recorder(observable)
+    with pytest.raises(RuntimeError):
+        with observable.transaction('replace_model'):
+            observable.notify('model', None)
+            raise RuntimeError('failed to make the replacement')
+    assert everything.events == []
+    # the next transaction starts clean.
+    with observable.transaction():
+        observable.notify('model', 2)
+    assert everything.events == [('model', 2)]
+
+
+def test_exception_in_nested_transaction():
+    observable = Observable()
+    everything = Recorder(observable)
+    with pytest.raises(ValueError):
+        with observable.transaction('outer'):
+            observable.notify('first', 1)
+            with observable.transaction('inner'):
+                observable.notify('second', 2)
+                raise ValueError()
+    assert everything.events == []
+
+    with observable.transaction('outer'):
+        observable.notify('first', 1)
+        try:
+            with observable.transaction('inner'):
+                observable.notify('second', 2)
+                raise ValueError()
+        except ValueError:
+            pass
+    assert everything.events == [('first', 1), ('second', 2)]
+
+
+def test_events_of_observers_are_delivered_in_rounds():
+    observable = Observable()
+    received = []
+    observer = object()
+    observable.subscribe(observer, 'model', lambda value: observable.notify('bounds', value))
+    observable.subscribe(observer, 'bounds', received.append)
+    with observable.transaction():
+        observable.notify('model', 3)
+    assert received == [3]
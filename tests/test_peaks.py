@@ -0,0 +1,177 @@
+import heapq
+
+import numpy as np
+import pytest
+from scipy import ndimage
+
+from gc2d.model.peaks import PeakDetection, simplify, trace_outline
+
+BLOBS = [(20, 20, 100, 3, 2), (60, 25, 50, 4, 3), (30, 70, 80, 2, 2), (80, 80, 200, 5, 4)]
+""" Well separated blobs as (x, y, height, sigma x, sigma y). """
+
+
+def blobs(shape, specs, seed=0):
+    """
+    :return: Gaussian blobs on a baseline of 10 with noise of a standard deviation of 1.
+    """
+    x = np.arange(shape[0]).reshape((-1, 1))
+    y = np.arange(shape[1]).reshape((1, -1))
+    data = np.random.default_rng(seed).normal(10, 1, shape)
+    for cx, cy, height, sx, sy in specs:
+        data += height * np.exp(-((x - cx) ** 2 / (2 * sx ** 2) + (y - cy) ** 2 / (2 * sy ** 2)))
+    return data
+
+
+def polygon_area(vertices):
+    """
+    :return: The signed area of a polygon, positive when it is counterclockwise.
+    """
+    x, y = np.array(vertices, dtype=np.float64).T
+    return 0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+def test_finds_separated_blobs():
+    data = blobs((100, 100), BLOBS)
+    detection = PeakDetection(data, tolerance=0)
+    assert sorted(peak.position for peak in detection.peaks) == sorted((x, y) for x, y, _, _, _ in BLOBS)
+    for label, peak in enumerate(detection.peaks, 1):
+        assert peak.label == label
+        assert peak.height == data[peak.position]
+        assert peak.area == np.count_nonzero(detection.labels == label)
+        assert peak.total == pytest.approx(data[detection.labels == label].sum())
+        # the segments have no holes, so the outline traced along the cell edges holds exactly the cells.
+        assert polygon_area(peak.vertices) == peak.area
+
+
+def test_segments_split_at_the_saddle():
+    # the lower peak is next to a much higher one, the border between them is at the lowest cell between the peaks.
+    data = blobs((80, 80), [(40, 30, 100, 3, 3), (40, 42, 60, 3, 3)])
+    detection = PeakDetection(data)
+    assert [peak.position for peak in detection.peaks] == [(40, 30), (40, 42)]
+    row = detection.labels[40, 30:43]
+    saddle = 30 + int(np.argmin(data[40, 30:43]))
+    border = 30 + int(np.count_nonzero(row == 1))
+    assert abs(border - saddle) <= 1
+    assert detection.peaks[1].prominence == pytest.approx(data[40, 42] - data[40, saddle], abs=2)
+
+
+def flood_cells(values, mask, detection):
+    """
+    Floods the mask from the peak positions cell by cell, the highest cell next to a segment joins it first.
+    :return: The label of the segment of every cell, 0 where no peak reaches it.
+    """
+    labels = np.zeros(values.shape, dtype=np.intp)
+    queue = []
+    for peak in detection.peaks:
+        labels[peak.position] = peak.label
+        heapq.heappush(queue, (-values[peak.position], peak.position))
+    while queue:
+        _, (x, y) = heapq.heappop(queue)
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if 0 <= nx < values.shape[0] and 0 <= ny < values.shape[1] and mask[nx, ny] and not labels[nx, ny]:
+                labels[nx, ny] = labels[x, y]
+                heapq.heappush(queue, (-values[nx, ny], (nx, ny)))
+    return labels
+
+
+def test_segments_match_a_flood_of_the_cells():
+    # the basins are merged as a whole, so only the cells of basins that straddle a border can differ.
+    specs = [(cx, cy, height, 3, 4) for cx, cy, height in
+             ((20, 20, 100), (26, 30, 60), (35, 22, 40), (60, 60, 150), (66, 70, 90), (75, 58, 30))]
+    data = blobs((100, 100), specs)
+    detection = PeakDetection(data, prominence=3)
+    expected = flood_cells(data, data > detection.level, detection)
+    assert len(detection.peaks) == len(specs)
+    assert np.count_nonzero(detection.labels != expected) <= 0.01 * np.count_nonzero(expected)
+
+
+def test_prominence_is_to_the_highest_saddle_on_any_path():
+    # the peak on the right only touches the lower one in the middle, which joins the highest peak on the left.
+    data = blobs((60, 100), [(30, 20, 200, 6, 6), (30, 40, 50, 6, 6), (30, 60, 80, 6, 6)])
+    detection = PeakDetection(data, prominence=1)
+    assert len(detection.peaks) == 3
+    left, middle, right = sorted(detection.peaks, key=lambda peak: peak.position[1])
+    saddle = data[30, 20:61].min()
+    assert saddle > detection.level + 5
+    assert right.prominence == pytest.approx(right.height - saddle, abs=3)
+    assert left.prominence == pytest.approx(left.height - detection.level)
+
+
+def test_merges_peaks_below_the_prominence():
+    data = blobs((80, 80), [(40, 30, 100, 3, 3), (40, 40, 15, 3, 3)])
+    split = PeakDetection(data, prominence=1)
+    merged = PeakDetection(data)
+    assert [peak.position for peak in split.peaks] == [(40, 30), (40, 40)]
+    assert split.peaks[1].prominence < 5 * split.noise
+    # the shoulder is merged into the higher peak, which then has all cells of both.
+    assert [peak.position for peak in merged.peaks] == [(40, 30)]
+    assert merged.peaks[0].area == sum(peak.area for peak in split.peaks)
+    np.testing.assert_array_equal(merged.labels > 0, split.labels > 0)
+
+
+def test_drops_peaks_smaller_than_min_area():
+    data = blobs((100, 100), BLOBS)
+    detection = PeakDetection(data, min_area=150)
+    assert sorted(peak.position for peak in detection.peaks) == [(60, 25), (80, 80)]
+
+
+def test_zero_prominence_keeps_every_maximum():
+    data = blobs((80, 80), [(40, 30, 100, 3, 3), (40, 40, 15, 3, 3)])
+    detection = PeakDetection(data, prominence=0, min_area=1)
+    maxima = (data == ndimage.maximum_filter(data, 3, mode='constant', cval=-np.inf)) & (data >= detection.level)
+    assert sorted(peak.position for peak in detection.peaks) == sorted(zip(*np.nonzero(maxima)))
+    assert all(peak.prominence >= 0 for peak in detection.peaks)
+
+
+def test_no_peaks_in_noise():
+    detection = PeakDetection(blobs((50, 60), []))
+    assert detection.peaks == []
+    assert not detection.labels.any()
+
+
+def test_nan_cells_are_outside():
+    data = blobs((100, 100), BLOBS)
+    data[20, 30] = np.nan
+    data[80, 80] = np.nan
+    detection = PeakDetection(data)
+    assert len(detection.peaks) == len(BLOBS)
+    assert detection.labels[20, 30] == 0
+    assert detection.labels[80, 80] == 0
+
+
+def test_trace_outline_of_an_l():
+    mask = np.zeros((4, 4), dtype=bool)
+    mask[0:3, 0] = True
+    mask[2, 0:3] = True
+    outline = trace_outline(mask)
+    assert outline == [(0, 0), (3, 0), (3, 3), (2, 3), (2, 1), (0, 1)]
+    assert polygon_area(outline) == np.count_nonzero(mask)
+
+
+@pytest.mark.parametrize('single', [(0, 0), (3, 3)])
+def test_trace_outline_stops_at_diagonal_contact(single):
+    # a cell that only touches the square at a corner is not part of the traced region.
+    mask = np.zeros((5, 5), dtype=bool)
+    mask[1:3, 1:3] = True
+    mask[single] = True
+    outline = trace_outline(mask)
+    if single == (0, 0):
+        assert outline == [(0, 0), (1, 0), (1, 1), (0, 1)]
+    else:
+        assert outline == [(1, 1), (3, 1), (3, 3), (1, 3)]
+
+
+def test_simplify_straightens_a_staircase():
+    # the corners of a staircase of unit steps are at most 0.71 from its diagonal.
+    stairs = [(i + di, i + dj) for i in range(5) for di, dj in ((0, 0), (1, 0))]
+    polygon = stairs + [(5, 5), (0, 5)]
+    simplified = simplify(polygon, 1.0)
+    assert simplified == [(0, 0), (5, 5), (0, 5)]
+    # every corner of the steps is farther than 0.4 from the line past its neighbours.
+    assert simplify(polygon, 0.4) == polygon
+    assert simplify(polygon, 0) == polygon
+
+
+def test_simplify_keeps_small_polygons():
+    square = [(0, 0), (1, 0), (1, 1), (0, 1)]
+    assert simplify(square, 10) == square
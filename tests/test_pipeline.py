@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+import pytest
+
+from gc2d.model.transformations import CutoffMode, DynamicCutoff, Gaussian, Min1D, Pipeline, StaticCutoff, run_tiled, \
+    transform_from_json
+
+
+def make_data(shape=(120, 90), seed=0):
+    rng = np.random.default_rng(seed)
+    return np.round(rng.random(shape) * 1000)
+
+
+@pytest.mark.parametrize('stages', [
+    [Gaussian(2.0), Min1D(5)],
+    [Gaussian((1.5, 3.0)), StaticCutoff(400.5), Gaussian(1.0)],
+])
+def test_int32_data_keeps_the_precision_of_float32_between_stages(stages):
+    data = make_data()
+    expected = Pipeline(stages).transform(data)
+    result = Pipeline(stages).transform(data.astype(np.int32))
+    assert result.dtype == np.float32
+    # only the float32 rounding of every stage, the stages in between are not rounded to integers.
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-3)
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """
+    Counts the stages the pipelines compute, by the stage.
+    """
+    from gc2d.model.transformations import pipeline
+
+    stages = []
+
+    def counting(stage, data, *args, **kwargs):
+        stages.append(stage)
+        return run_tiled(stage, data, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, 'run_tiled', counting)
+    return stages
+
+
+def test_cached_stages_are_not_computed_again(computed):
+    data = make_data()
+    pipeline = Pipeline([Gaussian(2.0), Min1D(5)])
+    first = pipeline.transform(data)
+    assert len(computed) == 2
+    computed.clear()
+    assert pipeline.transform(data) is first
+    assert computed == []
+
+
+def test_stages_after_a_changed_parameter_are_computed(computed):
+    data = make_data()
+    previous = Pipeline([Gaussian(2.0), Min1D(5), StaticCutoff(100)])
+    previous.transform(data)
+    computed.clear()
+    pipeline = Pipeline([Gaussian(2.0), Min1D(7), StaticCutoff(100)])
+    pipeline.take_cache(previous)
+    result = pipeline.transform(data)
+    assert computed == pipeline.stages[1:]
+    np.testing.assert_array_equal(result, Pipeline(pipeline.stages).transform(data))
+
+
+def test_take_cache_moves_the_cache(computed):
+    data = make_data()
+    previous = Pipeline([Gaussian(2.0), Min1D(5)])
+    previous.transform(data)
+    pipeline = Pipeline([Gaussian(2.0), Min1D(5)])
+    pipeline.take_cache(previous)
+    assert previous.data is None and previous.cache == []
+    computed.clear()
+    pipeline.transform(data)
+    assert computed == []
+    # the cache is of the data it was computed for.
+    computed.clear()
+    pipeline.transform(make_data(seed=1))
+    assert computed == pipeline.stages
+
+
+def test_cache_is_dropped_before_it_is_overwritten(computed):
+    data = make_data()
+    previous = Pipeline([Gaussian(2.0), Min1D(5)])
+    previous.transform(data)
+    # the output of the first stage is passed as the buffer to write the output of the next pipeline in.
+    buffer = previous.cache[0][1]
+    pipeline = Pipeline([Gaussian(2.0), Min1D(7)])
+    pipeline.take_cache(previous)
+    computed.clear()
+    result = pipeline.transform(data, out=buffer)
+    assert computed == pipeline.stages
+    np.testing.assert_array_equal(result, Pipeline(pipeline.stages).transform(data))
+    # nothing cached refers to the overwritten array.
+    assert all(output is not buffer for _, output in pipeline.cache)
+
+
+def test_invalidate_drops_the_cache_of_rewritten_data():
+    data = make_data()
+    pipeline = Pipeline([Gaussian(2.0), Min1D(5)])
+    pipeline.transform(data)
+    data[:] = make_data(seed=1)
+    pipeline.invalidate()
+    np.testing.assert_array_equal(pipeline.transform(data), Pipeline(pipeline.stages).transform(data))
+
+
+def test_json_round_trip():
+    pipeline = Pipeline([Gaussian((1.5, 3.0)), Min1D(5), StaticCutoff(400.5), DynamicCutoff(30, CutoffMode.MEAN)])
+    copy = transform_from_json(json.loads(json.dumps(pipeline.to_json())))
+    assert isinstance(copy, Pipeline)
+    # the keys of the cache are equal, so the copy takes over the cache of the pipeline.
+    keys = [Pipeline.stage_key(stage) for stage in pipeline.stages]
+    assert [Pipeline.stage_key(stage) for stage in copy.stages] == keys
+    data = make_data()
+    np.testing.assert_array_equal(copy.transform(data), pipeline.transform(data))
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from gc2d.model.polygon import PolygonStatistics, coverage
+
+SHAPE = (40, 30)
+SAMPLES = 50
+""" The samples per cell side of the supersampled coverage. """
+
+CONVEX = [(3.3, 4.1), (25.7, 2.6), (33.2, 17.9), (12.4, 26.5)]
+CONCAVE = [(2.5, 2.5), (30.2, 3.7), (17.6, 11.3), (28.9, 24.4), (4.1, 21.8), (10.3, 12.6)]
+CLOCKWISE = CONCAVE[::-1]
+CLIPPED = [(-6.4, 5.2), (22.3, -4.7), (47.5, 12.1), (25.8, 38.3)]
+
+
+def supersample(vertices, shape):
+    """
+    :return: The fraction of the centres of a grid of SAMPLES x SAMPLES points in every cell that are inside the
+        polygon, by the even-odd rule.
+    """
+    offsets = (np.arange(SAMPLES) + 0.5) / SAMPLES
+    px = (np.arange(shape[0])[:, np.newaxis] + offsets).reshape((-1, 1))
+    py = (np.arange(shape[1])[:, np.newaxis] + offsets).reshape((1, -1))
+    inside = np.zeros((len(px), py.shape[1]), dtype=bool)
+    for (xa, ya), (xb, yb) in zip(vertices, vertices[1:] + vertices[:1]):
+        if ya == yb:
+            continue
+        crosses = (ya > py) != (yb > py)
+        inside ^= crosses & (px < xa + (py - ya) * (xb - xa) / (yb - ya))
+    return inside.reshape((shape[0], SAMPLES, shape[1], SAMPLES)).mean(axis=(1, 3))
+
+
+def full_coverage(vertices, shape):
+    """
+    :return: The covered fractions from coverage, placed in an array of the shape of the data.
+    """
+    (x, y), weights = coverage(vertices, shape)
+    covered = np.zeros(shape)
+    covered[x:x + weights.shape[0], y:y + weights.shape[1]] = weights
+    return covered
+
+
+def shoelace(vertices):
+    """
+    :return: The area of a polygon, whatever its orientation.
+    """
+    x, y = np.array(vertices).T
+    return abs(0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)))
+
+
+@pytest.mark.parametrize('vertices', [CONVEX, CONCAVE, CLOCKWISE, CLIPPED],
+                         ids=['convex', 'concave', 'clockwise', 'clipped'])
+def test_coverage_matches_supersampling(vertices):
+    # the supersampled fraction of a cell an edge crosses is off by at most about one row of samples.
+    np.testing.assert_allclose(full_coverage(vertices, SHAPE), supersample(vertices, SHAPE), atol=2 / SAMPLES)
+
+
+@pytest.mark.parametrize('vertices', [CONVEX, CONCAVE, CLOCKWISE])
+def test_coverage_sums_to_the_area(vertices):
+    assert full_coverage(vertices, SHAPE).sum() == pytest.approx(shoelace(vertices))
+
+
+def test_clipped_coverage_only_counts_the_data():
+    covered = full_coverage(CLIPPED, SHAPE)
+    assert covered.sum() < shoelace(CLIPPED)
+    assert covered.sum() == pytest.approx(supersample(CLIPPED, SHAPE).sum(), rel=1e-3)
+    # only the box of the polygon within the data is rasterized.
+    (x, y), weights = coverage(CLIPPED, SHAPE)
+    assert (x, y) == (0, 0)
+    assert weights.shape == SHAPE
+
+
+def test_statistics_weigh_the_data_by_coverage():
+    data = np.random.default_rng(0).random(SHAPE) * 100
+    statistics = PolygonStatistics(data, CONCAVE)
+    covered = full_coverage(CONCAVE, SHAPE)
+    assert statistics.area == pytest.approx(covered.sum())
+    assert statistics.sum == pytest.approx((covered * data).sum())
+    assert statistics.mean == pytest.approx(statistics.sum / statistics.area)
+    assert statistics.peak == data[covered > 0].max()
+    assert data[statistics.peak_position] == statistics.peak
+
+
+def test_recompute_reuses_the_coverage_of_the_same_shape():
+    rng = np.random.default_rng(0)
+    statistics = PolygonStatistics(rng.random(SHAPE), CONVEX)
+    data = rng.random(SHAPE)
+    recomputed = statistics.recompute(data)
+    assert recomputed.weights is statistics.weights
+    assert recomputed.sum == pytest.approx(PolygonStatistics(data, CONVEX).sum)
+
+
+def test_recompute_rasterizes_again_for_another_shape():
+    rng = np.random.default_rng(0)
+    statistics = PolygonStatistics(rng.random(SHAPE), CLIPPED)
+    data = rng.random((50, 45))
+    recomputed = statistics.recompute(data)
+    assert recomputed.weights is not statistics.weights
+    assert recomputed.shape == data.shape
+    assert recomputed.sum == pytest.approx(PolygonStatistics(data, CLIPPED).sum)
+    assert recomputed.area > statistics.area
@@ -0,0 +1,28 @@
+import numpy as np
+
+from gc2d.model.transformations import Gaussian, preview_transform
+from gc2d.model.transformations.preview import decimate
+
+
+def test_decimate():
+    proxy, steps = decimate(np.zeros((1000, 200)), size=384)
+    assert steps == (3, 1)
+    assert proxy.shape == (334, 200)
+
+
+def test_gaussian_proxy_scales_each_axis():
+    proxy = Gaussian(6.0).for_proxy((3, 2))
+    assert proxy.sigmas == (2.0, 3.0)
+    # tiles are rows of the first dimension, so the support follows the sigma along it.
+    assert proxy.support(None) == 8
+    assert Gaussian((1.0, 5.0)).support(None) == 4
+    assert Gaussian(2.5).sigmas == (2.5, 2.5)
+
+
+def test_preview_approximates_transform():
+    x, y = np.meshgrid(np.arange(768), np.arange(400), indexing='ij')
+    data = np.exp(-((x - 300) ** 2 + (y - 200) ** 2) / (2 * 40.0 ** 2))
+    result, steps = preview_transform(Gaussian(8.0), data)
+    expected = Gaussian(8.0).transform(data)[::steps[0], ::steps[1]]
+    assert result.shape == expected.shape
+    np.testing.assert_allclose(result, expected, atol=0.01)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from gc2d.model import pyramid, store
+from gc2d.model.model_wrapper import ModelWrapper
+from gc2d.model.pyramid import MIN_LEVEL_SIZE, Pyramid, max_pool
+from gc2d.model.transformations import StaticCutoff
+
+
+def brute_force(data, level):
+    """
+    :return: The maximum of every block of 2 ** level by 2 ** level cells, the blocks at the end can be smaller.
+    """
+    size = 2 ** level
+    blocks_x, blocks_y = -(-data.shape[0] // size), -(-data.shape[1] // size)
+    return np.array([[data[i * size:(i + 1) * size, j * size:(j + 1) * size].max() for j in range(blocks_y)]
+                     for i in range(blocks_x)])
+
+
+@pytest.mark.parametrize('shape', [(300, 200), (301, 77), (129, 513), (1, 400)])
+def test_levels_are_the_maximum_of_their_blocks(shape):
+    data = np.random.default_rng(0).standard_normal(shape)
+    levels = Pyramid(data).levels
+    assert levels[0] is data
+    for level, pooled in enumerate(levels):
+        np.testing.assert_array_equal(pooled, brute_force(data, level))
+    # the coarsest level is small, or a single row or column.
+    assert max(levels[-1].shape) <= MIN_LEVEL_SIZE or min(levels[-1].shape) == 1
+
+
+def test_max_pool_over_blocks_of_rows(monkeypatch):
+    # blocks of a few rows each, which may end on an odd row of the data.
+    monkeypatch.setattr(pyramid, 'row_blocks', lambda data, multiple: store.row_blocks(data, 7 * 8 * data.shape[1],
+                                                                                        multiple))
+    data = np.random.default_rng(1).standard_normal((45, 31))
+    np.testing.assert_array_equal(max_pool(data), brute_force(data, 1))
+
+
+def test_max_pool_of_disk_backed_data_is_disk_backed(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, 'SPILL_BYTES', 0)
+    data = np.random.default_rng(2).standard_normal((90, 70))
+    mapped = np.memmap(str(tmp_path / 'data'), dtype=data.dtype, mode='w+', shape=data.shape)
+    mapped[:] = data
+    pooled = max_pool(mapped)
+    assert isinstance(pooled, np.memmap)
+    np.testing.assert_array_equal(pooled, brute_force(data, 1))
+
+
+def test_region_covers_the_range():
+    data = np.random.default_rng(3).standard_normal((300, 200))
+    levels = Pyramid(data)
+    region, (x, y, width, height) = levels.region(2, (10, 50), (5, 21))
+    # the cells of level 2 are 4 cells wide, the region is widened to whole cells.
+    assert (x, y, width, height) == (8, 4, 44, 20)
+    np.testing.assert_array_equal(region, brute_force(data, 2)[2:13, 1:6])
+
+
+def test_model_shares_one_pyramid_per_shown_data():
+    model_wrapper = ModelWrapper()
+    model_wrapper.set_model(np.random.default_rng(4).random((200, 150)) * 100)
+    model = model_wrapper.model
+    raw = model.get_pyramid()
+    assert raw.levels[0] is model.get_raw_data()
+    assert model.get_pyramid() is raw
+
+    model_wrapper.set_transform(StaticCutoff(50))
+    model_wrapper.toggle_convolved(True)
+    transformed = model.get_pyramid()
+    assert transformed.levels[0] is model.convolved_data
+    assert model.get_pyramid() is transformed
+    # the next transform is written in the same array, the pyramid is built again.
+    model_wrapper.set_transform(StaticCutoff(20))
+    assert model.get_pyramid() is not transformed
+    np.testing.assert_array_equal(model.get_pyramid().levels[1], brute_force(model.convolved_data, 1))
+    model_wrapper.toggle_convolved(False)
+    assert model.get_pyramid() is raw
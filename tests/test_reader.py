@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pytest
+
+from gc2d.model.reader import count_rows, read_csv
+
+EXAMPLE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exampledata',
+                                 'csv_preprocessed')
+EXAMPLE_FILES = ['MF_AE3.txt', 'MF_AE3_reversed.txt', 'empty.txt']
+
+
+@pytest.mark.parametrize('name', EXAMPLE_FILES)
+@pytest.mark.parametrize('chunk_size', [4096, 65537])
+def test_read_csv_matches_genfromtxt(name, chunk_size):
+    file_name = os.path.join(EXAMPLE_DIRECTORY, name)
+    expected = np.genfromtxt(file_name, delimiter=',')[:, :-1]
+    data = read_csv(file_name, chunk_size=chunk_size)
+    assert data.dtype == np.float64
+    np.testing.assert_array_equal(data, expected)
+
+
+def test_read_csv_float32():
+    file_name = os.path.join(EXAMPLE_DIRECTORY, EXAMPLE_FILES[0])
+    expected = np.genfromtxt(file_name, delimiter=',')[:, :-1].astype(np.float32)
+    data = read_csv(file_name, dtype=np.float32, chunk_size=4096)
+    assert data.dtype == np.float32
+    np.testing.assert_array_equal(data, expected)
+
+
+def test_read_csv_reports_progress():
+    fractions = []
+    read_csv(os.path.join(EXAMPLE_DIRECTORY, EXAMPLE_FILES[0]), chunk_size=1 << 20, progress=fractions.append)
+    assert fractions == sorted(fractions)
+    assert fractions[-1] == 1.0
+
+
+@pytest.mark.parametrize('text', [b'1,2,3,\n4,5,6,\n', b'1,2,3,\r\n4,5,6,', b'1,2,3\n4,5,6\n\n'])
+def test_read_csv_line_endings(tmp_path, text):
+    file_name = str(tmp_path / 'run.csv')
+    with open(file_name, 'wb') as file:
+        file.write(text)
+    expected = [[1, 2], [4, 5]] if not text.startswith(b'1,2,3,') else [[1, 2, 3], [4, 5, 6]]
+    np.testing.assert_array_equal(read_csv(file_name, chunk_size=5), expected)
+
+
+def test_read_csv_inconsistent_columns(tmp_path):
+    file_name = str(tmp_path / 'run.csv')
+    with open(file_name, 'wb') as file:
+        file.write(b'1,2,3,\n4,5,\n')
+    with pytest.raises(ValueError):
+        read_csv(file_name)
+
+
+@pytest.mark.parametrize('chunk_size', [4, 4096])
+@pytest.mark.parametrize('text', [b'1,2,3,\n4,5,\n6,7,8,9,\n', b'1,2,3\n4,5\n6,7,8,9\n', b'1,2,3,\n\n4,5,6,7,\n8,9,\n'])
+def test_read_csv_ragged_rows(tmp_path, text, chunk_size):
+    # the fields of the short and the long line add up to whole lines, the lines are checked one by one.
+    file_name = str(tmp_path / 'run.csv')
+    with open(file_name, 'wb') as file:
+        file.write(text)
+    line = 2 if text.count(b'\n\n') == 0 else 3
+    with pytest.raises(ValueError, match='line {} of'.format(line)):
+        read_csv(file_name, chunk_size=chunk_size)
+
+
+def test_count_rows(tmp_path):
+    file_name = str(tmp_path / 'run.csv')
+    with open(file_name, 'wb') as file:
+        file.write(b'1,\n2,\n3,')
+    assert count_rows(file_name, chunk_size=2) == 3
+
+
+def test_read_csv_int32(tmp_path):
+    file_name = str(tmp_path / 'run.csv')
+    with open(file_name, 'wb') as file:
+        file.write(b'15280.0, -3.0, 2147483647.0,\n1, 2.0, -2147483648.0,\n')
+    data = read_csv(file_name, dtype=np.int32)
+    assert data.dtype == np.int32
+    np.testing.assert_array_equal(data, [[15280, -3, 2147483647], [1, 2, -2147483648]])
+
+
+@pytest.mark.parametrize('value', [b'1.4', b'1.6', b'-0.5'])
+def test_read_csv_int32_fractional(tmp_path, value):
+    file_name = str(tmp_path / 'run.csv')
+    with open(file_name, 'wb') as file:
+        file.write(b'1.0, 2.0, 3.0,\n4.0, ' + value + b', 6.0,\n')
+    # the values are not rounded silently, they are read as floating point instead.
+    with pytest.raises(ValueError, match='not whole numbers.*FLOAT32 or FLOAT64'):
+        read_csv(file_name, dtype=np.int32)
+    assert read_csv(file_name, dtype=np.float64)[1, 1] == float(value)
+
+
+@pytest.mark.parametrize('value', [b'2147483648.0', b'-2147483649.0', b'1e12', b'nan'])
+def test_read_csv_int32_out_of_range(tmp_path, value):
+    file_name = str(tmp_path / 'run.csv')
+    with open(file_name, 'wb') as file:
+        file.write(b'1.0, 2.0, 3.0,\n4.0, ' + value + b', 6.0,\n')
+    with pytest.raises(ValueError, match='FLOAT32 or FLOAT64'):
+        read_csv(file_name, dtype=np.int32)
+    assert read_csv(file_name, dtype=np.float64).shape == (2, 3)
@@ -0,0 +1,207 @@
+import numpy as np
+import pytest
+
+from gc2d.model.gcgc_file import write_gcgc
+from gc2d.model.model_wrapper import ModelWrapper
+from gc2d.model.polygon import PolygonStatistics
+from gc2d.model.session import Run, Session
+from gc2d.model.transformations import StaticCutoff
+
+SQUARE = [(5.5, 4.5), (20.5, 4.5), (20.5, 15.5), (5.5, 15.5)]
+TRIANGLE = [(2.0, 2.0), (30.0, 3.0), (10.0, 25.0)]
+
+
+class Selector:
+    """ Stands in for the ROI drawer of an integration. """
+
+    def set_current(self, mode):
+        pass
+
+
+class Background:
+    """ Collects the jobs handed to run_in_background, they are run when the test says so. """
+
+    def __init__(self):
+        self.jobs = []
+
+    def __call__(self, job, on_done):
+        self.jobs.append((job, on_done))
+
+    def run(self, index=0):
+        job, on_done = self.jobs.pop(index)
+        on_done(job())
+
+
+def write_run(directory, name, seed):
+    data = np.random.default_rng(seed).random((40, 30)) * 100
+    file_name = str(directory / (name + '.csv'))
+    with open(file_name, 'w') as file:
+        for row in data:
+            file.write(','.join(repr(float(value)) for value in row) + ',\n')
+    return file_name, data
+
+
+@pytest.fixture
+def model_wrapper():
+    model_wrapper = ModelWrapper()
+    model_wrapper.set_model(np.random.default_rng(0).random((40, 30)) * 100)
+    model_wrapper.add_integration(Selector(), 0)
+    model_wrapper.update_integration(0, PolygonStatistics(model_wrapper.model.get_raw_data(), SQUARE))
+    return model_wrapper
+
+
+def test_runs_are_evaluated_right_away_without_background(model_wrapper, tmp_path):
+    file_name, data = write_run(tmp_path, 'run', 1)
+    run = Run(file_name)
+    model_wrapper.add_runs([run])
+    assert model_wrapper.integrations[0].runs[run].sum == pytest.approx(PolygonStatistics(data, SQUARE).sum)
+
+
+def test_background_results_are_delivered_through_the_wrapper(model_wrapper, tmp_path):
+    background = Background()
+    model_wrapper.run_in_background = background
+    updates = []
+    model_wrapper.subscribe(object(), 'integrationsUpdate', updates.append)
+    file_name, data = write_run(tmp_path, 'run', 1)
+    run = Run(file_name)
+    model_wrapper.add_runs([run])
+    integration = model_wrapper.integrations[0]
+    assert integration.runs == {}
+    updates.clear()
+
+    background.run()
+    assert integration.runs[run].sum == pytest.approx(PolygonStatistics(data, SQUARE).sum)
+    assert updates == [[integration]]
+
+
+def test_outdated_background_results_are_dropped(model_wrapper, tmp_path):
+    background = Background()
+    model_wrapper.run_in_background = background
+    file_name, data = write_run(tmp_path, 'run', 1)
+    run = Run(file_name)
+    model_wrapper.add_runs([run])
+    model_wrapper.update_integration(0, PolygonStatistics(model_wrapper.model.get_raw_data(), TRIANGLE))
+    integration = model_wrapper.integrations[0]
+
+    # the evaluation of the square finishes after the integration became a triangle.
+    background.run()
+    assert integration.runs == {}
+    background.run()
+    assert integration.runs[run].sum == pytest.approx(PolygonStatistics(data, TRIANGLE).sum)
+
+
+def test_background_results_of_removed_runs_are_dropped(model_wrapper, tmp_path):
+    background = Background()
+    model_wrapper.run_in_background = background
+    run = Run(write_run(tmp_path, 'run', 1)[0])
+    model_wrapper.add_runs([run])
+    model_wrapper.remove_run(run)
+    background.run()
+    assert model_wrapper.integrations[0].runs == {}
+
+
+def test_lent_data_is_not_written_again(model_wrapper):
+    model = model_wrapper.model
+    model_wrapper.set_transform(StaticCutoff(50))
+    buffer = model.convolved_data
+    model.lend_data(buffer)
+    assert model.get_transform_buffer() is not buffer
+    model.return_data(buffer)
+    assert model.get_transform_buffer() is buffer
+
+
+def test_background_jobs_read_the_data_as_it_was(model_wrapper, tmp_path):
+    background = Background()
+    model_wrapper.run_in_background = background
+    model_wrapper.set_transform(StaticCutoff(50))
+    model_wrapper.toggle_convolved(True)
+    background.jobs.clear()
+    shown = model_wrapper.model.get_2d_chromatogram_data()
+    expected = shown.copy()
+    model_wrapper.add_runs([Run(write_run(tmp_path, 'run', 1)[0])])
+    # the next transform is applied while the runs are evaluated against the shown data.
+    model_wrapper.set_transform(StaticCutoff(20))
+    current = model_wrapper.model.get_2d_chromatogram_data()
+    assert current is not shown
+    np.testing.assert_array_equal(shown, expected)
+    while background.jobs:
+        background.run()
+    # once the jobs are done the shown array is written again.
+    model_wrapper.set_transform(StaticCutoff(30))
+    assert model_wrapper.model.get_2d_chromatogram_data() is current
+
+
+def test_runs_that_are_not_aligned_are_notified(model_wrapper, tmp_path):
+    # the model and the runs are noise, so no drift is found.
+    background = Background()
+    model_wrapper.run_in_background = background
+    unaligned = []
+    model_wrapper.subscribe(object(), 'unalignedRuns', unaligned.append)
+    runs = [Run(write_run(tmp_path, 'run{}'.format(index), index)[0]) for index in (1, 2)]
+    model_wrapper.add_runs(runs)
+    background.run()
+    assert unaligned == []
+    model_wrapper.set_align_runs(True)
+    background.run()
+    assert unaligned == [runs]
+    assert model_wrapper.integrations[0].runs[runs[0]].sum == pytest.approx(
+        PolygonStatistics(runs[0].get_raw_data(), SQUARE).sum)
+
+
+def test_data_is_kept_within_the_budget(tmp_path):
+    session = Session()
+    runs = [Run(write_run(tmp_path, 'run{}'.format(index), index)[0]) for index in range(3)]
+    for run in runs:
+        session.add_run(run)
+    statistics = [PolygonStatistics(np.zeros((40, 30)), SQUARE)]
+    transform = StaticCutoff(50)
+    # the raw and the transformed data of two runs.
+    size = 40 * 30 * 8
+    session.cache_bytes = 4 * size
+    session.evaluate(statistics, transform, runs[:1])
+    session.evaluate(statistics, transform, runs[1:2])
+    assert [run.get_cached_bytes() for run in runs] == [2 * size, 2 * size, 0]
+    session.evaluate(statistics, transform, runs[2:])
+    # the least recently used run is dropped first, and read and computed again when it is evaluated.
+    assert [run.get_cached_bytes() for run in runs] == [0, 2 * size, 2 * size]
+    results = session.evaluate(statistics, transform, runs[:1])
+    expected = transform.transform(runs[0].get_raw_data())
+    assert results[0][0].sum == pytest.approx(PolygonStatistics(expected, SQUARE).sum)
+    assert [run.get_cached_bytes() for run in runs] == [2 * size, 0, 2 * size]
+
+
+def test_raw_csv_data_is_counted(tmp_path):
+    session = Session()
+    runs = [Run(write_run(tmp_path, 'run{}'.format(index), index)[0]) for index in range(3)]
+    session.cache_bytes = 2 * 40 * 30 * 8
+    for run in runs:
+        run.load()
+        session.add_run(run)
+    # without a transform only the raw data is kept, the runs that were added first are dropped.
+    assert [run.get_cached_bytes() for run in runs] == [0, 40 * 30 * 8, 40 * 30 * 8]
+    results = session.evaluate([PolygonStatistics(np.zeros((40, 30)), SQUARE)], runs=runs[:1])
+    assert results[0][0].sum == pytest.approx(PolygonStatistics(runs[0].get_raw_data(), SQUARE).sum)
+    assert [run.get_cached_bytes() for run in runs] == [40 * 30 * 8, 0, 40 * 30 * 8]
+
+
+def test_mapped_data_is_not_counted(tmp_path):
+    file_name = str(tmp_path / 'run.gcgc')
+    write_gcgc(file_name, np.random.default_rng(0).random((40, 30)), [], {})
+    run = Run(file_name)
+    session = Session()
+    session.add_run(run)
+    session.evaluate([PolygonStatistics(np.zeros((40, 30)), SQUARE)])
+    assert run.get_cached_bytes() == 0
+    # the map is kept when the data of the run is dropped.
+    data = run.get_raw_data()
+    run.release_data()
+    assert run.get_raw_data() is data
+
+
+def test_aligner_is_made_again_for_another_transform():
+    reference = np.random.default_rng(0).random((64, 64))
+    session = Session()
+    aligner = session.get_aligner(reference, StaticCutoff(10))
+    assert session.get_aligner(reference, StaticCutoff(10)) is aligner
+    # the model writes the next transform in the same array.
+    assert session.get_aligner(reference, StaticCutoff(20)) is not aligner
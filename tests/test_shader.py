@@ -0,0 +1,108 @@
+import ctypes
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# the shader is checked in a surfaceless EGL context, so no display or window is needed. This has to be chosen before
+# PyOpenGL is first imported.
+if 'OpenGL' not in sys.modules:
+    os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+    os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('pyqtgraph')
+GL = pytest.importorskip('OpenGL.GL')
+
+from gc2d.model.palette import palette  # noqa: E402
+
+SIZE = 64
+
+
+@pytest.fixture(scope='module')
+def context():
+    try:
+        from OpenGL import EGL
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError('no EGL display')
+        attributes = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RENDERABLE_TYPE,
+                                      EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+        config, count = EGL.EGLConfig(), EGL.EGLint()
+        EGL.eglChooseConfig(display, attributes, ctypes.pointer(config), 1, ctypes.pointer(count))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        egl_context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+        if count.value == 0 or not egl_context or \
+                not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, egl_context):
+            raise RuntimeError('no EGL context')
+    except Exception as error:
+        pytest.skip('no OpenGL context: {}'.format(error))
+
+    framebuffer = GL.glGenFramebuffers(1)
+    GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, framebuffer)
+    renderbuffer = GL.glGenRenderbuffers(1)
+    GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, renderbuffer)
+    GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_RGBA8, SIZE, 1)
+    GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0, GL.GL_RENDERBUFFER, renderbuffer)
+    GL.glViewport(0, 0, SIZE, 1)
+    yield
+    GL.glDeleteRenderbuffers(1, [renderbuffer])
+    GL.glDeleteFramebuffers(1, [framebuffer])
+    EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+    EGL.eglDestroyContext(display, egl_context)
+
+
+def render(shader):
+    """
+    Draws a strip across the viewport whose height runs from -1 at the left to 1 at the right.
+    :return: The RGB colors of the pixels, from left to right, as floats.
+    """
+    GL.glClearColor(0, 0, 0, 0)
+    GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+    with shader:
+        GL.glBegin(GL.GL_QUADS)
+        for x, y in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+            GL.glVertex3f(x, y, x)
+        GL.glEnd()
+    pixels = GL.glReadPixels(0, 0, SIZE, 1, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE)
+    return np.frombuffer(pixels, dtype=np.uint8).reshape((SIZE, 4))[:, :3] / 255
+
+
+def expected(used_palette, lower, upper):
+    heights = (np.arange(SIZE) + 0.5) / SIZE * 2 - 1
+    fractions = np.clip((heights - lower) / (upper - lower), 0, 1)
+    colors = np.asarray(used_palette.get_colors('float'))[:, :3]
+    return np.stack([np.interp(fractions, used_palette.positions, colors[:, i]) for i in range(3)], axis=1)
+
+
+def test_palette_shader_renders_palette(context):
+    from gc2d.view.shader import PaletteShader, delete_context_objects
+    shader = PaletteShader(-1, 1, palette.viridis)
+    np.testing.assert_allclose(render(shader), expected(palette.viridis, -1, 1), atol=2 / 255)
+
+    # changing the bounds and the palette updates the uniforms and the texture of the same program.
+    program = shader.program()
+    shader.set_bounds(-0.5, 0.5)
+    shader.set_palette(palette.jet)
+    np.testing.assert_allclose(render(shader), expected(palette.jet, -0.5, 0.5), atol=2 / 255)
+    assert shader.program() == program
+
+    texture = shader.textures[None]
+    assert GL.glIsTexture(texture)
+    delete_context_objects(None)
+    assert not GL.glIsTexture(texture)
+    assert shader.textures == {}
+    assert not shader.uploaded
+
+
+def test_palette_shaders_keep_their_own_textures(context):
+    from gc2d.view.shader import PaletteShader, delete_context_objects
+    first = PaletteShader(-1, 1, palette.viridis)
+    second = PaletteShader(-1, 1, palette.jet)
+    np.testing.assert_allclose(render(first), expected(palette.viridis, -1, 1), atol=2 / 255)
+    np.testing.assert_allclose(render(second), expected(palette.jet, -1, 1), atol=2 / 255)
+    assert first.textures[None] != second.textures[None]
+    delete_context_objects(None)
+    assert first.textures == {} and second.textures == {}